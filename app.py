@@ -4,17 +4,20 @@ Servidor HTTP FastAPI para Tienda Nube API MCP
 Expone el servidor MCP como una API REST para usar en VPS
 """
 
-import json
+import asyncio
 import logging
+import os
 from typing import Optional, Dict, Any
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 
 # Importar el servidor MCP
+from catalog import endpoint_summary
+from fast_json import FastJSONResponse, dumps
 from server_simple import TiendaNubeAPIServer
 
 # Configurar logging
@@ -31,7 +34,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=FastJSONResponse
 )
 
 # Configurar CORS
@@ -71,16 +75,16 @@ async def readiness_check():
     """Verificar que el servidor está listo para recibir solicitudes"""
     try:
         # Verificar que la base de datos está cargada
-        assert mcp_server.api_database is not None
-        assert "endpoints" in mcp_server.api_database
-        
-        resources = mcp_server.api_database.get("endpoints", {})
-        total_endpoints = sum(len(v) for v in resources.values())
+        catalog = mcp_server.catalog
+        assert catalog.api_database is not None
+        assert "endpoints" in catalog.api_database
         
         return {
             "ready": True,
-            "resources": resources,
-            "total_endpoints": total_endpoints
+            "resources": {k: len(v) for k, v in catalog.api_database["endpoints"].items()},
+            "total_endpoints": catalog.total_endpoints,
+            "catalog": catalog.version_info(),
+            "search_cache": mcp_server.search_cache.stats()
         }
     except Exception as e:
         logger.error(f"Readiness check failed: {e}")
@@ -91,15 +95,20 @@ async def readiness_check():
 # Endpoints de Herramientas MCP
 # ============================================================================
 
+def _tool_response(tool: str, result: Any) -> FastJSONResponse:
+    """Serializar una sola vez el resultado estructurado de una herramienta"""
+    return FastJSONResponse({"tool": tool, "result": result})
+
+
 @app.get("/tools", tags=["Tools"])
 async def get_tools():
     """Obtener lista de todas las herramientas disponibles"""
     try:
         tools = mcp_server.get_tools_definition()
-        return {
+        return FastJSONResponse({
             "tools": tools,
             "total": len(tools)
-        }
+        })
     except Exception as e:
         logger.error(f"Error getting tools: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -113,11 +122,7 @@ async def search_endpoint(
 ):
     """Buscar endpoints en la API"""
     try:
-        result = mcp_server.search_endpoint(resource, method, query)
-        return {
-            "tool": "search_endpoint",
-            "result": json.loads(result)
-        }
+        return _tool_response("search_endpoint", mcp_server.search_endpoint_data(resource, method, query))
     except Exception as e:
         logger.error(f"Error in search_endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -131,11 +136,7 @@ async def get_endpoint_details(
 ):
     """Obtener detalles completos de un endpoint"""
     try:
-        result = mcp_server.get_endpoint_details(resource, path, method)
-        return {
-            "tool": "get_endpoint_details",
-            "result": json.loads(result)
-        }
+        return _tool_response("get_endpoint_details", mcp_server.get_endpoint_details_data(resource, path, method))
     except Exception as e:
         logger.error(f"Error in get_endpoint_details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -148,11 +149,7 @@ async def get_schema(
 ):
     """Obtener esquema JSON"""
     try:
-        result = mcp_server.get_schema(resource, endpoint_type)
-        return {
-            "tool": "get_schema",
-            "result": json.loads(result)
-        }
+        return _tool_response("get_schema", mcp_server.get_schema_data(resource, endpoint_type))
     except Exception as e:
         logger.error(f"Error in get_schema: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -164,11 +161,7 @@ async def search_documentation(
 ):
     """Buscar en la documentación"""
     try:
-        result = mcp_server.search_documentation(query)
-        return {
-            "tool": "search_documentation",
-            "result": json.loads(result)
-        }
+        return _tool_response("search_documentation", mcp_server.search_documentation_data(query))
     except Exception as e:
         logger.error(f"Error in search_documentation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -183,11 +176,7 @@ async def get_code_example(
 ):
     """Obtener ejemplo de código"""
     try:
-        result = mcp_server.get_code_example(resource, path, method, language)
-        return {
-            "tool": "get_code_example",
-            "result": result
-        }
+        return _tool_response("get_code_example", mcp_server.get_code_example_data(resource, path, method, language))
     except Exception as e:
         logger.error(f"Error in get_code_example: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -197,11 +186,7 @@ async def get_code_example(
 async def get_authentication_info():
     """Obtener información de autenticación"""
     try:
-        result = mcp_server.get_authentication_info()
-        return {
-            "tool": "get_authentication_info",
-            "result": json.loads(result)
-        }
+        return _tool_response("get_authentication_info", mcp_server.get_authentication_info_data())
     except Exception as e:
         logger.error(f"Error in get_authentication_info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -211,11 +196,7 @@ async def get_authentication_info():
 async def get_multi_inventory_info():
     """Obtener información sobre multi-inventario"""
     try:
-        result = mcp_server.get_multi_inventory_info()
-        return {
-            "tool": "get_multi_inventory_info",
-            "result": json.loads(result)
-        }
+        return _tool_response("get_multi_inventory_info", mcp_server.get_multi_inventory_info_data())
     except Exception as e:
         logger.error(f"Error in get_multi_inventory_info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -225,11 +206,7 @@ async def get_multi_inventory_info():
 async def list_resources():
     """Listar recursos disponibles"""
     try:
-        result = mcp_server.list_resources()
-        return {
-            "tool": "list_resources",
-            "result": json.loads(result)
-        }
+        return _tool_response("list_resources", mcp_server.list_resources_data())
     except Exception as e:
         logger.error(f"Error in list_resources: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -239,22 +216,29 @@ async def list_resources():
 # Endpoints de Información
 # ============================================================================
 
-@app.get("/info", tags=["Info"])
-async def get_info():
-    """Obtener información del servidor"""
-    try:
-        resources = mcp_server.api_database.get("endpoints", {})
-        total_endpoints = sum(len(v) for v in resources.values())
-        
-        return {
+def _info_payload(catalog) -> bytes:
+    """Payload de /info, serializado una sola vez por versión del catálogo"""
+    info = catalog.responses.get("http_info")
+    if info is None:
+        resources = catalog.api_database.get("endpoints", {})
+        info = catalog.responses["http_info"] = dumps({
             "name": "Tienda Nube API MCP Server",
             "version": "1.0.0",
-            "api_version": mcp_server.api_database.get("metadata", {}).get("version", "unknown"),
+            "api_version": catalog.api_database.get("metadata", {}).get("version", "unknown"),
+            "catalog": catalog.version_info(),
             "resources": {k: len(v) for k, v in resources.items()},
-            "total_endpoints": total_endpoints,
-            "tools": len(mcp_server.get_tools_definition()),
+            "total_endpoints": catalog.total_endpoints,
+            "tools": len(mcp_server.tools),
             "documentation_url": "https://tiendanube.github.io/api-documentation/"
-        }
+        })
+    return info
+
+
+@app.get("/info", tags=["Info"])
+async def get_info():
+    """Obtener información del servidor"""
+    try:
+        return Response(content=_info_payload(mcp_server.catalog), media_type="application/json")
     except Exception as e:
         logger.error(f"Error in get_info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -264,29 +248,22 @@ async def get_info():
 async def get_all_endpoints(resource: Optional[str] = Query(None)):
     """Obtener lista de todos los endpoints"""
     try:
-        endpoints_data = mcp_server.api_database.get("endpoints", {})
+        endpoints_data = mcp_server.catalog.api_database.get("endpoints", {})
         
         if resource:
             if resource not in endpoints_data:
                 raise HTTPException(status_code=404, detail=f"Recurso '{resource}' no encontrado")
             endpoints_data = {resource: endpoints_data[resource]}
         
-        result = {}
-        for res_name, endpoints in endpoints_data.items():
-            result[res_name] = [
-                {
-                    "method": ep.get("method"),
-                    "path": ep.get("path"),
-                    "name": ep.get("name"),
-                    "description": ep.get("description")
-                }
-                for ep in endpoints
-            ]
+        result = {
+            res_name: [endpoint_summary(ep) for ep in endpoints]
+            for res_name, endpoints in endpoints_data.items()
+        }
         
-        return {
+        return FastJSONResponse({
             "endpoints": result,
             "total": sum(len(v) for v in result.values())
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -338,10 +315,19 @@ async def startup_event():
     logger.info(f"Documentación disponible en: http://localhost:8000/docs")
     logger.info(f"Health check: http://localhost:8000/health")
 
+    # Recarga en caliente del catálogo (CATALOG_RELOAD_INTERVAL=0 la desactiva)
+    interval = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+    if interval > 0:
+        mcp_server.reloader.interval = interval
+        app.state.catalog_reloader_task = asyncio.create_task(mcp_server.reloader.run())
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento de cierre"""
+    task = getattr(app.state, "catalog_reloader_task", None)
+    if task:
+        task.cancel()
     logger.info("Tienda Nube API MCP Server detenido")
 
 
@@ -4,16 +4,39 @@ Servidor MCP Completo para Tienda Nube API
 Expone TODOS los 111 endpoints de la API como herramientas MCP
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi_mcp import FastApiMCP
+from pydantic import BaseModel, Field
+import asyncio
+import httpx
 import json
 import logging
+import math
+import os
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 
+from batch_get import DEFAULT_CONCURRENCY as BATCH_GET_DEFAULT_CONCURRENCY
+from batch_get import BatchGet, json_document_chunks, split_detail_path
+from bulk_update import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, bulk_update_stock_price
+from catalog import SEARCH_RESULTS_LIMIT, Catalog, CatalogReloader, endpoint_summary
+from catalog_pack import pack_path_for
+from catalog_search import normalize_query
+from fast_json import FastJSONResponse, dumps
+from http_cache import CatalogETagMiddleware
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics import Metrics, MetricsMiddleware
+from pagination import PAGINATION_MODES, PaginationError, Paginator, ndjson_chunks, sse_chunks, supports_since_id
+from resilience import CircuitOpenError
+from result_cache import ResultCache
+from store_mirror import SYNC_RESOURCES, StoreMirror, run_periodic_sync, sync_store
+from tiendanube_client import TiendaNubeClient, build_path, response_payload
+from upstream_cache import WRITE_METHODS, UpstreamCache
+from webhook_ingest import SIGNATURE_HEADER, MirrorWebhookApplier, WebhookIngestor, verify_signature
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,7 +45,39 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Tienda Nube MCP - Servidor Completo",
     description="Servidor MCP con TODOS los 111 endpoints de la API de Tienda Nube",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
+)
+
+# Herramientas de consulta: su respuesta sólo depende del catálogo y los argumentos
+CATALOG_TOOLS = [
+    "search_endpoint",
+    "get_endpoint_details",
+    "get_schema",
+    "search_documentation",
+    "get_code_example",
+    "list_resources",
+    "get_resource_endpoints",
+    "get_authentication_info",
+    "get_multi_inventory_info"
+]
+
+# Caché de resultados de búsqueda (SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES, SEARCH_CACHE_TTL)
+SEARCH_CACHE = ResultCache.from_env("SEARCH_CACHE")
+
+# Segundos que clientes y nginx pueden reutilizar una respuesta del catálogo sin revalidar
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+
+# Paths que CatalogETagMiddleware puede responder con 304 antes del router
+CATALOG_CACHEABLE_PATHS = ["/info"] + [f"/tools/{name}" for name in CATALOG_TOOLS]
+
+# ETag / If-None-Match / Cache-Control (agregado antes que CORS para que los 304 lleven CORS)
+app.add_middleware(
+    CatalogETagMiddleware,
+    get_version=lambda: CATALOG.version,
+    paths=CATALOG_CACHEABLE_PATHS,
+    prefixes=["/.well-known/"],
+    max_age=CATALOG_CACHE_MAX_AGE,
 )
 
 # Agregar CORS - IMPORTANTE: Debe estar ANTES de montar FastAPI-MCP
@@ -35,23 +90,262 @@ app.add_middleware(
     expose_headers=["*"],  # Exponer headers para SSE
 )
 
+# Métricas Prometheus en /metrics (METRICS=0 las desactiva); agregado último
+# para medir también los 304 y los errores de los demás middlewares
+METRICS = Metrics.from_env()
+if METRICS is not None:
+    app.add_middleware(
+        MetricsMiddleware,
+        metrics=METRICS,
+        paths=CATALOG_CACHEABLE_PATHS + ["/.well-known/mcp", "/.well-known/ai-plugin.json"],
+        sessions_path="/mcp",
+    )
+METRICS_REFRESH_INTERVAL = float(os.getenv("METRICS_REFRESH_INTERVAL", "5"))
+
+# Ubicar base de datos completa (se prefiere el .pack compacto si está al día)
+# Intentar cargar desde ruta absoluta (VPS)
+DB_PATH = Path('/home/ubuntu/tiendanube_mcp/api_database_complete.json')
+if not (DB_PATH.exists() or pack_path_for(DB_PATH).exists()):
+    # Si no existe, intentar desde ruta relativa (local/Docker)
+    DB_PATH = Path(__file__).parent / 'api_database_complete.json'
+if not (DB_PATH.exists() or pack_path_for(DB_PATH).exists()):
+    # Fallback a api_database.json
+    DB_PATH = Path(__file__).parent / 'api_database.json'
+
+# Segundos entre chequeos de cambios en el catálogo (0 desactiva la recarga en caliente)
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+
+
+
+def _build_static_responses(catalog: Catalog) -> Dict[str, bytes]:
+    """
+    Construir una sola vez los payloads que sólo dependen de la base de datos
+
+    Se guardan ya serializados; deben reconstruirse únicamente cuando
+    cambia la base de datos.
+    """
+    api_database = catalog.api_database
+    endpoints = api_database.get('endpoints', {})
+    total_endpoints = catalog.total_endpoints
+
+    resources = [
+        {
+            "resource": resource,
+            "endpoint_count": len(resource_endpoints),
+            "endpoints": [
+                {
+                    "method": e.get('method'),
+                    "path": e.get('path'),
+                    "name": e.get('name')
+                }
+                for e in resource_endpoints
+            ]
+        }
+        for resource, resource_endpoints in endpoints.items()
+    ]
+
+    payloads = {
+        "info": {
+            "name": "Tienda Nube MCP - Servidor Completo",
+            "version": "2.0.0",
+            "api_version": "2025-03",
+            "resources": len(endpoints),
+            "endpoints": total_endpoints,
+            "coverage": "100%",
+            "resources_list": list(endpoints.keys()),
+            "catalog": catalog.version_info()
+        },
+        "root": {
+            "name": "Tienda Nube MCP - Servidor Completo",
+            "version": "2.0.0",
+            "description": "Servidor MCP con TODOS los 111 endpoints de la API de Tienda Nube",
+            "resources": len(endpoints),
+            "coverage": "100%",
+            "documentation": "/docs",
+            "mcp_endpoint": "/mcp",
+            "endpoints": {
+                "health": "/health",
+                "ready": "/ready",
+                "info": "/info",
+                "mcp": "/mcp"
+            }
+        },
+        "list_resources": {
+            "total_resources": len(resources),
+            "total_endpoints": total_endpoints,
+            "resources": resources
+        },
+        "authentication_info": {
+            "authentication_type": "OAuth 2.0",
+            "base_url": "https://api.tiendanube.com/v1",
+            "required_headers": {
+                "Authorization": "Bearer ACCESS_TOKEN",
+                "User-Agent": "MyApp (name@email.com)"
+            },
+            "rate_limiting": {
+                "general": "30 requests/second",
+                "tools": "10 requests/second"
+            },
+            "documentation": "https://tiendanube.github.io/api-documentation/intro"
+        },
+        "multi_inventory_info": {
+            "feature": "Multi-Inventory Support",
+            "version": "2025-03",
+            "description": "Nueva API de Productos con soporte para múltiples ubicaciones/almacenes",
+            "key_features": [
+                "Gestión de inventario por ubicación",
+                "Sincronización de stock en tiempo real",
+                "Soporte para múltiples almacenes",
+                "Asignación inteligente de inventario"
+            ],
+            "endpoints_affected": [
+                "GET /products",
+                "GET /products/{id}",
+                "POST /products",
+                "PUT /products/{id}",
+                "PATCH /products/stock-price"
+            ],
+            "documentation": "https://tiendanube.github.io/api-documentation/guides/multi-inventory/products"
+        }
+    }
+    return {name: dumps(payload) for name, payload in payloads.items()}
+
+
+def _build_catalog(path: Path) -> Catalog:
+    """Cargar catálogo, índices y payloads pre-serializados de una versión"""
+    catalog = Catalog.load(path)
+    catalog.responses.update(_build_static_responses(catalog))
+    return catalog
+
+
+# Versión reemplazada en la última recarga: se cierra en la siguiente, cuando
+# ya no puede quedar un request usándola
+_RETIRED_CATALOGS: List[Catalog] = []
+
+
+def _swap_catalog(catalog: Catalog):
+    """Publicar una nueva versión del catálogo (una sola asignación atómica)"""
+    global CATALOG
+    previous, CATALOG = CATALOG, catalog
+    while _RETIRED_CATALOGS:
+        retired = _RETIRED_CATALOGS.pop()
+        if retired is not catalog:
+            retired.close()
+    if previous is not catalog:
+        _RETIRED_CATALOGS.append(previous)
+
+
 # Cargar base de datos completa
 try:
-    # Intentar cargar desde ruta absoluta (VPS)
-    db_path = Path('/home/ubuntu/tiendanube_mcp/api_database_complete.json')
-    if not db_path.exists():
-        # Si no existe, intentar desde ruta relativa (local/Docker)
-        db_path = Path(__file__).parent / 'api_database_complete.json'
-    if not db_path.exists():
-        # Fallback a api_database.json
-        db_path = Path(__file__).parent / 'api_database.json'
-    
-    with open(db_path, 'r', encoding='utf-8') as f:
-        API_DATABASE = json.load(f)
-    logger.info(f"✅ Base de datos cargada: {len(API_DATABASE.get('endpoints', {}))} recursos")
+    CATALOG = _build_catalog(DB_PATH)
+    logger.info(f"✅ Base de datos cargada: {CATALOG.total_resources} recursos "
+                f"(versión {CATALOG.version})")
 except Exception as e:
     logger.error(f"❌ Error cargando base de datos: {e}")
-    API_DATABASE = {"endpoints": {}, "metadata": {}}
+    CATALOG = Catalog({"endpoints": {}, "metadata": {}})
+    CATALOG.responses.update(_build_static_responses(CATALOG))
+
+
+def _static_response(name: str) -> Response:
+    """Responder con un payload pre-serializado sin volver a codificarlo"""
+    return Response(content=CATALOG.responses[name], media_type="application/json")
+
+
+@app.on_event("startup")
+async def start_catalog_reloader():
+    """Vigilar el archivo del catálogo y recargarlo en caliente si cambia"""
+    if CATALOG_RELOAD_INTERVAL <= 0:
+        return
+    reloader = CatalogReloader(DB_PATH, _build_catalog, _swap_catalog,
+                               interval=CATALOG_RELOAD_INTERVAL,
+                               signature=CATALOG.signature or None)
+    app.state.catalog_reloader = reloader
+    app.state.catalog_reloader_task = asyncio.create_task(reloader.run())
+
+
+@app.on_event("shutdown")
+async def stop_catalog_reloader():
+    task = getattr(app.state, "catalog_reloader_task", None)
+    if task:
+        task.cancel()
+
+
+# Cliente compartido para llamar a la API real (pools keep-alive/HTTP2 por tienda)
+TIENDANUBE_CLIENT = TiendaNubeClient.from_env(metrics=METRICS)
+
+
+@app.on_event("shutdown")
+async def close_tiendanube_client():
+    await TIENDANUBE_CLIENT.aclose()
+
+# Caché de GETs a la API con TTL por recurso (UPSTREAM_CACHE=memory|disk|off)
+UPSTREAM_CACHE = UpstreamCache.from_env()
+
+# Espejo SQLite opcional de la tienda (STORE_MIRROR_PATH) para lecturas repetidas
+STORE_MIRROR = StoreMirror.from_env()
+STORE_MIRROR_SYNC_INTERVAL = float(os.getenv("STORE_MIRROR_SYNC_INTERVAL", "300"))
+# Cada cuánto una sincronización completa borra del espejo lo eliminado en la tienda (0 = sólo la primera)
+STORE_MIRROR_FULL_SYNC_INTERVAL = float(os.getenv("STORE_MIRROR_FULL_SYNC_INTERVAL", "86400"))
+
+
+@app.on_event("startup")
+async def start_store_mirror_sync():
+    """Sincronizar el espejo de TIENDANUBE_STORE_ID cada STORE_MIRROR_SYNC_INTERVAL segundos"""
+    store_id = os.getenv("TIENDANUBE_STORE_ID")
+    if STORE_MIRROR is None or STORE_MIRROR_SYNC_INTERVAL <= 0 or not store_id:
+        return
+    # Corre en cada worker, pero sólo sincroniza el que tiene el lock del espejo
+    app.state.store_mirror_task = asyncio.create_task(run_periodic_sync(
+        STORE_MIRROR, TIENDANUBE_CLIENT, store_id, os.getenv("TIENDANUBE_ACCESS_TOKEN"),
+        STORE_MIRROR_SYNC_INTERVAL, leader=STORE_MIRROR.acquire_sync_lock,
+        full_every=STORE_MIRROR_FULL_SYNC_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def stop_store_mirror_sync():
+    task = getattr(app.state, "store_mirror_task", None)
+    if task:
+        task.cancel()
+
+
+# Webhooks de Tienda Nube: firma con el client secret de la app
+WEBHOOK_SECRET = os.getenv("TIENDANUBE_WEBHOOK_SECRET") or os.getenv("TIENDANUBE_CLIENT_SECRET")
+
+
+async def _apply_webhooks(batch: List[Dict[str, Any]]):
+    """Aplicar un lote de webhooks a la caché de la API y al espejo local (si están activos)"""
+    if UPSTREAM_CACHE is not None:
+        for store_id, resource in {(event["store_id"], event["resource"]) for event in batch}:
+            await UPSTREAM_CACHE.ainvalidate(store_id, resource)
+    if STORE_MIRROR is not None:
+        applier = MirrorWebhookApplier(STORE_MIRROR, TIENDANUBE_CLIENT,
+                                       lambda store_id: os.getenv("TIENDANUBE_ACCESS_TOKEN"))
+        await applier(batch)
+
+
+WEBHOOK_INGESTOR = WebhookIngestor(
+    _apply_webhooks,
+    max_pending=int(os.getenv("WEBHOOK_MAX_PENDING", "10000")),
+    batch_size=int(os.getenv("WEBHOOK_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("WEBHOOK_FLUSH_INTERVAL", "0.5")),
+    max_retries=int(os.getenv("WEBHOOK_MAX_RETRIES", "3")),
+    retry_backoff=float(os.getenv("WEBHOOK_RETRY_BACKOFF", "1.0")),
+    dead_letter_path=os.getenv("WEBHOOK_DEAD_LETTER_PATH") or None,
+)
+
+
+@app.on_event("startup")
+async def start_webhook_ingestor():
+    app.state.webhook_task = asyncio.create_task(WEBHOOK_INGESTOR.run())
+
+
+@app.on_event("shutdown")
+async def stop_webhook_ingestor():
+    task = getattr(app.state, "webhook_task", None)
+    if task:
+        task.cancel()
+    # Lo que quedó sin aplicar va a la cola de fallidos en lugar de perderse
+    WEBHOOK_INGESTOR.spill()
 
 # ===== ENDPOINTS DE SALUD =====
 
@@ -67,56 +361,72 @@ async def health():
 @app.get("/ready")
 async def ready():
     """Readiness check del servidor"""
+    catalog = CATALOG
     return {
         "status": "ready",
-        "resources": len(API_DATABASE['endpoints']),
-        "endpoints": sum(len(e) for e in API_DATABASE['endpoints'].values()),
+        "resources": catalog.total_resources,
+        "endpoints": catalog.total_endpoints,
+        "catalog": catalog.version_info(),
+        "search_cache": SEARCH_CACHE.stats(),
+        "upstream": TIENDANUBE_CLIENT.stats(),
+        "upstream_cache": UPSTREAM_CACHE.stats() if UPSTREAM_CACHE else None,
+        "store_mirror": STORE_MIRROR.stats() if STORE_MIRROR else None,
+        "webhooks": WEBHOOK_INGESTOR.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/info")
 async def info():
     """Información del servidor MCP"""
-    return {
-        "name": "Tienda Nube MCP - Servidor Completo",
-        "version": "2.0.0",
-        "api_version": "2025-03",
-        "resources": len(API_DATABASE['endpoints']),
-        "endpoints": sum(len(e) for e in API_DATABASE['endpoints'].values()),
-        "coverage": "100%",
-        "resources_list": list(API_DATABASE['endpoints'].keys())
-    }
+    return _static_response("info")
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Métricas Prometheus (sumadas entre workers con PROMETHEUS_MULTIPROC_DIR)"""
+    if METRICS is None:
+        raise HTTPException(status_code=503, detail="Métricas desactivadas (instalar prometheus_client)")
+    return Response(content=METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.on_event("startup")
+async def start_metrics_refresh():
+    # Cada worker copia cachés y versión del catálogo a sus métricas fuera de los requests
+    if METRICS is not None and METRICS_REFRESH_INTERVAL > 0:
+        app.state.metrics_task = asyncio.create_task(METRICS.run(METRICS_REFRESH_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def stop_metrics_refresh():
+    task = getattr(app.state, "metrics_task", None)
+    if task:
+        task.cancel()
 
 # ===== HERRAMIENTAS MCP =====
 
+def _search_endpoint_results(catalog: Catalog, query: str, resource: Optional[str]):
+    """(total de hits, SEARCH_RESULTS_LIMIT mejores resultados) de search_endpoint"""
+    hits = catalog.search_endpoints(query, resource=resource)
+    # Los hits vienen ordenados por BM25: los primeros son los más relevantes
+    results = [
+        {"resource": hit_resource, **endpoint_summary(endpoint), "score": round(score, 3)}
+        for hit_resource, endpoint, score in hits[:SEARCH_RESULTS_LIMIT]
+    ]
+    return len(hits), results
+
 @app.post("/tools/search_endpoint", operation_id="search_endpoint")
 async def search_endpoint(query: str, resource: Optional[str] = None):
     """Buscar endpoints por nombre, método o path"""
     try:
-        results = []
-        
-        # Filtrar por recurso si se especifica
-        resources_to_search = {resource: API_DATABASE['endpoints'][resource]} if resource else API_DATABASE['endpoints']
-        
-        for res_name, endpoints in resources_to_search.items():
-            for endpoint in endpoints:
-                if (query.lower() in endpoint.get('name', '').lower() or
-                    query.lower() in endpoint.get('path', '').lower() or
-                    query.lower() in endpoint.get('method', '').lower() or
-                    query.lower() in endpoint.get('description', '').lower()):
-                    results.append({
-                        "resource": res_name,
-                        "method": endpoint.get('method'),
-                        "path": endpoint.get('path'),
-                        "name": endpoint.get('name'),
-                        "description": endpoint.get('description')
-                    })
+        catalog = CATALOG
+        key = ("search_endpoint", catalog.version, normalize_query(query), resource)
+        results_count, results = SEARCH_CACHE.get_or_compute(
+            key, lambda: _search_endpoint_results(catalog, query, resource))
         
-        return {
+        return FastJSONResponse({
             "query": query,
-            "results_count": len(results),
-            "results": results[:20]  # Limitar a 20 resultados
-        }
+            "results_count": results_count,
+            "results": results
+        })
     except Exception as e:
         logger.error(f"Error en search_endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -125,14 +435,14 @@ async def search_endpoint(query: str, resource: Optional[str] = None):
 async def get_endpoint_details(path: str, method: str):
     """Obtener detalles completos de un endpoint"""
     try:
-        for resource, endpoints in API_DATABASE['endpoints'].items():
-            for endpoint in endpoints:
-                if endpoint.get('path') == path and endpoint.get('method') == method:
-                    return {
-                        "resource": resource,
-                        "endpoint": endpoint,
-                        "found": True
-                    }
+        match = CATALOG.lookup(method, path)
+        if match:
+            resource, endpoint = match
+            return {
+                "resource": resource,
+                "endpoint": dict(endpoint),
+                "found": True
+            }
         
         return {
             "found": False,
@@ -146,43 +456,60 @@ async def get_endpoint_details(path: str, method: str):
 async def get_schema(path: str, method: str):
     """Obtener esquema JSON de solicitud/respuesta"""
     try:
-        for resource, endpoints in API_DATABASE['endpoints'].items():
-            for endpoint in endpoints:
-                if endpoint.get('path') == path and endpoint.get('method') == method:
-                    return {
-                        "resource": resource,
-                        "path": path,
-                        "method": method,
-                        "parameters": endpoint.get('parameters', {}),
-                        "description": endpoint.get('description')
-                    }
+        match = CATALOG.lookup(method, path)
+        if match:
+            resource, endpoint = match
+            return {
+                "resource": resource,
+                "path": path,
+                "method": method,
+                "parameters": endpoint.get('parameters', {}),
+                "description": endpoint.get('description')
+            }
         
         return {"error": "Endpoint no encontrado"}
     except Exception as e:
         logger.error(f"Error en get_schema: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _search_documentation_results(catalog: Catalog, query: str):
+    """(total de hits, SEARCH_RESULTS_LIMIT mejores resultados) de search_documentation"""
+    hits = catalog.search_documentation(query)
+    
+    results = []
+    for document, score in hits[:SEARCH_RESULTS_LIMIT]:
+        if document['type'] == 'note':
+            results.append({
+                "type": "note",
+                "key": document['key'],
+                "score": round(score, 3)
+            })
+            continue
+        endpoint = document['endpoint']
+        results.append({
+            "type": "endpoint",
+            "resource": document['resource'],
+            "method": endpoint.get('method'),
+            "path": endpoint.get('path'),
+            "name": endpoint.get('name'),
+            "score": round(score, 3)
+        })
+    return len(hits), results
+
 @app.post("/tools/search_documentation", operation_id="search_documentation")
 async def search_documentation(query: str):
     """Buscar en toda la documentación"""
     try:
-        results = []
+        catalog = CATALOG
+        key = ("search_documentation", catalog.version, normalize_query(query))
+        results_count, results = SEARCH_CACHE.get_or_compute(
+            key, lambda: _search_documentation_results(catalog, query))
         
-        for resource, endpoints in API_DATABASE['endpoints'].items():
-            for endpoint in endpoints:
-                if (query.lower() in json.dumps(endpoint).lower()):
-                    results.append({
-                        "resource": resource,
-                        "method": endpoint.get('method'),
-                        "path": endpoint.get('path'),
-                        "name": endpoint.get('name')
-                    })
-        
-        return {
+        return FastJSONResponse({
             "query": query,
-            "results_count": len(results),
-            "results": results[:20]
-        }
+            "results_count": results_count,
+            "results": results
+        })
     except Exception as e:
         logger.error(f"Error en search_documentation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -191,67 +518,18 @@ async def search_documentation(query: str):
 async def get_code_example(path: str, method: str, language: str = "python"):
     """Obtener ejemplo de código para un endpoint"""
     try:
-        for resource, endpoints in API_DATABASE['endpoints'].items():
-            for endpoint in endpoints:
-                if endpoint.get('path') == path and endpoint.get('method') == method:
-                    
-                    if language == "python":
-                        code = f"""import requests
-
-# Endpoint: {method} {path}
-# {endpoint.get('description', 'Sin descripción')}
-
-url = "https://api.tiendanube.com/v1{path}"
-headers = {{
-    "Authorization": "Bearer YOUR_ACCESS_TOKEN",
-    "User-Agent": "MyApp (name@email.com)"
-}}
-
-# Parámetros
-params = {{
-    # Agregar parámetros según sea necesario
-}}
-
-# Realizar solicitud
-response = requests.{method.lower()}(url, headers=headers, params=params)
-
-# Procesar respuesta
-if response.status_code == 200:
-    data = response.json()
-    print(data)
-else:
-    print(f"Error: {{response.status_code}}")
-    print(response.text)
-"""
-                    elif language == "javascript":
-                        code = f"""// Endpoint: {method} {path}
-// {endpoint.get('description', 'Sin descripción')}
-
-const url = 'https://api.tiendanube.com/v1{path}';
-const headers = {{
-    'Authorization': 'Bearer YOUR_ACCESS_TOKEN',
-    'User-Agent': 'MyApp (name@email.com)'
-}};
-
-const options = {{
-    method: '{method}',
-    headers: headers
-}};
-
-fetch(url, options)
-    .then(response => response.json())
-    .then(data => console.log(data))
-    .catch(error => console.error('Error:', error));
-"""
-                    else:
-                        code = "Lenguaje no soportado"
-                    
-                    return {
-                        "path": path,
-                        "method": method,
-                        "language": language,
-                        "code": code
-                    }
+        catalog = CATALOG
+        match = catalog.lookup(method, path)
+        if match:
+            endpoint = match[1]
+            code = catalog.code_example(endpoint, language) or "Lenguaje no soportado"
+            
+            return {
+                "path": path,
+                "method": method,
+                "language": language,
+                "code": code
+            }
         
         return {"error": "Endpoint no encontrado"}
     except Exception as e:
@@ -261,51 +539,20 @@ fetch(url, options)
 @app.post("/tools/list_resources", operation_id="list_resources")
 async def list_resources():
     """Listar todos los recursos disponibles"""
-    try:
-        resources = []
-        for resource, endpoints in API_DATABASE['endpoints'].items():
-            resources.append({
-                "resource": resource,
-                "endpoint_count": len(endpoints),
-                "endpoints": [
-                    {
-                        "method": e.get('method'),
-                        "path": e.get('path'),
-                        "name": e.get('name')
-                    }
-                    for e in endpoints
-                ]
-            })
-        
-        return {
-            "total_resources": len(resources),
-            "total_endpoints": sum(len(e) for e in API_DATABASE['endpoints'].values()),
-            "resources": resources
-        }
-    except Exception as e:
-        logger.error(f"Error en list_resources: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return _static_response("list_resources")
 
 @app.post("/tools/get_resource_endpoints", operation_id="get_resource_endpoints")
 async def get_resource_endpoints(resource: str):
     """Obtener todos los endpoints de un recurso"""
     try:
-        if resource not in API_DATABASE['endpoints']:
+        endpoints = CATALOG.resource_endpoints(resource)
+        if not endpoints:
             return {"error": f"Recurso '{resource}' no encontrado"}
         
-        endpoints = API_DATABASE['endpoints'][resource]
         return {
             "resource": resource,
             "endpoint_count": len(endpoints),
-            "endpoints": [
-                {
-                    "method": e.get('method'),
-                    "path": e.get('path'),
-                    "name": e.get('name'),
-                    "description": e.get('description')
-                }
-                for e in endpoints
-            ]
+            "endpoints": [endpoint_summary(e) for e in endpoints]
         }
     except Exception as e:
         logger.error(f"Error en get_resource_endpoints: {e}")
@@ -314,42 +561,328 @@ async def get_resource_endpoints(resource: str):
 @app.post("/tools/get_authentication_info", operation_id="get_authentication_info")
 async def get_authentication_info():
     """Obtener información de autenticación"""
-    return {
-        "authentication_type": "OAuth 2.0",
-        "base_url": "https://api.tiendanube.com/v1",
-        "required_headers": {
-            "Authorization": "Bearer ACCESS_TOKEN",
-            "User-Agent": "MyApp (name@email.com)"
-        },
-        "rate_limiting": {
-            "general": "30 requests/second",
-            "tools": "10 requests/second"
-        },
-        "documentation": "https://tiendanube.github.io/api-documentation/intro"
-    }
+    return _static_response("authentication_info")
 
 @app.post("/tools/get_multi_inventory_info", operation_id="get_multi_inventory_info")
 async def get_multi_inventory_info():
     """Obtener información sobre multi-inventario"""
-    return {
-        "feature": "Multi-Inventory Support",
-        "version": "2025-03",
-        "description": "Nueva API de Productos con soporte para múltiples ubicaciones/almacenes",
-        "key_features": [
-            "Gestión de inventario por ubicación",
-            "Sincronización de stock en tiempo real",
-            "Soporte para múltiples almacenes",
-            "Asignación inteligente de inventario"
-        ],
-        "endpoints_affected": [
-            "GET /products",
-            "GET /products/{id}",
-            "POST /products",
-            "PUT /products/{id}",
-            "PATCH /products/stock-price"
-        ],
-        "documentation": "https://tiendanube.github.io/api-documentation/guides/multi-inventory/products"
-    }
+    return _static_response("multi_inventory_info")
+
+# ===== EJECUCIÓN CONTRA LA API =====
+
+class ExecuteEndpointRequest(BaseModel):
+    """Llamada a un endpoint del catálogo"""
+    method: str = Field(..., description="Método HTTP (GET, POST, PUT, PATCH, DELETE)")
+    path: str = Field(..., description="Path del catálogo, ej. '/products/{id}'")
+    path_params: Dict[str, Any] = Field(default_factory=dict, description="Valores de los placeholders del path, ej. {'id': 123}")
+    query: Dict[str, Any] = Field(default_factory=dict, description="Parámetros de query")
+    body: Optional[Any] = Field(None, description="Cuerpo JSON para POST/PUT/PATCH")
+    store_id: Optional[str] = Field(None, description="ID de la tienda (default: TIENDANUBE_STORE_ID)")
+    access_token: Optional[str] = Field(None, description="Token de acceso (default: TIENDANUBE_ACCESS_TOKEN)")
+    use_cache: bool = Field(True, description="Permitir responder un GET desde la caché (false fuerza leer la API)")
+
+@app.post("/tools/execute_endpoint", operation_id="execute_endpoint")
+async def execute_endpoint(request: ExecuteEndpointRequest):
+    """Ejecutar un endpoint del catálogo contra la API de Tienda Nube de una tienda"""
+    match = CATALOG.lookup(request.method, request.path)
+    if not match:
+        return {"error": f"Endpoint {request.method} {request.path} no encontrado en el catálogo"}
+    
+    store_id = request.store_id or os.getenv("TIENDANUBE_STORE_ID")
+    if not store_id:
+        return {"error": "Falta store_id (o la variable TIENDANUBE_STORE_ID)"}
+    
+    try:
+        path = build_path(request.path, request.path_params)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    method = request.method.upper()
+    resource = match[0]
+    access_token = request.access_token or os.getenv("TIENDANUBE_ACCESS_TOKEN")
+    params = request.query or None
+    cache = UPSTREAM_CACHE if request.use_cache and method == "GET" else None
+    if cache is not None:
+        # La clave (con la generación) se fija antes de la llamada: una invalidación en el medio gana
+        cache_key, cached = await cache.alookup(store_id, resource, access_token, path, params)
+        if cached is not None:
+            return FastJSONResponse({"resource": resource, "method": method, "path": path,
+                                     **cached, "cache": "hit"})
+
+    try:
+        response = await TIENDANUBE_CLIENT.request(
+            store_id, method, path,
+            access_token=access_token,
+            params=params,
+            json=request.body,
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(max(1, math.ceil(e.retry_in)))})
+    except httpx.TimeoutException as e:
+        logger.error(f"Timeout en execute_endpoint {method} {path}: {e!r}")
+        raise HTTPException(status_code=504, detail=f"Timeout llamando a Tienda Nube: {method} {path}")
+    except httpx.HTTPError as e:
+        logger.error(f"Error en execute_endpoint {method} {path}: {e!r}")
+        raise HTTPException(status_code=502, detail=f"Error llamando a Tienda Nube: {e}")
+
+    payload = response_payload(response)
+    if cache is not None:
+        await cache.aput(store_id, resource, access_token, path, params, payload, key=cache_key)
+    elif UPSTREAM_CACHE is not None and method in WRITE_METHODS and response.is_success:
+        await UPSTREAM_CACHE.ainvalidate(store_id, resource)
+    
+    return FastJSONResponse({
+        "resource": resource,
+        "method": method,
+        "path": path,
+        **payload
+    })
+
+# GETs por ID en paralelo de batch_get
+BATCH_GET_CONCURRENCY = int(os.getenv("BATCH_GET_CONCURRENCY", BATCH_GET_DEFAULT_CONCURRENCY))
+
+class BatchGetRequest(BaseModel):
+    """Lectura de muchos IDs de un recurso"""
+    path: str = Field(..., description="Path del catálogo por ID, ej. '/orders/{id}' o '/products/{product_id}/variants/{id}'")
+    ids: List[Any] = Field(..., min_length=1, max_length=1000, description="IDs a leer (hasta 1000)")
+    path_params: Dict[str, Any] = Field(default_factory=dict, description="Otros placeholders del path, ej. {'product_id': 1}")
+    query: Dict[str, Any] = Field(default_factory=dict, description="Parámetros de query, ej. {'fields': 'id,name'}")
+    store_id: Optional[str] = Field(None, description="ID de la tienda (default: TIENDANUBE_STORE_ID)")
+    access_token: Optional[str] = Field(None, description="Token de acceso (default: TIENDANUBE_ACCESS_TOKEN)")
+
+@app.post("/tools/batch_get", operation_id="batch_get")
+async def batch_get(request: BatchGetRequest):
+    """
+    Leer muchos registros por ID en una sola llamada
+
+    Si el listado del recurso acepta `ids` (ej. /products) pide de a 30 IDs;
+    si no, hace un GET por ID en paralelo dentro del rate limit. Devuelve
+    {"strategy", "items", "missing", "errors", "requests"} transmitido a
+    medida que llegan los resultados.
+    """
+    match = CATALOG.lookup("GET", request.path)
+    split = split_detail_path(request.path)
+    if not match or split is None:
+        return {"error": f"GET {request.path} no es un endpoint por ID del catálogo"}
+
+    store_id = request.store_id or os.getenv("TIENDANUBE_STORE_ID")
+    if not store_id:
+        return {"error": "Falta store_id (o la variable TIENDANUBE_STORE_ID)"}
+
+    list_path, id_param = split
+    listing = CATALOG.lookup("GET", list_path)
+    use_ids = bool(listing) and "ids" in (listing[1].get("parameters") or {})
+    try:
+        build_path(request.path, {**request.path_params, id_param: 0})
+    except ValueError as e:
+        return {"error": str(e)}
+
+    batch = BatchGet(
+        TIENDANUBE_CLIENT, store_id, request.path, request.ids,
+        access_token=request.access_token or os.getenv("TIENDANUBE_ACCESS_TOKEN"),
+        use_ids=use_ids,
+        path_params=request.path_params,
+        params=request.query,
+        concurrency=BATCH_GET_CONCURRENCY,
+    )
+    return StreamingResponse(json_document_chunks(batch), media_type="application/json")
+
+# Variantes por request y lotes en vuelo de bulk_update_stock_price
+STOCK_PRICE_BATCH_SIZE = int(os.getenv("STOCK_PRICE_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+STOCK_PRICE_CONCURRENCY = int(os.getenv("STOCK_PRICE_CONCURRENCY", DEFAULT_CONCURRENCY))
+
+class StockPriceRow(BaseModel):
+    """Cambio de stock y/o precio de una variante"""
+    product_id: int = Field(..., description="ID del producto")
+    variant_id: int = Field(..., description="ID de la variante")
+    location_id: Optional[str] = Field(None, description="Ubicación del stock (multi-inventario); sin ella se actualiza la primera")
+    stock: Optional[int] = Field(None, description="Nuevo stock")
+    price: Optional[str] = Field(None, description="Nuevo precio, ej. '10.00'")
+    promotional_price: Optional[str] = Field(None, description="Nuevo precio promocional")
+    cost: Optional[str] = Field(None, description="Nuevo costo")
+
+class BulkStockPriceRequest(BaseModel):
+    """Actualización masiva de stock y precio"""
+    rows: List[StockPriceRow] = Field(..., description="Filas a aplicar; las repetidas por variante se combinan (gana la última)")
+    store_id: Optional[str] = Field(None, description="ID de la tienda (default: TIENDANUBE_STORE_ID)")
+    access_token: Optional[str] = Field(None, description="Token de acceso (default: TIENDANUBE_ACCESS_TOKEN)")
+
+@app.post("/tools/bulk_update_stock_price", operation_id="bulk_update_stock_price")
+async def bulk_update_stock_price_tool(request: BulkStockPriceRequest):
+    """
+    Actualizar stock y precio de muchas variantes con PATCH /products/stock-price
+
+    Combina las filas por variante, las envía en lotes de hasta
+    STOCK_PRICE_BATCH_SIZE variantes en paralelo dentro del rate limit de la
+    tienda y devuelve el resultado de cada fila.
+    """
+    store_id = request.store_id or os.getenv("TIENDANUBE_STORE_ID")
+    if not store_id:
+        return {"error": "Falta store_id (o la variable TIENDANUBE_STORE_ID)"}
+
+    report = await bulk_update_stock_price(
+        TIENDANUBE_CLIENT, store_id,
+        [row.model_dump() for row in request.rows],
+        access_token=request.access_token or os.getenv("TIENDANUBE_ACCESS_TOKEN"),
+        batch_size=STOCK_PRICE_BATCH_SIZE,
+        concurrency=STOCK_PRICE_CONCURRENCY,
+    )
+    if UPSTREAM_CACHE is not None and report["ok"]:
+        await UPSTREAM_CACHE.ainvalidate(store_id, "products")
+    return FastJSONResponse(report)
+
+class QueryStoreMirrorRequest(BaseModel):
+    """Consulta al espejo local de la tienda"""
+    resource: str = Field(..., description="products, variants, orders o customers")
+    where: Dict[str, Any] = Field(default_factory=dict, description="Filtros {'columna__op': valor}; op: eq, ne, lt, lte, gt, gte, like, in, null. Ej. {'stock__lt': 5}")
+    order_by: Optional[str] = Field(None, description="Columna de orden; '-columna' para descendente")
+    limit: int = Field(100, ge=1, le=1000, description="Máximo de resultados")
+    offset: int = Field(0, ge=0, description="Resultados a saltear")
+    store_id: Optional[str] = Field(None, description="ID de la tienda (default: TIENDANUBE_STORE_ID)")
+
+@app.post("/tools/query_store_mirror", operation_id="query_store_mirror")
+async def query_store_mirror(request: QueryStoreMirrorRequest):
+    """
+    Consultar productos, variantes, órdenes o clientes desde el espejo local
+
+    Responde en milisegundos sin llamar a la API. Columnas filtrables:
+    products (id, name, handle, published, created_at, updated_at),
+    variants (id, product_id, sku, price, promotional_price, stock, ...),
+    orders (id, number, status, payment_status, shipping_status, total,
+    customer_id, created_at, ...), customers (id, name, email, total_spent, ...).
+    """
+    if STORE_MIRROR is None:
+        return {"error": "Espejo local desactivado (configurar STORE_MIRROR_PATH)"}
+    store_id = request.store_id or os.getenv("TIENDANUBE_STORE_ID")
+    if not store_id:
+        return {"error": "Falta store_id (o la variable TIENDANUBE_STORE_ID)"}
+    try:
+        result = await asyncio.to_thread(STORE_MIRROR.query, store_id, request.resource, request.where,
+                                         request.order_by, request.limit, request.offset)
+    except ValueError as e:
+        return {"error": str(e)}
+    # Las variantes se sincronizan junto con sus productos
+    state = STORE_MIRROR.get_state(store_id, "products" if request.resource == "variants" else request.resource)
+    result["synced_at"] = state["last_sync"] if state else None
+    return FastJSONResponse(result)
+
+class SyncStoreMirrorRequest(BaseModel):
+    """Sincronización del espejo local"""
+    resources: List[str] = Field(default_factory=lambda: list(SYNC_RESOURCES), description="Recursos a sincronizar")
+    full: bool = Field(False, description="Sincronización completa (también borra lo eliminado en la tienda)")
+    store_id: Optional[str] = Field(None, description="ID de la tienda (default: TIENDANUBE_STORE_ID)")
+    access_token: Optional[str] = Field(None, description="Token de acceso (default: TIENDANUBE_ACCESS_TOKEN)")
+
+@app.post("/mirror/sync")
+async def sync_store_mirror(request: SyncStoreMirrorRequest):
+    """Sincronizar el espejo local ahora (incremental por defecto)"""
+    if STORE_MIRROR is None:
+        raise HTTPException(status_code=404, detail="Espejo local desactivado (configurar STORE_MIRROR_PATH)")
+    store_id = request.store_id or os.getenv("TIENDANUBE_STORE_ID")
+    if not store_id:
+        raise HTTPException(status_code=400, detail="Falta store_id (o la variable TIENDANUBE_STORE_ID)")
+    unknown = [r for r in request.resources if r not in SYNC_RESOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Recursos no sincronizables: {', '.join(unknown)}")
+    try:
+        results = await sync_store(STORE_MIRROR, TIENDANUBE_CLIENT, store_id,
+                                   access_token=request.access_token or os.getenv("TIENDANUBE_ACCESS_TOKEN"),
+                                   resources=request.resources, full=request.full)
+    except PaginationError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Error llamando a Tienda Nube: {e!r}")
+    return {"store_id": store_id, "results": results}
+
+# Páginas pedidas por adelantado en los recorridos paginados
+PAGINATION_PREFETCH = int(os.getenv("PAGINATION_PREFETCH", "2"))
+
+class PaginatedEndpointRequest(ExecuteEndpointRequest):
+    """Recorrido de todas las páginas de un listado GET del catálogo"""
+    method: str = Field("GET", description="Sólo GET")
+    mode: str = Field("page", description="'page' (page/per_page con prefetch) o 'since_id' (/products, /orders)")
+    per_page: int = Field(250, ge=1, le=250, description="Resultados por página (máximo 250)")
+    max_pages: Optional[int] = Field(None, ge=1, description="Cortar tras N páginas (default: todas)")
+    format: Optional[str] = Field(None, description="'ndjson' o 'sse' (default: según el header Accept)")
+
+@app.post("/stream/execute_endpoint")
+async def stream_execute_endpoint(request: PaginatedEndpointRequest, http_request: Request):
+    """
+    Recorrer todas las páginas de un listado y transmitir los items
+
+    Devuelve NDJSON (un item por línea) o SSE (`event: item` por item y un
+    `event: end` con los totales) a medida que llegan las páginas, con memoria
+    acotada a las páginas en vuelo. No se expone como herramienta MCP: la
+    herramienta devolvería todo el listado en un solo mensaje.
+    """
+    method = request.method.upper()
+    if method != "GET":
+        raise HTTPException(status_code=400, detail="Sólo se pueden paginar endpoints GET")
+    if request.mode not in PAGINATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Modo inválido: {request.mode}")
+    if request.format not in (None, "ndjson", "sse"):
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {request.format}")
+
+    match = CATALOG.lookup(method, request.path)
+    if not match:
+        raise HTTPException(status_code=404, detail=f"Endpoint {method} {request.path} no encontrado en el catálogo")
+    if request.mode == "since_id" and not supports_since_id(request.path, match[1]):
+        raise HTTPException(status_code=400, detail=f"{request.path} no acepta since_id")
+
+    store_id = request.store_id or os.getenv("TIENDANUBE_STORE_ID")
+    if not store_id:
+        raise HTTPException(status_code=400, detail="Falta store_id (o la variable TIENDANUBE_STORE_ID)")
+    try:
+        path = build_path(request.path, request.path_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        paginator = Paginator(
+            TIENDANUBE_CLIENT, store_id, path,
+            access_token=request.access_token or os.getenv("TIENDANUBE_ACCESS_TOKEN"),
+            params=request.query,
+            per_page=request.per_page,
+            prefetch=PAGINATION_PREFETCH,
+            mode=request.mode,
+            max_pages=request.max_pages,
+        )
+    except ValueError as e:
+        # page/since_id no numéricos: rechazarlos antes de mandar los headers del stream
+        raise HTTPException(status_code=422, detail=str(e))
+    output = request.format or ("sse" if "text/event-stream" in http_request.headers.get("accept", "") else "ndjson")
+    if output == "sse":
+        return StreamingResponse(sse_chunks(paginator), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return StreamingResponse(ndjson_chunks(paginator), media_type="application/x-ndjson",
+                             headers={"X-Accel-Buffering": "no"})
+
+# ===== WEBHOOKS =====
+
+@app.post("/webhooks/tiendanube", status_code=202)
+async def receive_webhook(http_request: Request):
+    """
+    Recibir un webhook de Tienda Nube
+
+    Verifica x-linkedstore-hmac-sha256 y encola el evento; se aplica en
+    lotes al espejo local. Con el buffer lleno responde 503 para que
+    Tienda Nube reintente más tarde.
+    """
+    if not WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhooks desactivados (configurar TIENDANUBE_WEBHOOK_SECRET)")
+    body = await http_request.body()
+    if not verify_signature(body, http_request.headers.get(SIGNATURE_HEADER), WEBHOOK_SECRET):
+        raise HTTPException(status_code=401, detail="Firma inválida")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cuerpo JSON inválido")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Cuerpo JSON inválido")
+    if not WEBHOOK_INGESTOR.offer(payload):
+        raise HTTPException(status_code=503, detail="Cola de webhooks llena", headers={"Retry-After": "5"})
+    return {"queued": True}
 
 # ===== ENDPOINTS DE DESCUBRIMIENTO =====
 
@@ -396,22 +929,7 @@ async def ai_plugin_json():
 @app.get("/")
 async def root():
     """Información del servidor MCP"""
-    return {
-        "name": "Tienda Nube MCP - Servidor Completo",
-        "version": "2.0.0",
-        "description": "Servidor MCP con TODOS los 111 endpoints de la API de Tienda Nube",
-        "resources": len(API_DATABASE['endpoints']),
-        "endpoints": sum(len(e) for e in API_DATABASE['endpoints'].values()),
-        "coverage": "100%",
-        "documentation": "/docs",
-        "mcp_endpoint": "/mcp",
-        "endpoints": {
-            "health": "/health",
-            "ready": "/ready",
-            "info": "/info",
-            "mcp": "/mcp"
-        }
-    }
+    return _static_response("root")
 
 # ===== MANEJO DE ERRORES =====
 
@@ -419,24 +937,16 @@ async def root():
 async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.detail}
+        content={"error": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 # ===== MONTAR FASTAPI-MCP AL FINAL =====
 # Importante: Montar después de definir todos los endpoints
 try:
     # Lista de operation_ids que queremos exponer como herramientas MCP
-    tool_operations = [
-        "search_endpoint",
-        "get_endpoint_details",
-        "get_schema",
-        "search_documentation",
-        "get_code_example",
-        "list_resources",
-        "get_resource_endpoints",
-        "get_authentication_info",
-        "get_multi_inventory_info"
-    ]
+    tool_operations = CATALOG_TOOLS + ["execute_endpoint", "batch_get", "bulk_update_stock_price",
+                                       "query_store_mirror"]
     
     mcp = FastApiMCP(
         app,
@@ -450,6 +960,13 @@ except Exception as e:
     import traceback
     logger.error(traceback.format_exc())
 
+
+if METRICS is not None:
+    METRICS.watch(
+        catalog_version=lambda: CATALOG.version,
+        caches={"search": SEARCH_CACHE, "upstream": UPSTREAM_CACHE.backend if UPSTREAM_CACHE else None},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
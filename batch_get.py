@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Lectura de muchos IDs de un recurso en paralelo
+
+Estrategia según el catálogo:
+    ids       el listado del recurso acepta `ids` (ej. GET /products):
+              un GET /products?ids=1,2,...,30 por cada 30 IDs
+    per_id    si no, un GET /{recurso}/{id} por ID en paralelo (acotado;
+              el scheduler de rate limit de la tienda los espacia)
+
+Los resultados se entregan a medida que llegan, en el orden en que se
+completan.
+"""
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+
+from fast_json import dumps
+from tiendanube_client import TiendaNubeClient, build_path
+
+# Máximo de IDs del parámetro `ids` de los listados
+IDS_PER_REQUEST = 30
+DEFAULT_CONCURRENCY = 10
+
+_LAST_PLACEHOLDER_RE = re.compile(r"/\{([^}/]*)\}$")
+
+
+def split_detail_path(path: str) -> Optional[Tuple[str, str]]:
+    """'/orders/{id}' -> ('/orders', 'id'); None si no termina en un placeholder"""
+    match = _LAST_PLACEHOLDER_RE.search(path)
+    if not match:
+        return None
+    return path[:match.start()], match.group(1)
+
+
+def _error(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _invalid_body(ids: List[str], response: httpx.Response) -> List[Dict[str, Any]]:
+    """Un 2xx que no trae el JSON esperado (ej. HTML de un proxy): error por cada ID"""
+    return [{"id": i, "status": "error", "status_code": response.status_code,
+             "error": f"Respuesta inválida: {response.text[:200]}"} for i in ids]
+
+
+class BatchGet:
+    """
+    Lectura de `ids` de un recurso de una tienda
+
+    Args:
+        detail_path: Path del catálogo por ID (ej. '/products/{id}')
+        use_ids: Usar el listado con `ids` (si el catálogo lo documenta)
+        path_params: Otros placeholders del path (ej. product_id)
+    """
+
+    def __init__(self, client: TiendaNubeClient, store_id: str, detail_path: str, ids: List[Any], *,
+                 access_token: Optional[str] = None, use_ids: bool = False,
+                 path_params: Optional[Mapping[str, Any]] = None,
+                 params: Optional[Mapping[str, Any]] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        split = split_detail_path(detail_path)
+        if split is None:
+            raise ValueError(f"{detail_path} no termina en un placeholder de ID")
+        self.client = client
+        self.store_id = store_id
+        self.detail_path = detail_path
+        self.list_path, self.id_param = split
+        # IDs sin repetir, en el orden pedido
+        self.ids = list(dict.fromkeys(str(i) for i in ids))
+        self.access_token = access_token
+        self.use_ids = use_ids
+        self.path_params = dict(path_params or {})
+        self.params = dict(params or {})
+        self.concurrency = max(1, concurrency)
+        self.requests = 0
+
+    @property
+    def strategy(self) -> str:
+        return "ids" if self.use_ids else "per_id"
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> httpx.Response:
+        self.requests += 1
+        return await self.client.request(self.store_id, "GET", path,
+                                         access_token=self.access_token, params=params or None)
+
+    async def _fetch_chunk(self, chunk: List[str]) -> List[Dict[str, Any]]:
+        path = build_path(self.list_path, self.path_params)
+        try:
+            response = await self._get(path, {**self.params, "ids": ",".join(chunk),
+                                              "per_page": IDS_PER_REQUEST})
+        except httpx.HTTPError as e:
+            return [{"id": i, "status": "error", "error": repr(e)} for i in chunk]
+        if response.status_code >= 400:
+            error = _error(response)
+            return [{"id": i, "status": "error", "status_code": response.status_code, "error": error}
+                    for i in chunk]
+        try:
+            found = {str(item.get("id")): item for item in response.json()}
+        except (ValueError, TypeError, AttributeError):
+            return _invalid_body(chunk, response)
+        return [{"id": i, "status": "ok", "data": found[i]} if i in found else {"id": i, "status": "missing"}
+                for i in chunk]
+
+    async def _fetch_one(self, entity_id: str) -> List[Dict[str, Any]]:
+        path = build_path(self.detail_path, {**self.path_params, self.id_param: entity_id})
+        try:
+            response = await self._get(path, self.params)
+        except httpx.HTTPError as e:
+            return [{"id": entity_id, "status": "error", "error": repr(e)}]
+        if response.status_code == 404:
+            return [{"id": entity_id, "status": "missing"}]
+        if response.status_code >= 400:
+            return [{"id": entity_id, "status": "error", "status_code": response.status_code,
+                     "error": _error(response)}]
+        try:
+            data = response.json()
+        except ValueError:
+            return _invalid_body([entity_id], response)
+        return [{"id": entity_id, "status": "ok", "data": data}]
+
+    async def results(self) -> AsyncIterator[Dict[str, Any]]:
+        """Resultado de cada ID ({id, status: ok|missing|error, data?}) a medida que llegan"""
+        if self.use_ids:
+            jobs = [self.ids[i:i + IDS_PER_REQUEST] for i in range(0, len(self.ids), IDS_PER_REQUEST)]
+            fetch = self._fetch_chunk
+        else:
+            jobs = self.ids
+            fetch = self._fetch_one
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(job):
+            async with semaphore:
+                return await fetch(job)
+
+        tasks = [asyncio.ensure_future(bounded(job)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def json_document_chunks(batch: BatchGet) -> AsyncIterator[bytes]:
+    """
+    Transmitir un único documento JSON mientras llegan los resultados
+
+    {"strategy": ..., "items": [...], "missing": [...], "errors": [...], "requests": n}
+    Los items salen apenas llegan; missing, errors y requests al final.
+    """
+    missing: List[str] = []
+    errors: List[Dict[str, Any]] = []
+    yield b'{"strategy":' + dumps(batch.strategy) + b',"items":['
+    first = True
+    async for result in batch.results():
+        if result["status"] == "ok":
+            yield (b"" if first else b",") + dumps(result["data"])
+            first = False
+        elif result["status"] == "missing":
+            missing.append(result["id"])
+        else:
+            errors.append(result)
+    yield (b'],"missing":' + dumps(missing) + b',"errors":' + dumps(errors)
+           + b',"requests":' + dumps(batch.requests) + b"}")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de las herramientas del catálogo según su tamaño
+
+Llama directamente a las funciones de herramienta de app_complete.py (sin
+HTTP ni ASGI) y serializa su resultado como lo haría FastAPI, contra el
+catálogo real (api_database_complete.json) y catálogos sintéticos de 1k y
+10k endpoints (copias del real con paths y textos distintos). También mide
+la carga e indexación de cada catálogo, así una regresión en los índices,
+la búsqueda o la serialización aparece antes de desplegar.
+
+Estilo pytest-benchmark: cada caso se calibra para que una ronda dure al
+menos --min-time y se reportan min/mediana/media/desvío por llamada y
+operaciones por segundo. La búsqueda se mide sin caché (SEARCH_CACHE se
+vacía en cada llamada) y con caché.
+
+Uso:
+    python benchmarks/bench_catalog.py run [--sizes real,1000,10000] [--rounds 5]
+    python benchmarks/bench_catalog.py compare results/catalog-abc123.json results/catalog-def456.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from bench_load import RESULTS_DIR, ROOT, _git
+
+sys.path.insert(0, str(ROOT))
+
+import app_complete  # noqa: E402
+from fast_json import FastJSONResponse  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+REAL_DATABASE = ROOT / "api_database_complete.json"
+
+# (nombre del caso, herramienta, argumentos, sin caché de búsqueda)
+CASES: List[Tuple[str, str, Dict[str, Any], bool]] = [
+    ("search_endpoint", "search_endpoint", {"query": "stock", "resource": "products"}, True),
+    ("search_endpoint[all]", "search_endpoint", {"query": "listar productos"}, True),
+    ("search_documentation", "search_documentation", {"query": "inventario ubicación"}, True),
+    ("search_documentation[cache]", "search_documentation", {"query": "inventario ubicación"}, False),
+    ("get_endpoint_details", "get_endpoint_details", {"path": "/products/{id}", "method": "GET"}, False),
+    ("get_endpoint_details[miss]", "get_endpoint_details", {"path": "/nope/{id}", "method": "GET"}, False),
+    ("get_schema", "get_schema", {"path": "/orders", "method": "GET"}, False),
+    ("get_code_example", "get_code_example", {"path": "/products", "method": "POST", "language": "python"}, False),
+    ("list_resources", "list_resources", {}, False),
+    ("get_resource_endpoints", "get_resource_endpoints", {"resource": "products"}, False),
+    ("get_authentication_info", "get_authentication_info", {}, False),
+    ("get_multi_inventory_info", "get_multi_inventory_info", {}, False),
+]
+
+
+def scaled_database(api_database: Dict[str, Any], size: int) -> Dict[str, Any]:
+    """
+    Catálogo sintético de `size` endpoints
+
+    La copia 0 es el catálogo real; las siguientes repiten sus endpoints en
+    recursos `<recurso>_<n>` con paths `/lote<n>/...` y el número de lote en
+    nombre y descripción, así cada copia agrega términos al índice.
+    """
+    base = [(resource, endpoint) for resource, endpoints in api_database["endpoints"].items()
+            for endpoint in endpoints]
+    endpoints: Dict[str, List[Dict[str, Any]]] = {}
+    for n in range(size):
+        copy = n // len(base)
+        resource, endpoint = base[n % len(base)]
+        if copy:
+            resource = f"{resource}_{copy}"
+            endpoint = dict(endpoint, path=f"/lote{copy}{endpoint.get('path', '')}",
+                            name=f"{endpoint.get('name')} (lote {copy})",
+                            description=f"{endpoint.get('description') or ''} Lote {copy}.")
+        endpoints.setdefault(resource, []).append(endpoint)
+    metadata = dict(api_database.get("metadata", {}), total_resources=len(endpoints), total_endpoints=size)
+    return {**api_database, "metadata": metadata, "endpoints": endpoints}
+
+
+def _call(tool: str, params: Dict[str, Any]) -> bytes:
+    """Ejecutar una herramienta y serializar su resultado como la respuesta HTTP"""
+    coroutine = getattr(app_complete, tool)(**params)
+    # Las herramientas del catálogo no esperan nada: terminan en el primer paso
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        result = done.value
+    else:
+        coroutine.close()
+        raise RuntimeError(f"{tool} quedó esperando I/O")
+    if isinstance(result, Response):
+        return result.body
+    return FastJSONResponse(result).body
+
+
+def bench(func: Callable[[], Any], rounds: int, min_time: float) -> Dict[str, Any]:
+    """Calibrar iteraciones por ronda y medir `rounds` rondas (µs por llamada)"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, math.ceil(number * min_time / max(elapsed, 1e-9)))
+    per_call = [t / number * 1e6 for t in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "iterations": number,
+        "rounds": rounds,
+        "us": {
+            "min": round(min(per_call), 3),
+            "median": round(statistics.median(per_call), 3),
+            "mean": round(statistics.fmean(per_call), 3),
+            "stddev": round(statistics.stdev(per_call), 3) if rounds > 1 else 0.0,
+        },
+        "ops": round(1e6 / min(per_call), 1),
+    }
+
+
+def bench_size(label: str, path: Path, args) -> List[Dict[str, Any]]:
+    rows = []
+
+    def record(case: str, result: Dict[str, Any], size_bytes: int = 0):
+        row = {"catalog": label, "case": case, **result, "bytes": size_bytes}
+        rows.append(row)
+        us = row["us"]
+        print(f"{label:<9}{case:<30}{us['min']:>12.1f}{us['median']:>12.1f}{us['stddev']:>10.1f}"
+              f"{row['ops']:>12.0f}{size_bytes:>9}")
+
+    # Carga + índices + payloads pre-serializados (lo que hace una recarga en caliente)
+    record("load_catalog", bench(lambda: app_complete._build_catalog(path), max(3, args.rounds // 2), 0.0))
+    catalog = app_complete._build_catalog(path)
+    record("index_catalog", bench(lambda: app_complete.Catalog(catalog.api_database),
+                                  max(3, args.rounds // 2), 0.0))
+
+    app_complete._swap_catalog(catalog)
+    app_complete.SEARCH_CACHE.clear()
+    for case, tool, params, uncached in CASES:
+        if uncached:
+            def call(tool=tool, params=params):
+                app_complete.SEARCH_CACHE.clear()
+                return _call(tool, params)
+        else:
+            def call(tool=tool, params=params):
+                return _call(tool, params)
+        body = call()
+        record(case, bench(call, args.rounds, args.min_time), len(body))
+    return rows
+
+
+def cmd_run(args):
+    commit = _git("rev-parse", "--short", "HEAD")
+    real = json.loads(REAL_DATABASE.read_text(encoding="utf-8"))
+    print(f"{'catálogo':<9}{'caso':<30}{'min µs':>12}{'mediana µs':>12}{'desvío':>10}{'ops/s':>12}{'bytes':>9}")
+
+    results = []
+    previous = app_complete.CATALOG
+    with tempfile.TemporaryDirectory(prefix="bench_catalog_") as workdir:
+        try:
+            for size in args.sizes:
+                if size == "real":
+                    path = REAL_DATABASE
+                else:
+                    # Se escribe a disco para medir también la carga del JSON
+                    path = Path(workdir) / f"api_database_{size}.json"
+                    path.write_text(json.dumps(scaled_database(real, int(size)), ensure_ascii=False),
+                                    encoding="utf-8")
+                results.extend(bench_size(str(size), path, args))
+        finally:
+            app_complete._swap_catalog(previous)
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sizes": args.sizes,
+            "rounds": args.rounds,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"catalog-{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"\nResultados: {output}")
+
+
+def cmd_compare(args):
+    """Diferencias de tiempo (min y mediana) y tamaño de respuesta entre dos corridas"""
+    base, new = (json.loads(Path(path).read_text()) for path in (args.base, args.new))
+    key = lambda row: (row["catalog"], row["case"])  # noqa: E731
+    base_rows = {key(row): row for row in base["results"]}
+    print(f"base: {base['meta'].get('commit')}  nuevo: {new['meta'].get('commit')}\n")
+    print(f"{'catálogo':<9}{'caso':<30}{'min':>9}{'mediana':>9}{'bytes':>9}")
+
+    def delta(old: float, now: float) -> str:
+        return f"{(now - old) / old * 100:+.1f}%" if old else "-"
+
+    for row in new["results"]:
+        old = base_rows.get(key(row))
+        if old is None:
+            continue
+        print(f"{row['catalog']:<9}{row['case']:<30}{delta(old['us']['min'], row['us']['min']):>9}"
+              f"{delta(old['us']['median'], row['us']['median']):>9}{delta(old['bytes'], row['bytes']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Correr el benchmark")
+    run.add_argument("--sizes", type=lambda v: v.split(","), default=["real", "1000", "10000"],
+                     help="Catálogos a medir: 'real' y/o cantidad de endpoints sintéticos")
+    run.add_argument("--rounds", type=int, default=5, help="Rondas por caso")
+    run.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por ronda")
+    run.add_argument("--output", help="Archivo JSON de resultados")
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser("compare", help="Comparar dos archivos de resultados")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        invalid = [size for size in args.sizes if size != "real" and not size.isdigit()]
+        if invalid:
+            parser.error(f"tamaños inválidos: {', '.join(invalid)}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización de las herramientas de app.py
+
+Compara, por herramienta, el camino anterior (texto indentado ->
+json.loads -> jsonable_encoder -> JSONResponse) con el actual (resultado
+estructurado -> FastJSONResponse). Sólo mide la capa de serialización, sin
+red ni ASGI.
+
+Uso:
+    python benchmarks/bench_json_roundtrip.py [--number 2000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from fast_json import FastJSONResponse, orjson  # noqa: E402
+from server_simple import TiendaNubeAPIServer  # noqa: E402
+
+CASES = [
+    ("search_endpoint", {"resource": "products"}),
+    ("search_endpoint", {"resource": "orders", "query": "pago"}),
+    ("get_endpoint_details", {"resource": "products", "path": "/products", "method": "GET"}),
+    ("get_schema", {"resource": "products", "endpoint_type": "response"}),
+    ("search_documentation", {"query": "stock"}),
+    ("list_resources", {}),
+]
+
+
+def _old(server, tool, params):
+    text = getattr(server, tool)(**params)
+    return JSONResponse(jsonable_encoder({"tool": tool, "result": json.loads(text)})).body
+
+
+def _new(server, tool, params):
+    return FastJSONResponse({"tool": tool, "result": getattr(server, f"{tool}_data")(**params)}).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Iteraciones por caso")
+    args = parser.parse_args()
+
+    server = TiendaNubeAPIServer()
+    print(f"orjson: {'sí' if orjson else 'no (fallback json)'} | iteraciones: {args.number}\n")
+    print(f"{'herramienta':<24}{'params':<34}{'antes µs':>10}{'ahora µs':>10}{'mejora':>8}")
+
+    for tool, params in CASES:
+        assert json.loads(_old(server, tool, params)) == json.loads(_new(server, tool, params))
+        old = min(timeit.repeat(lambda: _old(server, tool, params), number=args.number, repeat=3))
+        new = min(timeit.repeat(lambda: _new(server, tool, params), number=args.number, repeat=3))
+        old_us, new_us = old / args.number * 1e6, new / args.number * 1e6
+        label = ",".join(f"{k}={v}" for k, v in params.items())[:32]
+        print(f"{tool:<24}{label:<34}{old_us:>10.1f}{new_us:>10.1f}{old_us / new_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
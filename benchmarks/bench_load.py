@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga de las herramientas por REST, /mcp y stdio
+
+Mide latencia (p50/p95/p99) y requests/segundo de cada herramienta con
+concurrencia fija, por tres transportes:
+
+    rest    POST /tools/{herramienta} de app_complete.py
+    mcp     tools/call por el montaje streamable-HTTP /mcp (una sesión MCP
+            por worker, como agentes distintos)
+    stdio   tools/call contra `python server.py` (una sesión compartida)
+
+Con --spawn levanta app_complete.py (uvicorn) y mock_tiendanube.py en
+puertos libres, así las herramientas que llaman a la API (execute_endpoint,
+batch_get, bulk_update_stock_price, query_store_mirror) se miden sin tocar
+tiendas reales. Sin --spawn apunta a --url y sólo mide las herramientas del
+catálogo (salvo --upstream).
+
+Los resultados se guardan en JSON (por defecto
+benchmarks/results/load-<commit>.json) para comparar entre commits.
+
+Uso:
+    python benchmarks/bench_load.py run --spawn --concurrency 1,8,32 --requests 200
+    python benchmarks/bench_load.py run --url http://localhost:8000 --transports rest,mcp
+    python benchmarks/bench_load.py compare results/load-abc123.json results/load-def456.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+TRANSPORTS = ("rest", "mcp", "stdio")
+
+# Herramientas de app_complete.py: parámetros de query y cuerpo JSON del REST
+# (por /mcp van juntos como argumentos)
+CATALOG_CASES: Dict[str, Dict[str, Any]] = {
+    "search_endpoint": {"params": {"query": "stock", "resource": "products"}},
+    "get_endpoint_details": {"params": {"path": "/products/{id}", "method": "GET"}},
+    "get_schema": {"params": {"path": "/orders", "method": "GET"}},
+    "search_documentation": {"params": {"query": "inventario ubicación"}},
+    "get_code_example": {"params": {"path": "/products", "method": "POST", "language": "python"}},
+    "list_resources": {},
+    "get_resource_endpoints": {"params": {"resource": "orders"}},
+    "get_authentication_info": {},
+    "get_multi_inventory_info": {},
+}
+UPSTREAM_CASES: Dict[str, Dict[str, Any]] = {
+    "execute_endpoint": {"json": {"method": "GET", "path": "/products/{id}", "path_params": {"id": 7},
+                                  "use_cache": False}},
+    "batch_get": {"json": {"path": "/orders/{id}", "ids": list(range(1, 41))}},
+    "bulk_update_stock_price": {"json": {"rows": [{"product_id": 1, "variant_id": 11, "stock": 5},
+                                                  {"product_id": 2, "variant_id": 21, "price": "9.99"}]}},
+    "query_store_mirror": {"json": {"resource": "variants", "where": {"stock__lt": 5}, "limit": 50}},
+}
+# Herramientas de server.py (stdio), con los argumentos de su propio esquema
+STDIO_CASES: Dict[str, Dict[str, Any]] = {
+    "search_endpoint": {"resource": "products", "query": "stock"},
+    "get_endpoint_details": {"resource": "products", "path": "/products/{id}", "method": "GET"},
+    "get_schema": {"resource": "orders"},
+    "search_documentation": {"query": "inventario ubicación"},
+    "get_code_example": {"resource": "products", "path": "/products", "method": "POST", "language": "python"},
+    "list_resources": {},
+    "get_authentication_info": {},
+    "get_multi_inventory_info": {},
+}
+
+Call = Callable[[], Awaitable[bool]]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _has_error(text: str) -> bool:
+    """Las herramientas informan errores de negocio como {"error": ...} con status 200"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and "error" in data
+
+
+async def measure(calls: List[Call], requests: int, warmup: int) -> Dict[str, Any]:
+    """Ejecutar `requests` llamadas repartidas entre len(calls) workers concurrentes"""
+    for _ in range(warmup):
+        await calls[0]()
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(call: Call):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                ok = await call()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(call) for call in calls))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+# ===== TRANSPORTES =====
+
+@contextlib.asynccontextmanager
+async def rest_transport(url: str, cases: Dict[str, Dict[str, Any]], max_concurrency: int):
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        def callers(tool: str, concurrency: int) -> List[Call]:
+            case = cases[tool]
+
+            async def call() -> bool:
+                response = await client.post(f"/tools/{tool}", params=case.get("params"), json=case.get("json"))
+                return response.status_code < 400 and not _has_error(response.text)
+            return [call] * concurrency
+        yield callers
+
+
+async def _mcp_call(session, tool: str, arguments: Dict[str, Any]) -> bool:
+    result = await session.call_tool(tool, arguments)
+    text = result.content[0].text if result.content and hasattr(result.content[0], "text") else ""
+    return not result.isError and not _has_error(text)
+
+
+@contextlib.asynccontextmanager
+async def mcp_transport(url: str, cases: Dict[str, Dict[str, Any]], max_concurrency: int):
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    async with contextlib.AsyncExitStack() as stack:
+        sessions = []
+        for _ in range(max_concurrency):
+            read, write, _ = await stack.enter_async_context(streamablehttp_client(f"{url}/mcp"))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions.append(session)
+
+        def callers(tool: str, concurrency: int) -> List[Call]:
+            arguments = {**cases[tool].get("params", {}), **cases[tool].get("json", {})}
+            return [lambda session=session: _mcp_call(session, tool, arguments)
+                    for session in sessions[:concurrency]]
+        yield callers
+
+
+@contextlib.asynccontextmanager
+async def stdio_transport(cases: Dict[str, Dict[str, Any]], max_concurrency: int):
+    from mcp import ClientSession
+    from mcp.client.stdio import StdioServerParameters, stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[str(ROOT / "server.py")], cwd=str(ROOT),
+                                   env={**os.environ, "CATALOG_RELOAD_INTERVAL": "0"})
+    # Los logs del servidor van a stderr: no mezclarlos con la tabla de resultados
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+
+                def callers(tool: str, concurrency: int) -> List[Call]:
+                    return [lambda: _mcp_call(session, tool, cases[tool])] * concurrency
+                yield callers
+
+
+# ===== SERVIDORES LOCALES (--spawn) =====
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} no respondió en {timeout:.0f}s")
+
+
+@contextlib.contextmanager
+def spawn_servers(args):
+    """app_complete.py contra mock_tiendanube.py, en puertos libres"""
+    mock_port, app_port = _free_port(), _free_port()
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    mock_cmd = [sys.executable, str(ROOT / "mock_tiendanube.py"), "--port", str(mock_port),
+                "--latency-ms", str(args.mock_latency_ms), "--seed", "1"]
+    if not args.mock_rate_limit:
+        mock_cmd.append("--no-rate-limit")
+    env = {
+        **os.environ,
+        "TIENDANUBE_API_BASE_URL": f"http://127.0.0.1:{mock_port}/v1",
+        "TIENDANUBE_STORE_ID": "1",
+        "TIENDANUBE_ACCESS_TOKEN": "bench",
+        "TIENDANUBE_RATE_LIMIT": "1" if args.mock_rate_limit else "0",
+        "STORE_MIRROR_PATH": os.path.join(workdir, "mirror.sqlite"),
+        "CATALOG_RELOAD_INTERVAL": "0",
+    }
+    app_cmd = [sys.executable, "-m", "uvicorn", "app_complete:app", "--host", "127.0.0.1",
+               "--port", str(app_port), "--workers", str(args.workers), "--log-level", "warning"]
+    processes = []
+    print(f"Logs de los servidores en {workdir}\n")
+    try:
+        with open(os.path.join(workdir, "mock.log"), "w") as log:
+            processes.append(subprocess.Popen(mock_cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT))
+        _wait_ready(f"http://127.0.0.1:{mock_port}/mock/stats")
+        with open(os.path.join(workdir, "app.log"), "w") as log:
+            processes.append(subprocess.Popen(app_cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT))
+        _wait_ready(f"http://127.0.0.1:{app_port}/health")
+        # Primer sync del espejo para que query_store_mirror tenga datos
+        httpx.post(f"http://127.0.0.1:{app_port}/mirror/sync", json={"full": True}, timeout=60)
+        yield f"http://127.0.0.1:{app_port}"
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                process.wait(timeout=10)
+
+
+# ===== EJECUCIÓN =====
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(url: str, args) -> List[Dict[str, Any]]:
+    levels = args.concurrency
+    http_cases = dict(CATALOG_CASES)
+    if args.spawn or args.upstream:
+        http_cases.update(UPSTREAM_CASES)
+    tools = args.tools or None
+
+    results = []
+    for transport in args.transports:
+        if transport == "stdio":
+            cases, opened = STDIO_CASES, stdio_transport(STDIO_CASES, max(levels))
+        elif transport == "mcp":
+            cases, opened = http_cases, mcp_transport(url, http_cases, max(levels))
+        else:
+            cases, opened = http_cases, rest_transport(url, http_cases, max(levels))
+        async with opened as callers:
+            for tool in cases:
+                if tools and tool not in tools:
+                    continue
+                for concurrency in levels:
+                    stats = await measure(callers(tool, concurrency), args.requests, args.warmup)
+                    row = {"transport": transport, "tool": tool, "concurrency": concurrency, **stats}
+                    results.append(row)
+                    latency = row["latency_ms"]
+                    print(f"{transport:<6}{tool:<26}{concurrency:>4}{row['rps']:>10.1f}"
+                          f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}"
+                          f"{row['errors']:>8}", flush=True)
+    return results
+
+
+def cmd_run(args):
+    commit = _git("rev-parse", "--short", "HEAD")
+    with (spawn_servers(args) if args.spawn else contextlib.nullcontext(args.url)) as url:
+        print(f"{'transp.':<6}{'herramienta':<26}{'conc':>4}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'p99 ms':>10}{'errores':>8}")
+        results = asyncio.run(run_benchmark(url, args))
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "url": None if args.spawn else args.url,
+            "spawn": args.spawn,
+            "workers": args.workers if args.spawn else None,
+            "mock_latency_ms": args.mock_latency_ms if args.spawn else None,
+            "transports": args.transports,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"\nResultados: {output}")
+
+
+def cmd_compare(args):
+    """Diferencias de p50/p95/p99 y req/s entre dos corridas"""
+    base, new = (json.loads(Path(path).read_text()) for path in (args.base, args.new))
+    key = lambda row: (row["transport"], row["tool"], row["concurrency"])  # noqa: E731
+    base_rows = {key(row): row for row in base["results"]}
+    print(f"base: {base['meta'].get('commit')}  nuevo: {new['meta'].get('commit')}\n")
+    print(f"{'transp.':<6}{'herramienta':<26}{'conc':>4}{'req/s':>10}{'p50':>9}{'p95':>9}{'p99':>9}")
+
+    def delta(old: float, now: float) -> str:
+        return f"{(now - old) / old * 100:+.1f}%" if old else "-"
+
+    for row in new["results"]:
+        old = base_rows.get(key(row))
+        if old is None:
+            continue
+        print(f"{row['transport']:<6}{row['tool']:<26}{row['concurrency']:>4}"
+              f"{delta(old['rps'], row['rps']):>10}"
+              + "".join(f"{delta(old['latency_ms'][p], row['latency_ms'][p]):>9}" for p in ("p50", "p95", "p99")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Correr el benchmark")
+    run.add_argument("--url", default="http://localhost:8000", help="Servidor a medir (sin --spawn)")
+    run.add_argument("--spawn", action="store_true", help="Levantar app_complete.py contra el mock local")
+    run.add_argument("--upstream", action="store_true",
+                     help="Medir también las herramientas que llaman a la API (sin --spawn: ¡usa la tienda configurada!)")
+    run.add_argument("--transports", type=lambda v: v.split(","), default=list(TRANSPORTS),
+                     help="rest,mcp,stdio")
+    run.add_argument("--tools", type=lambda v: v.split(","), help="Sólo estas herramientas")
+    run.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 8, 32],
+                     help="Niveles de concurrencia, ej. 1,8,32")
+    run.add_argument("--requests", type=int, default=200, help="Requests por herramienta y nivel")
+    run.add_argument("--warmup", type=int, default=10, help="Requests de calentamiento por herramienta y nivel")
+    run.add_argument("--workers", type=int, default=1, help="Workers de uvicorn (con --spawn)")
+    run.add_argument("--mock-latency-ms", type=float, default=50.0, help="Latencia del mock (con --spawn)")
+    run.add_argument("--mock-rate-limit", action="store_true", help="Rate limit real en el mock (con --spawn)")
+    run.add_argument("--output", help="Archivo JSON de resultados")
+    run.set_defaults(func=cmd_run)
+
+    compare = commands.add_parser("compare", help="Comparar dos archivos de resultados")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        unknown = set(args.transports) - set(TRANSPORTS)
+        if unknown:
+            parser.error(f"transportes desconocidos: {', '.join(sorted(unknown))}")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
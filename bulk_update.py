@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Actualización masiva de stock y precio (PATCH /products/stock-price)
+
+Recibe filas sueltas (producto, variante, ubicación, stock, precio), las
+combina por variante, las agrupa por producto en lotes del tamaño máximo
+que acepta el endpoint y envía los lotes en paralelo a través del cliente
+compartido (el scheduler de rate limit de la tienda decide cuándo sale
+cada uno). Devuelve el resultado de cada fila de entrada.
+
+Formato del cuerpo (multi-inventario):
+    [{"id": <producto>, "variants": [{"id": <variante>, "price": "10.00",
+      "inventory_levels": [{"location_id": "...", "stock": 5}]}]}]
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import httpx
+
+from tiendanube_client import TiendaNubeClient
+
+STOCK_PRICE_PATH = "/products/stock-price"
+
+# Variantes por request que acepta PATCH /products/stock-price
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+
+PRICE_FIELDS = ("price", "promotional_price", "cost")
+
+
+def _price(value: Any) -> str:
+    """La API recibe los precios como string"""
+    return value if isinstance(value, str) else f"{float(value):.2f}"
+
+
+def coalesce_rows(rows: Iterable[Mapping[str, Any]]) -> Tuple[Dict, List, List]:
+    """
+    Combinar las filas por variante
+
+    Una fila posterior pisa a una anterior campo por campo; el stock se
+    combina por location_id (sin location_id es el `stock` de la variante,
+    que la API aplica al primer inventory_level).
+
+    Returns:
+        (variantes, clave de cada fila, filas inválidas)
+        variantes: {(product_id, variant_id): cambios}
+        clave de cada fila: (product_id, variant_id) o None si es inválida
+    """
+    variants: "OrderedDict[Tuple[int, int], Dict[str, Any]]" = OrderedDict()
+    keys: List[Optional[Tuple[int, int]]] = []
+    invalid: List[Dict[str, Any]] = []
+
+    for index, row in enumerate(rows):
+        product_id, variant_id = row.get("product_id"), row.get("variant_id")
+        has_change = row.get("stock") is not None or any(row.get(f) is not None for f in PRICE_FIELDS)
+        if product_id is None or variant_id is None or not has_change:
+            keys.append(None)
+            invalid.append({"row": index, "product_id": product_id, "variant_id": variant_id,
+                            "status": "invalid",
+                            "error": "Cada fila necesita product_id, variant_id y stock o algún precio"})
+            continue
+
+        key = (int(product_id), int(variant_id))
+        keys.append(key)
+        changes = variants.setdefault(key, {})
+        for field in PRICE_FIELDS:
+            if row.get(field) is not None:
+                changes[field] = _price(row[field])
+        if row.get("stock") is not None:
+            location_id = row.get("location_id")
+            if location_id:
+                changes.setdefault("inventory_levels", {})[location_id] = int(row["stock"])
+            else:
+                changes["stock"] = int(row["stock"])
+    return variants, keys, invalid
+
+
+def build_batches(variants: Mapping[Tuple[int, int], Dict[str, Any]],
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[Dict[str, Any]]]:
+    """
+    Armar los cuerpos de PATCH con hasta `batch_size` variantes cada uno
+
+    Las variantes de un mismo producto van juntas mientras entren en el
+    lote; un producto con más variantes que el lote se reparte en varios.
+    """
+    by_product: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+    for (product_id, variant_id), changes in variants.items():
+        variant = {"id": variant_id}
+        for field, value in changes.items():
+            if field == "inventory_levels":
+                value = [{"location_id": loc, "stock": stock} for loc, stock in value.items()]
+            variant[field] = value
+        by_product.setdefault(product_id, []).append(variant)
+
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    size = 0
+    for product_id, product_variants in by_product.items():
+        while product_variants:
+            room = batch_size - size
+            taken, product_variants = product_variants[:room], product_variants[room:]
+            current.append({"id": product_id, "variants": taken})
+            size += len(taken)
+            if size >= batch_size:
+                batches.append(current)
+                current, size = [], 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _variant_errors(data: Any) -> Dict[Tuple[int, int], str]:
+    """Errores por variante si la respuesta los informa ({"success": false} o "error")"""
+    errors: Dict[Tuple[int, int], str] = {}
+    if not isinstance(data, list):
+        return errors
+    for product in data:
+        if not isinstance(product, dict):
+            continue
+        for variant in product.get("variants") or []:
+            if not isinstance(variant, dict):
+                continue
+            error = variant.get("error") or variant.get("errors")
+            if variant.get("success") is False or error:
+                errors[(product.get("id"), variant.get("id"))] = str(error or "Actualización rechazada")
+    return errors
+
+
+async def _send_batch(client: TiendaNubeClient, store_id: str, batch: List[Dict[str, Any]],
+                      semaphore: asyncio.Semaphore, access_token: Optional[str]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Enviar un lote y devolver el resultado de cada variante"""
+    keys = [(product["id"], variant["id"]) for product in batch for variant in product["variants"]]
+    async with semaphore:
+        try:
+            response = await client.request(store_id, "PATCH", STOCK_PRICE_PATH,
+                                            access_token=access_token, json=batch)
+        except httpx.HTTPError as e:
+            return {key: {"status": "error", "error": f"Error llamando a Tienda Nube: {e!r}"} for key in keys}
+
+    if response.status_code >= 400:
+        try:
+            detail = response.json()
+        except ValueError:
+            detail = response.text
+        return {key: {"status": "error", "status_code": response.status_code, "error": detail} for key in keys}
+
+    try:
+        errors = _variant_errors(response.json())
+    except ValueError:
+        errors = {}
+    results = {}
+    for key in keys:
+        if key in errors:
+            results[key] = {"status": "error", "status_code": response.status_code, "error": errors[key]}
+        else:
+            results[key] = {"status": "ok", "status_code": response.status_code}
+    return results
+
+
+async def bulk_update_stock_price(client: TiendaNubeClient, store_id: str,
+                                  rows: List[Mapping[str, Any]], *,
+                                  access_token: Optional[str] = None,
+                                  batch_size: int = DEFAULT_BATCH_SIZE,
+                                  concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Actualizar stock y precio de muchas variantes con pocos requests
+
+    Args:
+        client: Cliente compartido (con el scheduler de rate limit)
+        store_id: ID de la tienda
+        rows: Filas {product_id, variant_id, location_id?, stock?, price?,
+            promotional_price?, cost?}
+        batch_size: Variantes por request
+        concurrency: Lotes en vuelo a la vez
+
+    Returns:
+        Resumen y un resultado por fila de entrada (en el mismo orden)
+    """
+    variants, keys, invalid = coalesce_rows(rows)
+    batches = build_batches(variants, max(1, batch_size))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    outcomes: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for batch_result in await asyncio.gather(
+            *(_send_batch(client, str(store_id), batch, semaphore, access_token) for batch in batches)):
+        outcomes.update(batch_result)
+
+    invalid_by_row = {entry["row"]: entry for entry in invalid}
+    seen = set()
+    results = []
+    for index, key in enumerate(keys):
+        if key is None:
+            results.append(invalid_by_row[index])
+            continue
+        result = {"row": index, "product_id": key[0], "variant_id": key[1], **outcomes[key]}
+        if key in seen:
+            # Combinada con una fila anterior de la misma variante
+            result["coalesced"] = True
+        seen.add(key)
+        results.append(result)
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    return {
+        "store_id": str(store_id),
+        "rows": len(results),
+        "variants": len(variants),
+        "requests": len(batches),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "results": results,
+    }
+
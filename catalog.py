@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Catálogo de la API de Tienda Nube
+Motor compartido por todos los front ends (server.py, server_simple.py,
+app.py y app_complete.py): índice O(1) de endpoints por (método, path) y
+por recurso, búsqueda, esquemas, ejemplos de código y carga/recarga en
+caliente del catálogo con todos sus índices.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from catalog_pack import CatalogPack, open_catalog, pack_path_for
+from catalog_search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Placeholders de path: '/products/{product_id}' -> '/products/{}'
+_PLACEHOLDER_RE = re.compile(r"\{[^}/]*\}")
+
+EndpointKey = Tuple[str, str]
+
+API_BASE_URL = "https://api.tiendanube.com/v1"
+
+# Resultados que devuelven las herramientas de búsqueda (los mejores por BM25)
+SEARCH_RESULTS_LIMIT = 20
+
+# Plantillas para endpoints sin ejemplo propio en el catálogo
+CODE_TEMPLATES: Dict[str, str] = {
+    "python": """import requests
+
+# Endpoint: {method} {path}
+# {description}
+
+url = "{base_url}{path}"
+headers = {{
+    "Authorization": "Bearer YOUR_ACCESS_TOKEN",
+    "User-Agent": "MyApp (name@email.com)"
+}}
+
+# Parámetros
+params = {{
+    # Agregar parámetros según sea necesario
+}}
+
+# Realizar solicitud
+response = requests.{method_lower}(url, headers=headers, params=params)
+
+# Procesar respuesta
+if response.status_code == 200:
+    data = response.json()
+    print(data)
+else:
+    print(f"Error: {{response.status_code}}")
+    print(response.text)
+""",
+    "javascript": """// Endpoint: {method} {path}
+// {description}
+
+const url = '{base_url}{path}';
+const headers = {{
+    'Authorization': 'Bearer YOUR_ACCESS_TOKEN',
+    'User-Agent': 'MyApp (name@email.com)'
+}};
+
+const options = {{
+    method: '{method}',
+    headers: headers
+}};
+
+fetch(url, options)
+    .then(response => response.json())
+    .then(data => console.log(data))
+    .catch(error => console.error('Error:', error));
+""",
+}
+
+
+def normalize_method(method: Optional[str]) -> str:
+    """Normalizar método HTTP (mayúsculas, GET por defecto)"""
+    return (method or "GET").strip().upper()
+
+
+def normalize_path(path: Optional[str]) -> str:
+    """
+    Normalizar path de endpoint
+
+    Quita query string y barra final, asegura la barra inicial y unifica
+    los nombres de los placeholders para que '/orders/{order_id}' y
+    '/orders/{id}' resuelvan al mismo endpoint.
+    """
+    path = (path or "").strip().split("?", 1)[0]
+    if not path.startswith("/"):
+        path = "/" + path
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return _PLACEHOLDER_RE.sub("{}", path)
+
+
+def endpoint_key(method: Optional[str], path: Optional[str]) -> EndpointKey:
+    """Clave normalizada (método, path) de un endpoint"""
+    return normalize_method(method), normalize_path(path)
+
+
+def endpoint_summary(endpoint: Mapping[str, Any]) -> Dict[str, Any]:
+    """Resumen de un endpoint (sólo campos disponibles sin decodificar el cuerpo)"""
+    return {
+        "method": endpoint.get("method"),
+        "path": endpoint.get("path"),
+        "name": endpoint.get("name"),
+        "description": endpoint.get("description"),
+    }
+
+
+class CatalogIndex:
+    """Índice de endpoints construido una sola vez al cargar la base de datos"""
+
+    def __init__(self, api_database: Dict[str, Any]):
+        self.endpoints: Dict[str, List[dict]] = api_database.get("endpoints", {})
+        self._by_key: Dict[EndpointKey, Tuple[str, dict]] = {}
+        self._by_resource: Dict[str, Dict[EndpointKey, dict]] = {}
+
+        for resource, endpoints in self.endpoints.items():
+            resource_index: Dict[EndpointKey, dict] = {}
+            for endpoint in endpoints:
+                key = endpoint_key(endpoint.get("method"), endpoint.get("path"))
+                resource_index.setdefault(key, endpoint)
+                # Ante duplicados entre recursos gana el primero (igual que el scan lineal)
+                self._by_key.setdefault(key, (resource, endpoint))
+            self._by_resource[resource] = resource_index
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def __contains__(self, key: EndpointKey) -> bool:
+        return endpoint_key(*key) in self._by_key
+
+    def lookup(self, method: Optional[str], path: Optional[str],
+               resource: Optional[str] = None) -> Optional[Tuple[str, dict]]:
+        """
+        Buscar un endpoint por (método, path)
+
+        Returns:
+            Tupla (recurso, endpoint) o None si no existe. Si se indica
+            `resource`, la búsqueda se limita al sub-índice de ese recurso.
+        """
+        key = endpoint_key(method, path)
+        if resource is None:
+            return self._by_key.get(key)
+
+        endpoint = self._by_resource.get(resource, {}).get(key)
+        if endpoint is None:
+            return None
+        return resource, endpoint
+
+    def resource_endpoints(self, resource: str) -> List[dict]:
+        """Endpoints de un recurso (lista vacía si no existe)"""
+        return self.endpoints.get(resource, [])
+
+    def resources(self) -> List[str]:
+        """Nombres de los recursos indexados"""
+        return list(self._by_resource)
+
+
+def source_signature(path: Path) -> Tuple[Tuple[int, int], ...]:
+    """Firma (mtime, tamaño) del JSON y del .pack de un catálogo"""
+    signature = []
+    for candidate in (Path(path), pack_path_for(path)):
+        try:
+            stat = candidate.stat()
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((0, 0))
+    return tuple(signature)
+
+
+def _content_version(path: Path) -> str:
+    """Hash corto del contenido del catálogo (el JSON, o el .pack si no hay JSON)"""
+    for candidate in (Path(path), pack_path_for(path)):
+        try:
+            return hashlib.sha256(candidate.read_bytes()).hexdigest()[:12]
+        except OSError:
+            continue
+    return "empty"
+
+
+class Catalog:
+    """
+    Una versión cargada del catálogo con todos sus índices
+
+    No se modifica una vez construida: una recarga construye un Catalog
+    nuevo y lo reemplaza de una sola vez.
+    """
+
+    def __init__(self, api_database: Dict[str, Any], search_state: Optional[Dict[str, Any]] = None,
+                 source: Optional[Path] = None, signature: Optional[Tuple] = None,
+                 pack: Optional[CatalogPack] = None):
+        self.api_database = api_database
+        self.pack = pack
+        self.source = Path(source) if source else None
+        self.index = CatalogIndex(api_database)
+        self.search_index = SearchIndex(api_database, search_state)
+        if signature is None and self.source:
+            signature = source_signature(self.source)
+        self.signature = signature or ()
+        endpoints = api_database.get("endpoints", {})
+        self.total_resources = len(endpoints)
+        self.total_endpoints = sum(len(e) for e in endpoints.values())
+        self.version = _content_version(self.source) if self.source else "memory"
+        self.generated_at = api_database.get("metadata", {}).get("generated_at")
+        if not self.generated_at and self.source and self.source.exists():
+            self.generated_at = datetime.fromtimestamp(self.source.stat().st_mtime).isoformat()
+        self.loaded_at = datetime.now().isoformat()
+        # Payloads pre-serializados de esta versión (los completa cada front end)
+        self.responses: Dict[str, Any] = {}
+        self._code_examples: Dict[Tuple[EndpointKey, str], Optional[str]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Catalog":
+        """Cargar el catálogo desde disco (prefiere el .pack)"""
+        # La firma se toma antes de leer: un cambio durante la carga no se pierde
+        signature = source_signature(path)
+        api_database, pack = open_catalog(path)
+        search_state = pack.read_search_state() if pack else None
+        return cls(api_database, search_state, source=path, signature=signature, pack=pack)
+
+    def close(self):
+        """Liberar el .pack mapeado (si vino de uno); llamar cuando ya nadie usa esta versión"""
+        if self.pack is not None:
+            self.pack.close()
+
+    def version_info(self) -> Dict[str, Any]:
+        """Versión activa del catálogo para /ready e /info"""
+        return {
+            "version": self.version,
+            "generated_at": self.generated_at,
+            "loaded_at": self.loaded_at,
+        }
+
+    # ===== CONSULTAS =====
+
+    def lookup(self, method: Optional[str], path: Optional[str],
+               resource: Optional[str] = None) -> Optional[Tuple[str, Mapping[str, Any]]]:
+        """Buscar un endpoint por (método, path); ver CatalogIndex.lookup"""
+        return self.index.lookup(method, path, resource)
+
+    def resource_endpoints(self, resource: str) -> List[Mapping[str, Any]]:
+        """Endpoints de un recurso (lista vacía si no existe)"""
+        return self.index.resource_endpoints(resource)
+
+    def search_endpoints(self, query: Optional[str], resource: Optional[str] = None,
+                         method: Optional[str] = None) -> List[Tuple[str, Mapping[str, Any], float]]:
+        """
+        Buscar endpoints ordenados por relevancia
+
+        Returns:
+            Lista de (recurso, endpoint, score). Sin query devuelve los
+            endpoints en orden de catálogo.
+        """
+        method = method.upper() if method else None
+        return [
+            (document["resource"], document["endpoint"], score)
+            for document, score in self.search_index.search(query, resource=resource, include_notes=False)
+            if method is None or document["endpoint"].get("method") == method
+        ]
+
+    def search_documentation(self, query: Optional[str]) -> List[Tuple[Dict[str, Any], float]]:
+        """Buscar en endpoints y notas importantes (documentos de SearchIndex)"""
+        return self.search_index.search(query)
+
+    def schemas(self, resource: str, endpoint_type: str = "response") -> List[Dict[str, Any]]:
+        """Esquemas JSON de solicitud ('request') o respuesta ('response') de un recurso"""
+        field = f"{endpoint_type}_schema"
+        return [
+            {"method": endpoint.get("method"), "path": endpoint.get("path"), "schema": endpoint[field]}
+            for endpoint in self.resource_endpoints(resource)
+            if field in endpoint
+        ]
+
+    def code_example_languages(self, endpoint: Mapping[str, Any]) -> List[str]:
+        """Lenguajes en los que hay ejemplo para un endpoint"""
+        languages = list(endpoint.get("code_examples", {}))
+        return languages + [language for language in CODE_TEMPLATES if language not in languages]
+
+    def code_example(self, endpoint: Mapping[str, Any], language: str = "python") -> Optional[str]:
+        """
+        Ejemplo de código de un endpoint
+
+        Usa el ejemplo del catálogo si existe y si no lo genera desde
+        CODE_TEMPLATES (una sola vez por endpoint y lenguaje). Devuelve
+        None si el lenguaje no está soportado.
+        """
+        cache_key = (endpoint_key(endpoint.get("method"), endpoint.get("path")), language)
+        if cache_key in self._code_examples:
+            return self._code_examples[cache_key]
+
+        code = endpoint.get("code_examples", {}).get(language)
+        if code is None and language in CODE_TEMPLATES:
+            method = normalize_method(endpoint.get("method"))
+            code = CODE_TEMPLATES[language].format(
+                method=method,
+                method_lower=method.lower(),
+                path=endpoint.get("path"),
+                description=endpoint.get("description") or "Sin descripción",
+                base_url=API_BASE_URL,
+            )
+        self._code_examples[cache_key] = code
+        return code
+
+
+class CatalogReloader:
+    """
+    Recarga el catálogo cuando cambian sus archivos en disco
+
+    La construcción del nuevo catálogo (índices y caches incluidos) corre
+    fuera del camino de los requests; `swap` se llama sólo con un catálogo
+    completo, y si la construcción falla se mantiene el anterior.
+    """
+
+    def __init__(self, path: Path, build: Callable[[Path], Catalog],
+                 swap: Callable[[Catalog], None], interval: float = 5.0,
+                 signature: Optional[Tuple] = None):
+        self.path = Path(path)
+        self.build = build
+        self.swap = swap
+        self.interval = interval
+        self._signature = signature if signature is not None else source_signature(self.path)
+
+    def check(self) -> bool:
+        """Recargar si el archivo cambió (sincrónico). Devuelve True si hubo recarga"""
+        signature = source_signature(self.path)
+        if signature == self._signature:
+            return False
+        # Registrar la firma antes de construir: si el archivo cambia
+        # durante la construcción, el próximo chequeo lo vuelve a detectar
+        self._signature = signature
+        try:
+            catalog = self.build(self.path)
+        except Exception as e:
+            logger.error(f"❌ Error recargando catálogo {self.path}: {e}. Se mantiene la versión anterior")
+            return False
+        self.swap(catalog)
+        logger.info(f"🔄 Catálogo recargado: versión {catalog.version} ({catalog.generated_at})")
+        return True
+
+    async def run(self):
+        """Loop de vigilancia para correr como tarea de asyncio"""
+        while True:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(self.check)
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Formato binario compacto del catálogo de la API de Tienda Nube
+
+El archivo .pack se genera junto al JSON y se abre con mmap: al arrancar
+sólo se lee la tabla de endpoints (struct de tamaño fijo con offsets) y
+los resúmenes (method, path, name, description). El cuerpo de cada
+endpoint (parámetros, esquemas, ejemplos) se decodifica recién la primera
+vez que se lo pide, y el índice de búsqueda precalculado cuando se lo usa.
+
+Layout (enteros little-endian):
+    MAGIC (8 bytes)
+    directorio: (offset, largo) uint32 de cada sección, en este orden
+    meta      JSON con metadata, important_notes, recursos, datos del índice y
+              tamaño + sha256 del JSON de origen
+    table     una entrada _ENTRY por endpoint (recurso, flags, largos de los
+              resúmenes, offset y largo del cuerpo)
+    strings   textos de los resúmenes, seguidos, en UTF-8
+    terms     términos del índice de búsqueda separados por saltos de línea
+    counts    uint32 por término: documentos de su posting list
+    postings  uint32 doc_id por posting, seguidos de un float32 tf por posting
+    bodies    JSON de cada endpoint sin los campos del resumen
+
+Uso:
+    python catalog_pack.py api_database_complete.json [salida.pack]
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from catalog_search import SearchIndex
+
+MAGIC = b"TNCAT\x00\x00\x03"
+FORMAT_VERSION = 3
+
+SECTIONS = ("meta", "table", "strings", "terms", "counts", "postings", "bodies")
+_DIRECTORY = struct.Struct("<" + "II" * len(SECTIONS))
+
+# Campos que viven en la tabla y no requieren decodificar el cuerpo
+SUMMARY_FIELDS = ("method", "path", "name", "description")
+
+# recurso (uint16), flags (uint8), largo de cada resumen, offset y largo del cuerpo (uint32)
+_ENTRY = struct.Struct("<HBx" + "I" * len(SUMMARY_FIELDS) + "II")
+# Bits 0-3 de flags: el campo del resumen está en la tabla. Con STRIPPED el
+# cuerpo no repite esos campos y el endpoint no tiene otros de SUMMARY_FIELDS
+STRIPPED = 0x10
+
+logger = logging.getLogger(__name__)
+
+
+def pack_path_for(json_path: Path) -> Path:
+    """Ruta del .pack que acompaña a un JSON de catálogo"""
+    return Path(json_path).with_suffix(".pack")
+
+
+def source_fingerprint(json_path: Path) -> Dict[str, Any]:
+    """Tamaño y sha256 del JSON del que sale un .pack"""
+    data = Path(json_path).read_bytes()
+    return {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _matches_source(fingerprint: Optional[Mapping[str, Any]], json_path: Path) -> bool:
+    # El tamaño descarta la mayoría de los cambios sin leer el archivo
+    if not fingerprint or fingerprint.get("size") != json_path.stat().st_size:
+        return False
+    return fingerprint == source_fingerprint(json_path)
+
+
+def _compact(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":  # pragma: no cover - depende de la plataforma
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: Any) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":  # pragma: no cover - depende de la plataforma
+        values.byteswap()
+    return values
+
+
+def _summary(endpoint: Mapping[str, Any]) -> Tuple[int, List[bytes], Dict[str, Any]]:
+    """flags, textos del resumen y cuerpo a guardar de un endpoint"""
+    present = [field for field in SUMMARY_FIELDS if isinstance(endpoint.get(field), str)]
+    flags = sum(1 << SUMMARY_FIELDS.index(field) for field in present)
+    texts = [endpoint[field].encode("utf-8") if field in present else b"" for field in SUMMARY_FIELDS]
+    # Sólo se quitan del cuerpo si son las primeras claves: así se conserva el orden al decodificar
+    keys = list(endpoint)
+    if keys[:len(present)] == present and not any(field in keys[len(present):] for field in SUMMARY_FIELDS):
+        return flags | STRIPPED, texts, {k: v for k, v in endpoint.items() if k not in present}
+    return flags, texts, dict(endpoint)
+
+
+def write_catalog_pack(api_database: Dict[str, Any], path: Path, source: Optional[Path] = None) -> Path:
+    """
+    Escribir el catálogo en formato .pack
+
+    `source` es el JSON del que sale: su huella queda en el .pack y
+    open_catalog sólo lo usa mientras el JSON no cambie.
+    """
+    resources = list(api_database.get("endpoints", {}))
+    sections: Dict[str, bytearray] = {name: bytearray() for name in SECTIONS}
+
+    for resource_id, resource in enumerate(resources):
+        for endpoint in api_database["endpoints"][resource]:
+            flags, texts, body = _summary(endpoint)
+            encoded = _compact(body)
+            sections["table"] += _ENTRY.pack(resource_id, flags, *(len(text) for text in texts),
+                                             len(sections["bodies"]), len(encoded))
+            sections["strings"] += b"".join(texts)
+            sections["bodies"] += encoded
+
+    state = SearchIndex(api_database).export_state()
+    terms = list(state["postings"])
+    doc_ids, tfs = array("I"), array("f")
+    for term in terms:
+        for doc_id, tf in state["postings"][term]:
+            doc_ids.append(doc_id)
+            tfs.append(tf)
+    sections["terms"] += "\n".join(terms).encode("utf-8")
+    sections["counts"] += _little_endian(array("I", [len(state["postings"][term]) for term in terms]))
+    sections["postings"] += _little_endian(doc_ids) + _little_endian(tfs)
+    sections["meta"] += _compact({
+        "format_version": FORMAT_VERSION,
+        "metadata": api_database.get("metadata", {}),
+        "important_notes": api_database.get("important_notes", {}),
+        "resources": resources,
+        "search": {"analyzer": state["analyzer"], "documents": state["documents"]},
+        "source": source_fingerprint(source) if source else None,
+    })
+
+    directory = []
+    offset = len(MAGIC) + _DIRECTORY.size
+    for name in SECTIONS:
+        directory += [offset, len(sections[name])]
+        offset += len(sections[name])
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_DIRECTORY.pack(*directory))
+        for name in SECTIONS:
+            f.write(sections[name])
+    # Reemplazo atómico: un proceso que esté leyendo el .pack anterior no lo ve a medias
+    tmp_path.replace(path)
+    return path
+
+
+class LazyEndpoint(Mapping):
+    """
+    Endpoint que decodifica su cuerpo sólo cuando se lo necesita
+
+    method, path, name y description se sirven desde la tabla; cualquier
+    otra clave decodifica el cuerpo completo una única vez.
+    """
+
+    __slots__ = ("_pack", "_slot", "_summary", "_stripped", "_full")
+
+    def __init__(self, pack: "CatalogPack", slot: int, summary: Dict[str, Any], stripped: bool = False):
+        self._pack = pack
+        self._slot = slot
+        # Sólo las claves presentes: "description" in endpoint coincide con iter(endpoint)
+        self._summary = summary
+        self._stripped = stripped
+        self._full: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._full is not None
+
+    def _materialize(self) -> Dict[str, Any]:
+        if self._full is None:
+            body = self._pack.decode_body(self._slot)
+            self._full = {**self._summary, **body} if self._stripped else body
+        return self._full
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._summary:
+            return self._summary[key]
+        if self._stripped and key in SUMMARY_FIELDS:
+            # El cuerpo no tiene campos del resumen: no hace falta decodificarlo
+            raise KeyError(key)
+        return self._materialize()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._materialize())
+
+    def __len__(self) -> int:
+        return len(self._materialize())
+
+    def __repr__(self) -> str:
+        return f"LazyEndpoint({self._summary.get('method')} {self._summary.get('path')})"
+
+
+class CatalogPack:
+    """Catálogo abierto desde un archivo .pack mapeado en memoria"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        data = self._mmap
+        if len(data) < len(MAGIC) + _DIRECTORY.size or data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} no es un catálogo .pack válido (o es de otra versión)")
+        directory = _DIRECTORY.unpack_from(data, len(MAGIC))
+        self._sections: Dict[str, Tuple[int, int]] = {
+            name: (directory[2 * i], directory[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        if any(offset + length > len(data) for offset, length in self._sections.values()):
+            raise ValueError(f"{self.path} está truncado")
+
+        meta = json.loads(self._section("meta"))
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Versión de .pack no soportada: {meta.get('format_version')}")
+        self._search_meta: Dict[str, Any] = meta.get("search") or {}
+        self.source: Optional[Dict[str, Any]] = meta.get("source")
+
+        resources = meta["resources"]
+        strings = self._section("strings")
+        self._bodies_offset = self._sections["bodies"][0]
+        self._offsets: List[Tuple[int, int]] = []
+        endpoints: Dict[str, List[LazyEndpoint]] = {name: [] for name in resources}
+        position = 0
+        for resource_id, flags, *lengths, offset, length in _ENTRY.iter_unpack(self._section("table")):
+            summary = {}
+            for bit, (field, size) in enumerate(zip(SUMMARY_FIELDS, lengths)):
+                if flags & (1 << bit):
+                    summary[field] = strings[position:position + size].decode("utf-8")
+                position += size
+            slot = len(self._offsets)
+            self._offsets.append((offset, length))
+            endpoints[resources[resource_id]].append(
+                LazyEndpoint(self, slot, summary, stripped=bool(flags & STRIPPED)))
+
+        self.api_database: Dict[str, Any] = {
+            "metadata": meta.get("metadata", {}),
+            "endpoints": endpoints,
+        }
+        if meta.get("important_notes"):
+            self.api_database["important_notes"] = meta["important_notes"]
+
+    def _section(self, name: str) -> bytes:
+        offset, length = self._sections[name]
+        return self._mmap[offset:offset + length]
+
+    def read_search_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Estado precalculado del índice de búsqueda para SearchIndex
+
+        Se decodifica en cada llamada y no se guarda: SearchIndex arma sus
+        propias posting lists y así no quedan dos copias en memoria.
+        """
+        if not self._search_meta:
+            return None
+        terms = self._section("terms").decode("utf-8").split("\n") if self._sections["terms"][1] else []
+        counts = _from_little_endian("I", self._section("counts"))
+        postings_data = self._section("postings")
+        middle = len(postings_data) // 2
+        doc_ids = _from_little_endian("I", postings_data[:middle])
+        tfs = _from_little_endian("f", postings_data[middle:])
+        postings: Dict[str, Dict[int, float]] = {}
+        start = 0
+        for term, count in zip(terms, counts):
+            postings[term] = dict(zip(doc_ids[start:start + count], tfs[start:start + count]))
+            start += count
+        return {**self._search_meta, "postings": postings}
+
+    def decode_body(self, slot: int) -> Dict[str, Any]:
+        """Decodificar el cuerpo de un endpoint"""
+        if self._mmap.closed:
+            raise ValueError(f"{self.path} ya fue cerrado")
+        offset, length = self._offsets[slot]
+        start = self._bodies_offset + offset
+        return json.loads(self._mmap[start:start + length])
+
+    def close(self):
+        """Liberar el mmap (los cuerpos ya decodificados siguen disponibles)"""
+        mapped = getattr(self, "_mmap", None)
+        if mapped is not None and not mapped.closed:
+            mapped.close()
+
+    def __enter__(self) -> "CatalogPack":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+def open_catalog(json_path: Path) -> Tuple[Dict[str, Any], Optional[CatalogPack]]:
+    """
+    Abrir el catálogo prefiriendo el .pack y cayendo al JSON
+
+    El .pack se usa si existe y se generó a partir del JSON actual (mismo
+    tamaño y sha256; el mtime no alcanza: un checkout o una copia lo
+    cambian sin cambiar el contenido, y viceversa) o si no hay JSON.
+    Devuelve la base de datos y el CatalogPack del que viene (None si vino
+    del JSON), para cerrarlo cuando el catálogo deja de usarse.
+    """
+    json_path = Path(json_path)
+    pack_path = pack_path_for(json_path)
+
+    if pack_path.exists():
+        try:
+            pack = CatalogPack(pack_path)
+            if not json_path.exists() or _matches_source(pack.source, json_path):
+                return pack.api_database, pack
+            pack.close()
+            logger.warning(f"⚠️ {pack_path} no corresponde a {json_path}. Usando JSON...")
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ No se pudo abrir {pack_path}: {e}. Usando JSON...")
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        return json.load(f), None
+
+
+def load_api_database(json_path: Path) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Cargar el catálogo prefiriendo el .pack y cayendo al JSON
+
+    Devuelve la base de datos y, si vino del .pack, el estado precalculado
+    del índice de búsqueda (para pasarlo a SearchIndex).
+    """
+    api_database, pack = open_catalog(json_path)
+    return api_database, pack.read_search_state() if pack else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1].strip(), file=sys.stderr)
+        sys.exit(1)
+
+    source = Path(sys.argv[1])
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else pack_path_for(source)
+    with open(source, "r", encoding="utf-8") as f:
+        database = json.load(f)
+    write_catalog_pack(database, target, source=source)
+    print(f"✅ Catálogo .pack generado: {target} ({target.stat().st_size} bytes)")
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Índice invertido de búsqueda sobre el catálogo de la API de Tienda Nube
+Se construye una sola vez al cargar la base de datos y responde cada
+búsqueda con intersecciones de posting lists, sin serializar endpoints.
+
+Los resultados se ordenan con BM25 (con pesos por campo). Los textos se
+normalizan sin acentos y con un stemming liviano de español, portugués e
+inglés, para que "categoria", "categoría" y "categories" coincidan.
+"""
+
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Palabras: letras/dígitos unicode, cortando en '_', '-', '/', '{', etc.
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Peso de cada campo al puntuar una coincidencia
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "path": 2.5,
+    "resource": 2.0,
+    "method": 2.0,
+    "description": 1.5,
+    "parameters": 1.0,
+    "notes": 1.0,
+}
+
+# Cambiar si cambia la tokenización/stemming: invalida índices precalculados (.pack)
+ANALYZER_VERSION = 1
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Largo mínimo de un término de la query para expandirlo por prefijo
+MIN_PREFIX_LEN = 3
+# Una coincidencia por prefijo puntúa menos que una exacta
+PREFIX_PENALTY = 0.5
+# Una coincidencia por sinónimo entre idiomas puntúa casi como una exacta
+SYNONYM_PENALTY = 0.9
+
+# Palabras vacías de español, portugués e inglés (ya sin acentos)
+STOPWORDS = frozenset("""
+    a al como con de del el en es la las lo los o para por que se su sus un una y
+    ao as da das do dos e em na nas no nos os um uma
+    an and by for from in is of on or the to with
+""".split())
+
+# Sufijos propios de cada idioma que se unifican antes de recortar plurales
+# (-ção/-ções en portugués, -tion en inglés -> -cion como en español)
+_SUFFIX_RULES = (
+    ("coes", "cion"),
+    ("cao", "cion"),
+    ("tions", "cion"),
+    ("tion", "cion"),
+)
+
+# Términos de e-commerce equivalentes entre español, portugués e inglés
+SYNONYM_GROUPS = (
+    ("orden", "pedido", "order"),
+    ("producto", "produto", "product"),
+    ("cliente", "customer"),
+    ("categoria", "category"),
+    ("variante", "variant"),
+    ("imagen", "imagem", "image"),
+    ("cupon", "cupom", "coupon"),
+    ("descuento", "desconto", "discount"),
+    ("carrito", "carrinho", "cart"),
+    ("tienda", "loja", "store"),
+    ("ubicacion", "localizacao", "location"),
+    ("envio", "frete", "shipping"),
+    ("pago", "pagamento", "payment"),
+    ("pagar", "pay"),
+    ("borrador", "rascunho", "draft"),
+    ("cumplimiento", "fulfillment"),
+    ("pagina", "page"),
+    ("regla", "regra", "rule"),
+    ("negocio", "business"),
+    ("historial", "historico", "history"),
+    ("obtener", "obter", "get"),
+    ("listar", "lista", "list"),
+    ("crear", "criar", "create"),
+    ("actualizar", "atualizar", "update"),
+    ("eliminar", "excluir", "borrar", "delete"),
+    ("cancelar", "cancel"),
+    ("cerrar", "fechar", "close"),
+    ("precio", "preco", "price"),
+)
+
+
+def fold_accents(text: str) -> str:
+    """Quitar acentos y diacríticos ('categoría' -> 'categoria', 'ção' -> 'cao')"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Palabras que el recorte de vocales haría colisionar ('page' y 'pago' -> 'pag')
+_STEM_EXCEPTIONS = {
+    "page": "page",
+    "pages": "page",
+    "pagina": "pagina",
+    "paginas": "pagina",
+}
+
+
+def stem(term: str) -> str:
+    """
+    Stemming liviano común a español, portugués e inglés
+
+    Unifica sufijos (-ção, -tion -> -cion), quita el plural en 's' y las
+    vocales finales, dejando siempre al menos 3 caracteres. No busca ser un
+    stemmer completo: sólo que singular/plural y variantes de idioma caigan
+    en el mismo término.
+    """
+    if len(term) <= 3 or term.isdigit():
+        return term
+    if term in _STEM_EXCEPTIONS:
+        return _STEM_EXCEPTIONS[term]
+
+    for suffix, replacement in _SUFFIX_RULES:
+        if term.endswith(suffix):
+            return term[:-len(suffix)] + replacement
+
+    if term.endswith("s") and not term.endswith("ss"):
+        term = term[:-1]
+    while len(term) > 3 and term[-1] in "aeiouy":
+        term = term[:-1]
+    return term
+
+
+def tokenize(text: Any) -> List[str]:
+    """Separar un texto en términos normalizados (sin acentos, con stemming)"""
+    if not text:
+        return []
+    words = _TOKEN_RE.findall(fold_accents(str(text).lower()))
+    return [stem(word) for word in words if word not in STOPWORDS]
+
+
+def normalize_query(query: Any) -> str:
+    """
+    Forma canónica de una query para usar como clave de caché
+
+    Dos queries con los mismos términos normalizados ("Stock", "stóck",
+    "el stock") dan los mismos resultados. Una query que se queda sin
+    términos no encuentra nada, así que no comparte clave con la query
+    vacía (que lista todo): se usa "-", que nunca es un término.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms and query is not None and str(query).strip():
+        return "-"
+    return " ".join(terms)
+
+
+def _build_synonyms() -> Dict[str, Set[str]]:
+    synonyms: Dict[str, Set[str]] = {}
+    for group in SYNONYM_GROUPS:
+        stems = {stem(fold_accents(word)) for word in group}
+        for term in stems:
+            synonyms.setdefault(term, set()).update(stems - {term})
+    return synonyms
+
+
+_SYNONYMS = _build_synonyms()
+
+
+def _flatten_text(value: Any) -> Iterable[str]:
+    """Recorrer recursivamente un valor JSON devolviendo sus textos"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _flatten_text(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten_text(item)
+    elif value is not None:
+        yield str(value)
+
+
+def _parameter_text(parameters: Dict[str, Any]) -> Iterable[str]:
+    """Nombres, descripciones y valores enum de los parámetros"""
+    for name, spec in (parameters or {}).items():
+        yield name
+        if isinstance(spec, dict):
+            yield spec.get("description", "")
+            yield from (str(v) for v in spec.get("enum", []))
+
+
+class SearchIndex:
+    """Índice invertido de endpoints y notas importantes con ranking BM25F"""
+
+    def __init__(self, api_database: Dict[str, Any], state: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            api_database: Base de datos del catálogo
+            state: Estado exportado con export_state() (p.ej. desde un .pack);
+                si es compatible se evita re-tokenizar todo el catálogo
+        """
+        # Cada documento es {"type": "endpoint", "resource", "endpoint"}
+        # o {"type": "note", "key", "data"}
+        self.documents: List[Dict[str, Any]] = []
+        # doc_id -> campo -> términos del campo (sólo durante la construcción)
+        self._fields: List[Dict[str, List[str]]] = []
+
+        for resource, endpoints in api_database.get("endpoints", {}).items():
+            for endpoint in endpoints:
+                self._add_document({
+                    "type": "endpoint",
+                    "resource": resource,
+                    "endpoint": endpoint,
+                })
+        for key, data in api_database.get("important_notes", {}).items():
+            self._add_document({"type": "note", "key": key, "data": data})
+
+        # término -> {doc_id: frecuencia BM25F (ponderada y normalizada por campo)}
+        if (state and state.get("analyzer") == ANALYZER_VERSION
+                and state.get("documents") == len(self.documents)):
+            self._postings: Dict[str, Dict[int, float]] = {
+                term: dict(postings) for term, postings in state["postings"].items()
+            }
+        else:
+            self._tokenize_documents()
+            self._postings = self._build_postings()
+        self._fields = []
+
+        total_docs = len(self.documents)
+        self._idf = {
+            term: math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        # Vocabulario ordenado para expandir prefijos con bisect
+        self._terms = sorted(self._postings)
+
+    def _tokenize_documents(self):
+        for doc_id, document in enumerate(self.documents):
+            if document["type"] == "note":
+                self._index_field(doc_id, "name", [document["key"]])
+                self._index_field(doc_id, "notes", _flatten_text(document["data"]))
+                continue
+            endpoint = document["endpoint"]
+            self._index_field(doc_id, "name", [endpoint.get("name")])
+            self._index_field(doc_id, "path", [endpoint.get("path")])
+            self._index_field(doc_id, "method", [endpoint.get("method")])
+            self._index_field(doc_id, "resource", [document["resource"]])
+            self._index_field(doc_id, "description", [endpoint.get("description")])
+            self._index_field(doc_id, "parameters",
+                              _parameter_text(endpoint.get("parameters", {})))
+
+    def export_state(self) -> Dict[str, Any]:
+        """Estado serializable del índice (posting lists ya puntuadas)"""
+        return {
+            "analyzer": ANALYZER_VERSION,
+            "documents": len(self.documents),
+            "postings": {
+                term: [[doc_id, round(tf, 6)] for doc_id, tf in postings.items()]
+                for term, postings in self._postings.items()
+            },
+        }
+
+    def _add_document(self, document: Dict[str, Any]) -> int:
+        self.documents.append(document)
+        self._fields.append({})
+        return len(self.documents) - 1
+
+    def _index_field(self, doc_id: int, field: str, texts: Iterable[Any]):
+        terms = self._fields[doc_id].setdefault(field, [])
+        for text in texts:
+            terms.extend(tokenize(text))
+
+    def _build_postings(self) -> Dict[str, Dict[int, float]]:
+        """
+        Precalcular la frecuencia BM25F de cada (término, documento)
+
+        Cada campo se normaliza por su propio largo promedio, así una
+        lista larga de parámetros no penaliza el nombre del endpoint. El
+        valor no depende de la query, por lo que se calcula una sola vez.
+        """
+        total_docs = len(self._fields) or 1
+        avg_lengths = {
+            field: (sum(len(doc.get(field, ())) for doc in self._fields) / total_docs) or 1.0
+            for field in FIELD_WEIGHTS
+        }
+
+        postings: Dict[str, Dict[int, float]] = {}
+        for doc_id, fields in enumerate(self._fields):
+            for field, terms in fields.items():
+                if not terms:
+                    continue
+                norm = 1 - BM25_B + BM25_B * len(terms) / avg_lengths[field]
+                weight = FIELD_WEIGHTS[field] / norm
+                for term in terms:
+                    doc_postings = postings.setdefault(term, {})
+                    doc_postings[doc_id] = doc_postings.get(doc_id, 0.0) + weight
+        return postings
+
+    def _bm25(self, term: str, tf: float) -> float:
+        return self._idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1)
+
+    def _expand(self, term: str) -> Dict[int, float]:
+        """
+        Scores BM25 de un término de la query
+
+        Une la posting list exacta con las de sus sinónimos y sus
+        expansiones por prefijo, quedándose con el mejor score por documento.
+        """
+        variants = [(term, 1.0)]
+        variants.extend((synonym, SYNONYM_PENALTY) for synonym in _SYNONYMS.get(term, ()))
+        if len(term) >= MIN_PREFIX_LEN:
+            position = bisect_left(self._terms, term)
+            while position < len(self._terms) and self._terms[position].startswith(term):
+                if self._terms[position] != term:
+                    variants.append((self._terms[position], PREFIX_PENALTY))
+                position += 1
+
+        matches: Dict[int, float] = {}
+        for variant, factor in variants:
+            for doc_id, tf in self._postings.get(variant, {}).items():
+                score = self._bm25(variant, tf) * factor
+                if score > matches.get(doc_id, 0.0):
+                    matches[doc_id] = score
+        return matches
+
+    def search(self, query: Optional[str], resource: Optional[str] = None,
+               include_notes: bool = True) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Buscar documentos para una query, ordenados por score BM25
+
+        Primero se exige que el documento contenga todos los términos; si
+        ninguno lo hace, se devuelven los que contienen alguno (el ranking
+        BM25 ya premia a los que coinciden con más términos).
+
+        Returns:
+            Lista de (documento, score) ordenada por relevancia. Sin query
+            (None o en blanco) devuelve todos los documentos en orden de
+            catálogo; una query que se queda sin términos (ej. sólo
+            stopwords como "de la") no encuentra nada.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+
+        if not terms and query is not None and str(query).strip():
+            return []
+        if not terms:
+            candidates = {doc_id: 0.0 for doc_id in range(len(self.documents))}
+        else:
+            postings = sorted((self._expand(term) for term in terms), key=len)
+            candidates = self._intersect(postings)
+            if not candidates and len(postings) > 1:
+                candidates = self._union(postings)
+
+        results = []
+        for doc_id, score in candidates.items():
+            document = self.documents[doc_id]
+            if document["type"] == "note":
+                if not include_notes or resource is not None:
+                    continue
+            elif resource is not None and document["resource"] != resource:
+                continue
+            results.append((doc_id, score))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return [(self.documents[doc_id], score) for doc_id, score in results]
+
+    @staticmethod
+    def _intersect(postings: List[Dict[int, float]]) -> Dict[int, float]:
+        # Empezando por la posting list más corta
+        candidates = dict(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates = {
+                doc_id: score + posting[doc_id]
+                for doc_id, score in candidates.items()
+                if doc_id in posting
+            }
+        return candidates
+
+    @staticmethod
+    def _union(postings: List[Dict[int, float]]) -> Dict[int, float]:
+        candidates: Dict[int, float] = {}
+        for posting in postings:
+            for doc_id, score in posting.items():
+                candidates[doc_id] = candidates.get(doc_id, 0.0) + score
+        return candidates
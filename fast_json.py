@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Serialización JSON rápida para la capa HTTP
+Usa orjson si está instalado y cae al módulo json estándar si no. Los
+endpoints del catálogo cargados desde el .pack (LazyEndpoint) se
+serializan como objetos.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """Serializar a JSON compacto en UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"),
+                      default=_default).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Deserializar JSON (bytes o str)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse serializada con orjson
+
+    Devolverla directamente desde un handler evita además el paso por
+    jsonable_encoder de FastAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
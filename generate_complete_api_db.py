@@ -6,6 +6,9 @@ Crea un JSON exhaustivo con TODOS los 116+ endpoints de la API
 
 import json
 from datetime import datetime
+from pathlib import Path
+
+from catalog_pack import pack_path_for, write_catalog_pack
 
 # Base de datos completa de la API de Tienda Nube
 COMPLETE_API_DATABASE = {
@@ -1239,9 +1242,13 @@ COMPLETE_API_DATABASE = {
 }
 
 # Guardar la base de datos
-with open('/home/ubuntu/tiendanube_mcp/api_database_complete.json', 'w') as f:
+OUTPUT_PATH = Path('/home/ubuntu/tiendanube_mcp/api_database_complete.json')
+with open(OUTPUT_PATH, 'w') as f:
     json.dump(COMPLETE_API_DATABASE, f, indent=2, ensure_ascii=False)
 
+# Catálogo compacto (.pack) que los servidores prefieren sobre el JSON
+PACK_PATH = write_catalog_pack(COMPLETE_API_DATABASE, pack_path_for(OUTPUT_PATH), source=OUTPUT_PATH)
+
 # Contar endpoints
 total_endpoints = sum(len(endpoints) for endpoints in COMPLETE_API_DATABASE['endpoints'].values())
 total_resources = len(COMPLETE_API_DATABASE['endpoints'])
@@ -1249,7 +1256,8 @@ total_resources = len(COMPLETE_API_DATABASE['endpoints'])
 print(f"✅ Base de datos completa generada")
 print(f"📊 Total de recursos: {total_resources}")
 print(f"📊 Total de endpoints: {total_endpoints}")
-print(f"📊 Archivo: /home/ubuntu/tiendanube_mcp/api_database_complete.json")
+print(f"📊 Archivo: {OUTPUT_PATH}")
+print(f"📊 Catálogo compacto: {PACK_PATH}")
 
 # Listar recursos
 print(f"\n📋 Recursos incluidos:")
@@ -0,0 +1,124 @@
+"""
+Configuración de Gunicorn para producción
+Ejecuta app_complete.py con varios workers uvicorn detrás del upstream
+`mcp_backend` de nginx (least_conn + keepalive).
+
+Uso:
+    gunicorn -c gunicorn.conf.py app_complete:app
+
+Variables de entorno:
+    WEB_CONCURRENCY / GUNICORN_WORKERS  Cantidad de workers (default: CPUs disponibles)
+    GUNICORN_PRELOAD                    Cargar la app en el master antes de forkear (default: 1)
+    GUNICORN_MAX_REQUESTS               Reciclar cada worker tras N requests (default: 10000, 0 = nunca)
+    GUNICORN_MAX_REQUESTS_JITTER        Jitter del reciclado para no reiniciar todos juntos (default: 1000)
+    GUNICORN_TIMEOUT                    Timeout de un worker colgado en segundos (default: 60)
+    GUNICORN_GRACEFUL_TIMEOUT           Espera para terminar requests en curso (default: 30)
+    GUNICORN_KEEPALIVE                  Keep-alive HTTP con nginx en segundos (default: 75)
+    HOST / PORT                         Dirección de escucha (default: 0.0.0.0:8000)
+    PROMETHEUS_MULTIPROC_DIR            Directorio donde los workers comparten las métricas de
+                                        /metrics (default: <tmp>/tiendanube_mcp_metrics)
+
+Señales útiles sobre el proceso master:
+    HUP   Recrear los workers de forma gradual (graceful reload)
+    TTIN  Sumar un worker / TTOU  Quitar un worker
+    USR2 + WINCH  Actualizar el código con preload activo (nuevo master, sin cortar conexiones)
+"""
+
+import gc
+import glob
+import os
+import tempfile
+
+
+def _available_cpus() -> int:
+    """CPUs disponibles para el contenedor (affinity y cuota de cgroups)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # cgroup v2: "max 100000" o "200000 100000"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# ===== SERVIDOR =====
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+
+try:
+    import uvicorn_worker  # noqa: F401
+    worker_class = "uvicorn_worker.UvicornWorker"
+except ImportError:
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+workers = _env_int("WEB_CONCURRENCY", _env_int("GUNICORN_WORKERS", _available_cpus()))
+# La app lo lee para elegir backends compartidos entre workers (ej. UPSTREAM_CACHE=auto)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# Con preload el catálogo se carga una sola vez en el master y los workers
+# comparten esas páginas copy-on-write (el .pack además está mapeado con mmap)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+# ===== RECICLADO Y TIMEOUTS =====
+
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 10000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 1000)
+timeout = _env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+# Mayor que el keepalive del upstream de nginx para que nginx cierre primero
+keepalive = _env_int("GUNICORN_KEEPALIVE", 75)
+
+# ===== PROXY Y LOGS =====
+
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "*")
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+# ===== MÉTRICAS =====
+
+# Se define antes de cargar la app: prometheus_client elige al importarse si
+# guarda los valores en memoria o en archivos compartidos entre workers
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR",
+                                    os.path.join(tempfile.gettempdir(), "tiendanube_mcp_metrics"))
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+# ===== HOOKS =====
+
+def on_starting(server):
+    """Borrar las métricas de una ejecución anterior (las del master con preload se conservan)"""
+    own = f"_{os.getpid()}.db"
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        if not path.endswith(own):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    """Un worker terminó (o se recicló): sacar sus gauges 'live' de /metrics"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid, metrics_dir)
+
+
+def when_ready(server):
+    """El master terminó de cargar la app (si hay preload): congelar el heap"""
+    if preload_app:
+        # Los objetos ya creados (catálogo, índices) no los recorre el GC de
+        # los workers, así no se ensucian las páginas compartidas copy-on-write
+        gc.freeze()
+    server.log.info(f"Gunicorn listo: {workers} workers {worker_class} (preload={preload_app})")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Caché HTTP condicional para respuestas derivadas del catálogo
+
+Las respuestas de las herramientas de consulta, /info y /.well-known/*
+sólo dependen de la versión del catálogo y de los argumentos del request,
+así que el ETag se calcula antes de ejecutar el handler: un
+If-None-Match que coincide se responde con 304 sin tocar el catálogo ni
+serializar nada.
+"""
+
+import hashlib
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def canonical_query(query_string: bytes) -> str:
+    """Query string con los argumentos ordenados (a=1&b=2 == b=2&a=1)"""
+    pairs = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode(sorted(pairs))
+
+
+def compute_etag(version: str, path: str, query_string: bytes = b"") -> str:
+    """
+    ETag débil de una respuesta del catálogo
+
+    Es débil porque campos como `loaded_at` pueden variar entre workers
+    con el mismo contenido de catálogo.
+    """
+    key = f"{version}|{path}|{canonical_query(query_string)}".encode("utf-8")
+    return f'W/"{version}-{hashlib.blake2b(key, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110 §13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class CatalogETagMiddleware:
+    """
+    Middleware ASGI de ETag / If-None-Match / Cache-Control
+
+    Args:
+        app: Aplicación ASGI
+        get_version: Devuelve la versión activa del catálogo (se consulta
+            en cada request, así una recarga en caliente cambia los ETags)
+        paths: Paths exactos cacheables (ej. herramientas de consulta POST)
+        prefixes: Prefijos cacheables (ej. '/.well-known/')
+        max_age: Segundos de Cache-Control; 0 emite `no-cache` (revalidar siempre)
+    """
+
+    def __init__(self, app, get_version: Callable[[], str], paths: Iterable[str] = (),
+                 prefixes: Iterable[str] = (), max_age: int = 60):
+        self.app = app
+        self.get_version = get_version
+        self.paths = frozenset(paths)
+        self.prefixes = tuple(prefixes)
+        if max_age > 0:
+            self.cache_control = f"public, max-age={max_age}".encode("latin-1")
+        else:
+            self.cache_control = b"no-cache"
+
+    def _cacheable(self, scope) -> bool:
+        if scope["method"] not in ("GET", "HEAD", "POST"):
+            return False
+        path = scope["path"]
+        return path in self.paths or path.startswith(self.prefixes)
+
+    @staticmethod
+    def _header(scope, name: bytes) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        etag = compute_etag(self.get_version(), scope["path"], scope.get("query_string", b""))
+        cache_headers: Headers = [(b"etag", etag.encode("latin-1")),
+                                  (b"cache-control", self.cache_control)]
+
+        if_none_match = self._header(scope, b"if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            # Las herramientas de consulta son lecturas sin efectos aunque se
+            # invoquen por POST, así que también se responden con 304
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                present = {key.lower() for key, _ in message.get("headers", [])}
+                headers = list(message.get("headers", []))
+                headers.extend(h for h in cache_headers if h[0] not in present)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Métricas Prometheus de app_complete.py (GET /metrics)
+
+    mcp_http_requests_total, mcp_http_request_duration_seconds
+        Requests por ruta (template, ej. '/tools/{nombre}'), método y status
+    mcp_tool_calls_total, mcp_tool_duration_seconds
+        Llamadas a cada herramienta (por REST o por /mcp) y su status
+    mcp_http_requests_in_flight     Requests en curso
+    mcp_sessions_active             Sesiones MCP streamable-HTTP abiertas
+                                    (según el header mcp-session-id de /mcp;
+                                    una sesión sin requests por más de
+                                    MCP_SESSION_IDLE_TTL segundos se descuenta)
+    mcp_cache_hits_total, mcp_cache_misses_total
+        Por caché (search, upstream); hit ratio = hits / (hits + misses)
+    mcp_catalog_info{version}       1 para la versión del catálogo cargada
+    mcp_upstream_request_duration_seconds
+        Llamadas a la API de Tienda Nube por tienda, método y status
+    mcp_upstream_rate_limit_wait_seconds
+        Espera en la cola del rate limiter por tienda
+
+Varios workers: con gunicorn cada worker es un proceso con sus propios
+valores. Si PROMETHEUS_MULTIPROC_DIR está definido (gunicorn.conf.py lo
+define antes de cargar la app) cada proceso los escribe en archivos de ese
+directorio y /metrics devuelve la suma de todos los workers, incluidos los
+ya reciclados (los contadores no retroceden). Sin la variable se exportan
+sólo los del proceso.
+
+Los valores que viven en otros objetos (cachés, versión del catálogo) se
+copian a las métricas antes de responder /metrics y cada pocos segundos
+en segundo plano (Metrics.run): así los workers que no atienden el scrape
+también dejan sus archivos al día, sin sumar trabajo a cada request.
+
+Si prometheus_client no está instalado Metrics.from_env() devuelve None y
+la app no registra métricas.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # pragma: no cover - depende del entorno
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Herramientas del catálogo en ms, llamadas a la API en cientos de ms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UPSTREAM_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Ruta de los requests que no matchean ninguna (404): no usar el path crudo como label
+UNMATCHED_ROUTE = "unmatched"
+TOOL_PREFIX = "/tools/"
+SESSION_HEADER = b"mcp-session-id"
+# Sesiones abandonadas (el cliente no manda DELETE) o cerradas por otro worker
+DEFAULT_SESSION_IDLE_TTL = 1800.0
+
+
+class Metrics:
+    """
+    Métricas de un proceso
+
+    Args:
+        registry: Registro donde se crean las métricas (uno propio por
+            instancia, así los tests no chocan con el global)
+        multiprocess_dir: Directorio compartido entre workers (ver arriba)
+        session_idle_ttl: Segundos sin requests tras los que una sesión MCP
+            deja de contarse (0 = nunca)
+        clock: Reloj monotónico de la última actividad de cada sesión
+    """
+
+    def __init__(self, registry: Optional["CollectorRegistry"] = None, multiprocess_dir: Optional[str] = None,
+                 session_idle_ttl: float = DEFAULT_SESSION_IDLE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.registry = registry or CollectorRegistry()
+        self.multiprocess_dir = multiprocess_dir
+        self.session_idle_ttl = session_idle_ttl
+        self.clock = clock
+        self._sources: Dict[str, Any] = {}
+        self._caches: Dict[str, Any] = {}
+        self._seen: Dict[tuple, int] = {}
+        # Sesión -> última vez que se la vio en este proceso
+        self._sessions: Dict[str, float] = {}
+        self._catalog_version: Optional[str] = None
+
+        registry = self.registry
+        self.requests = Counter("mcp_http_requests_total", "Requests HTTP",
+                                ["route", "method", "status"], registry=registry)
+        self.request_duration = Histogram("mcp_http_request_duration_seconds", "Duración de los requests HTTP",
+                                          ["route", "method"], buckets=LATENCY_BUCKETS, registry=registry)
+        self.tool_calls = Counter("mcp_tool_calls_total", "Llamadas a herramientas",
+                                  ["tool", "status"], registry=registry)
+        self.tool_duration = Histogram("mcp_tool_duration_seconds", "Duración de las llamadas a herramientas",
+                                       ["tool"], buckets=LATENCY_BUCKETS, registry=registry)
+        self.in_flight = Gauge("mcp_http_requests_in_flight", "Requests HTTP en curso",
+                               registry=registry, multiprocess_mode="livesum")
+        self.sessions = Gauge("mcp_sessions_active", "Sesiones MCP streamable-HTTP abiertas",
+                              registry=registry, multiprocess_mode="livesum")
+        self.cache_hits = Counter("mcp_cache_hits_total", "Aciertos de caché", ["cache"], registry=registry)
+        self.cache_misses = Counter("mcp_cache_misses_total", "Fallos de caché", ["cache"], registry=registry)
+        # livemax: una versión vale 1 mientras algún worker vivo la tenga cargada
+        self.catalog_info = Gauge("mcp_catalog_info", "Versión del catálogo cargada", ["version"],
+                                  registry=registry, multiprocess_mode="livemax")
+        self.upstream_duration = Histogram("mcp_upstream_request_duration_seconds",
+                                           "Duración de las llamadas a la API por tienda",
+                                           ["store", "method", "status"], buckets=UPSTREAM_BUCKETS,
+                                           registry=registry)
+        self.rate_limit_wait = Histogram("mcp_upstream_rate_limit_wait_seconds",
+                                         "Espera en la cola del rate limiter por tienda",
+                                         ["store"], buckets=WAIT_BUCKETS, registry=registry)
+
+    @classmethod
+    def from_env(cls) -> Optional["Metrics"]:
+        """
+        METRICS=0 las desactiva; PROMETHEUS_MULTIPROC_DIR agrega entre workers;
+        MCP_SESSION_IDLE_TTL descuenta las sesiones inactivas
+        """
+        if prometheus_client is None or os.getenv("METRICS", "1").lower() in ("0", "false", "no"):
+            return None
+        return cls(multiprocess_dir=os.getenv("PROMETHEUS_MULTIPROC_DIR") or None,
+                   session_idle_ttl=float(os.getenv("MCP_SESSION_IDLE_TTL", DEFAULT_SESSION_IDLE_TTL)))
+
+    # ===== FUENTES EXTERNAS =====
+
+    def watch(self, catalog_version: Optional[Callable[[], str]] = None,
+              caches: Optional[Dict[str, Any]] = None):
+        """
+        Registrar de dónde leer los valores que no se miden en el request
+
+        Args:
+            catalog_version: Devuelve la versión activa del catálogo
+            caches: Nombre -> objeto con contadores `hits` y `misses`
+        """
+        if catalog_version is not None:
+            self._sources["catalog_version"] = catalog_version
+        for name, cache in (caches or {}).items():
+            if cache is not None:
+                self._caches[name] = cache
+                # Series en 0 desde el arranque: el hit ratio existe antes del primer acierto
+                self.cache_hits.labels(name)
+                self.cache_misses.labels(name)
+
+    def _sync_counter(self, counter, label: str, value: int):
+        """Sumar al contador lo que avanzó `value` desde la última lectura"""
+        key = (counter, label)
+        delta = value - self._seen.get(key, 0)
+        if delta < 0:
+            # El contador de origen se reinició
+            delta = value
+        if delta:
+            counter.labels(label).inc(delta)
+        self._seen[key] = value
+
+    def refresh(self):
+        """Copiar los valores de las fuentes a las métricas y descontar las sesiones inactivas"""
+        self.expire_sessions()
+        for name, cache in self._caches.items():
+            self._sync_counter(self.cache_hits, name, cache.hits)
+            self._sync_counter(self.cache_misses, name, cache.misses)
+        if "catalog_version" in self._sources:
+            version = self._sources["catalog_version"]()
+            if version != self._catalog_version:
+                if self._catalog_version is not None:
+                    self.catalog_info.labels(self._catalog_version).set(0)
+                self.catalog_info.labels(version).set(1)
+                self._catalog_version = version
+
+    async def run(self, interval: float):
+        """Refrescar las fuentes cada `interval` segundos (tarea de fondo de cada worker)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Error refrescando métricas: {e!r}")
+
+    def session_opened(self, session_id: str):
+        self._sessions[session_id] = self.clock()
+        self.expire_sessions()
+
+    def session_seen(self, session_id: str):
+        """Actividad de una sesión; las abiertas en otro worker no se cuentan acá"""
+        if session_id in self._sessions:
+            self._sessions[session_id] = self.clock()
+
+    def session_closed(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self.sessions.set(len(self._sessions))
+
+    def expire_sessions(self):
+        """Descontar las sesiones sin requests por más de `session_idle_ttl` segundos"""
+        if self.session_idle_ttl > 0:
+            cutoff = self.clock() - self.session_idle_ttl
+            for session_id in [s for s, seen in self._sessions.items() if seen < cutoff]:
+                del self._sessions[session_id]
+        self.sessions.set(len(self._sessions))
+
+    # ===== OBSERVACIONES =====
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        self.requests.labels(route, method, str(status)).inc()
+        self.request_duration.labels(route, method).observe(seconds)
+        if route.startswith(TOOL_PREFIX):
+            tool = route[len(TOOL_PREFIX):]
+            self.tool_calls.labels(tool, str(status)).inc()
+            self.tool_duration.labels(tool).observe(seconds)
+
+    def observe_upstream(self, store_id: str, method: str, status: Any, seconds: float):
+        """Una llamada a la API (cada intento cuenta); `status` es el HTTP o 'error'"""
+        self.upstream_duration.labels(str(store_id), method, str(status)).observe(seconds)
+
+    def observe_rate_limit_wait(self, store_id: str, seconds: float):
+        self.rate_limit_wait.labels(str(store_id)).observe(seconds)
+
+    # ===== EXPOSICIÓN =====
+
+    def render(self) -> bytes:
+        """Texto de exposición de Prometheus (sumado entre workers si hay directorio compartido)"""
+        self.refresh()
+        if self.multiprocess_dir:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=self.multiprocess_dir)
+            return prometheus_client.generate_latest(registry)
+        return prometheus_client.generate_latest(self.registry)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada request HTTP
+
+    La ruta se toma del template que matcheó (scope['route'], lo completa
+    el router de FastAPI), así '/products/123' no genera una serie nueva.
+    Los requests que responde un middleware antes del router (ej. un 304
+    de CatalogETagMiddleware) usan el path si está en `paths`.
+
+    En `sessions_path` (el endpoint MCP streamable-HTTP) cuenta sesiones:
+    una respuesta con header mcp-session-id a un request sin él abre una
+    sesión; un DELETE con el header, o un 404 (sesión desconocida), la cierra.
+    Cualquier otro request con el header la mantiene viva (ver
+    Metrics.expire_sessions).
+    """
+
+    def __init__(self, app, metrics: Metrics, paths: Iterable[str] = (),
+                 sessions_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.app = app
+        self.metrics = metrics
+        self.paths = frozenset(paths)
+        self.sessions_path = sessions_path
+        self.clock = clock
+
+    def _route(self, scope) -> str:
+        path = getattr(scope.get("route"), "path", None)
+        if path:
+            return path
+        return scope["path"] if scope["path"] in self.paths else UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = self.clock()
+        track_session = bool(self.sessions_path) and scope["path"].rstrip("/") == self.sessions_path
+        request_session = _header(scope.get("headers", ()), SESSION_HEADER) if track_session else None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if track_session:
+                    self._track_session(scope["method"], status, request_session,
+                                        _header(message.get("headers", ()), SESSION_HEADER))
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight.dec()
+            self.metrics.observe_request(self._route(scope), scope["method"], status, self.clock() - started)
+
+    def _track_session(self, method: str, status: int, request_session: Optional[str],
+                       response_session: Optional[str]):
+        if request_session is None:
+            if response_session and status < 400:
+                self.metrics.session_opened(response_session)
+        elif status == 404 or (method == "DELETE" and status < 400):
+            self.metrics.session_closed(request_session)
+        else:
+            self.metrics.session_seen(request_session)
+
+
+def _header(headers, name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
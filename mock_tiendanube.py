@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Servidor mock de la API de Tienda Nube generado desde el catálogo
+
+Sirve todos los endpoints de api_database_complete.json (más los de
+api_database.json) con datos sintéticos deterministas, para medir el camino
+de ejecución (execute_endpoint, batch_get, paginación, espejo, reintentos)
+sin tocar tiendas reales:
+
+    - Datos: los campos salen de response_schema (api_database.json) o de
+      los parámetros de POST/PUT del recurso; cada tienda tiene sus propias
+      colecciones en memoria y las escrituras se reflejan en los GET
+    - Listados: page/per_page con x-total-count y Link, since_id, ids,
+      updated_at_min/created_at_min, fields y filtros por igualdad; una
+      página fuera de rango responde 404 "Last page is N"
+    - Rate limit: leaky bucket por tienda con los headers x-rate-limit-*
+      y 429 al desbordar (como la API real)
+    - Latencia: fija + jitter uniforme por request
+    - Errores: una fracción de requests responde 5xx; el header
+      `x-mock-status` fuerza el status de un request puntual
+
+Uso:
+    python mock_tiendanube.py --port 8100 --latency-ms 80 --error-rate 0.01
+    TIENDANUBE_API_BASE_URL=http://localhost:8100/v1 python app_complete.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from catalog import endpoint_key
+from catalog_pack import load_api_database
+from fast_json import FastJSONResponse, loads
+from pagination import MAX_PER_PAGE
+from rate_limiter import DEFAULT_CAPACITY, DEFAULT_LEAK_RATE, LeakyBucket
+
+BASE_DIR = Path(__file__).resolve().parent
+CATALOG_FILES = (BASE_DIR / "api_database_complete.json", BASE_DIR / "api_database.json")
+
+DEFAULT_PER_PAGE = 30
+# Parámetros de listado que no son filtros por campo
+LIST_PARAMS = {"page", "per_page", "since_id", "ids", "fields", "q", "language", "sort_by",
+               "created_at_min", "created_at_max", "updated_at_min", "updated_at_max"}
+# POST /{recurso}/{id}/{acción}: campo y valor que cambia la acción
+ACTIONS = {
+    "close": ("status", "closed"),
+    "reopen": ("status", "open"),
+    "cancel": ("status", "cancelled"),
+    "pay": ("payment_status", "paid"),
+    "fulfill": ("shipping_status", "fulfilled"),
+}
+# Valores posibles de los campos de estado
+STATUSES = {
+    "status": ("open", "closed", "cancelled"),
+    "payment_status": ("pending", "paid", "refunded"),
+    "shipping_status": ("unpacked", "unfulfilled", "fulfilled"),
+}
+# Momento de creación del item con id 1 (los siguientes, una hora después cada uno)
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+_PLACEHOLDER_RE = re.compile(r"\{([^}/]*)\}")
+
+
+def _timestamp(moment: datetime) -> str:
+    """Formato de fechas de la API: 2024-01-01T00:00:00+0000"""
+    return moment.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+
+def _now() -> str:
+    return _timestamp(datetime.now(timezone.utc))
+
+
+class MockConfig:
+    """Configuración del mock (ver MockConfig.from_env para las variables)"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, items: int = 100,
+                 nested_items: int = 3, error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (500, 502, 503), rate_limit: bool = True,
+                 bucket: int = DEFAULT_CAPACITY, leak_rate: float = DEFAULT_LEAK_RATE,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.items = items
+        self.nested_items = nested_items
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.rate_limit = rate_limit
+        self.bucket = bucket
+        self.leak_rate = leak_rate
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls) -> "MockConfig":
+        """
+        MOCK_LATENCY_MS, MOCK_JITTER_MS, MOCK_ITEMS, MOCK_NESTED_ITEMS,
+        MOCK_ERROR_RATE, MOCK_ERROR_STATUSES ('500,502,503'), MOCK_RATE_LIMIT,
+        MOCK_BUCKET, MOCK_LEAK, MOCK_SEED
+        """
+        defaults = cls()
+        seed = os.getenv("MOCK_SEED")
+        return cls(
+            latency_ms=float(os.getenv("MOCK_LATENCY_MS", defaults.latency_ms)),
+            jitter_ms=float(os.getenv("MOCK_JITTER_MS", defaults.jitter_ms)),
+            items=int(os.getenv("MOCK_ITEMS", defaults.items)),
+            nested_items=int(os.getenv("MOCK_NESTED_ITEMS", defaults.nested_items)),
+            error_rate=float(os.getenv("MOCK_ERROR_RATE", defaults.error_rate)),
+            error_statuses=tuple(int(s) for s in os.getenv("MOCK_ERROR_STATUSES", "500,502,503").split(",")
+                                 if s.strip()),
+            rate_limit=os.getenv("MOCK_RATE_LIMIT", "1").lower() not in ("0", "false", "no"),
+            bucket=int(os.getenv("MOCK_BUCKET", defaults.bucket)),
+            leak_rate=float(os.getenv("MOCK_LEAK", defaults.leak_rate)),
+            seed=int(seed) if seed else None,
+        )
+
+
+class Route:
+    """Un endpoint del catálogo compilado a regex"""
+
+    def __init__(self, resource: str, method: str, template: str, endpoint: Mapping[str, Any]):
+        self.resource = resource
+        self.method = method
+        self.template = template
+        self.endpoint = endpoint
+        self.placeholders = _PLACEHOLDER_RE.findall(template)
+        pattern = _PLACEHOLDER_RE.sub("([^/]+)", re.escape(template).replace(r"\{", "{").replace(r"\}", "}"))
+        self.regex = re.compile(f"^{pattern}$")
+        self.is_item = template.endswith("}")
+
+    def match(self, path: str) -> Optional[Dict[str, str]]:
+        found = self.regex.match(path)
+        return dict(zip(self.placeholders, found.groups())) if found else None
+
+
+def _value(name: str, spec: Mapping[str, Any], entity_id: int) -> Any:
+    """Valor sintético plausible para un campo según su tipo y nombre"""
+    kind = spec.get("type", "string")
+    if isinstance(kind, list):
+        if "null" in kind:
+            return None
+        kind = kind[0]
+    if "example" in spec:
+        return spec["example"]
+    if name.endswith("_at") or spec.get("format") == "iso8601":
+        return _timestamp(EPOCH + timedelta(hours=entity_id, minutes=30 if name == "updated_at" else 0))
+    if kind == "integer":
+        return entity_id if name == "number" else entity_id * 7 % 100
+    if kind == "number":
+        return round(entity_id * 1.5, 2)
+    if kind == "boolean":
+        return entity_id % 2 == 0
+    if kind == "array":
+        return []
+    if kind == "object":
+        if name in ("name", "description", "handle", "title"):
+            return {"es": f"{name} {entity_id}", "pt": f"{name} {entity_id}"}
+        return {}
+    if "email" in name:
+        return f"cliente{entity_id}@example.com"
+    if name in ("price", "total", "subtotal", "cost", "promotional_price", "total_spent", "value"):
+        return f"{entity_id * 10}.00"
+    if name in STATUSES:
+        return STATUSES[name][entity_id % len(STATUSES[name])]
+    return f"{name}-{entity_id}"
+
+
+class MockStore:
+    """
+    Datos en memoria de todas las tiendas
+
+    Las colecciones se identifican por su path concreto ('/products',
+    '/products/5/variants') y se generan la primera vez que se usan.
+    """
+
+    def __init__(self, fields: Mapping[str, Dict[str, Any]], config: MockConfig):
+        self.fields = fields
+        self.config = config
+        self._collections: Dict[Tuple[str, str], "OrderedDict[int, Dict[str, Any]]"] = {}
+        self._objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def entity(self, resource: str, entity_id: int, parent: Optional[Tuple[str, Any]] = None) -> Dict[str, Any]:
+        entity = {"id": entity_id}
+        for name, spec in self.fields.get(resource, {}).items():
+            if name != "id":
+                entity[name] = _value(name, spec, entity_id)
+        entity.setdefault("created_at", _timestamp(EPOCH + timedelta(hours=entity_id)))
+        entity.setdefault("updated_at", _timestamp(EPOCH + timedelta(hours=entity_id, minutes=30)))
+        if parent is not None:
+            entity[parent[0]] = parent[1]
+        if resource == "products":
+            entity["variants"] = [
+                {"id": entity_id * 10 + k, "product_id": entity_id, "sku": f"SKU-{entity_id * 10 + k}",
+                 "price": f"{entity_id * 10 + k}.00", "promotional_price": None, "stock": (entity_id + k) % 20,
+                 "values": [{"es": f"Opción {k}"}]}
+                for k in range(1, 3)]
+        return entity
+
+    def collection(self, store_id: str, path: str, resource: str,
+                   parent: Optional[Tuple[str, Any]] = None,
+                   parent_entity: Optional[Mapping[str, Any]] = None) -> "OrderedDict[int, Dict[str, Any]]":
+        key = (store_id, path)
+        items = self._collections.get(key)
+        if items is not None:
+            return items
+        items = self._collections[key] = OrderedDict()
+        embedded = parent_entity.get(path.rsplit("/", 1)[1]) if parent_entity else None
+        if isinstance(embedded, list) and embedded and isinstance(embedded[0], dict):
+            # /products/5/variants devuelve las variantes embebidas en el producto
+            for item in embedded:
+                items[int(item["id"])] = item
+        elif parent is not None:
+            base = int(parent[1]) * 100 if str(parent[1]).isdigit() else 0
+            for k in range(1, self.config.nested_items + 1):
+                items[base + k] = self.entity(resource, base + k, parent)
+        else:
+            for entity_id in range(1, self.config.items + 1):
+                items[entity_id] = self.entity(resource, entity_id)
+        return items
+
+    def object(self, store_id: str, path: str, resource: str) -> Dict[str, Any]:
+        key = (store_id, path)
+        if key not in self._objects:
+            self._objects[key] = self.entity(resource, 1)
+        return self._objects[key]
+
+    def reset(self):
+        self._collections.clear()
+        self._objects.clear()
+
+
+def _field_specs(database: Mapping[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Campos por recurso: response_schema de los GET y parámetros/request_schema de POST y PUT"""
+    fields: Dict[str, Dict[str, Any]] = {}
+    for resource, endpoints in database.get("endpoints", {}).items():
+        specs = fields.setdefault(resource, {})
+        for endpoint in endpoints:
+            method = (endpoint.get("method") or "").upper()
+            if method == "GET":
+                schema = endpoint.get("response_schema") or {}
+                schema = schema.get("items", schema) if schema.get("type") == "array" else schema
+                for name, spec in (schema.get("properties") or {}).items():
+                    specs.setdefault(name, spec)
+            elif method in ("POST", "PUT") and not _PLACEHOLDER_RE.search(endpoint.get("path", "").rsplit("/", 1)[0]):
+                schema = endpoint.get("request_schema") or {}
+                for name, spec in {**(endpoint.get("parameters") or {}), **(schema.get("properties") or {})}.items():
+                    if isinstance(spec, dict):
+                        specs.setdefault(name, spec)
+    return fields
+
+
+class MockTiendaNube:
+    """Rutas, datos, rate limit y fallos del mock"""
+
+    def __init__(self, databases: List[Mapping[str, Any]], config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.random = random.Random(self.config.seed)
+        self.routes: Dict[str, List[Route]] = {}
+        self._list_templates = set()
+        seen = set()
+        merged: Dict[str, Dict[str, Any]] = {}
+        for database in databases:
+            for resource, resource_fields in _field_specs(database).items():
+                for name, spec in resource_fields.items():
+                    merged.setdefault(resource, {}).setdefault(name, spec)
+            for resource, endpoints in database.get("endpoints", {}).items():
+                for endpoint in endpoints:
+                    key = endpoint_key(endpoint.get("method"), endpoint.get("path"))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    route = Route(resource, key[0], endpoint["path"], endpoint)
+                    self.routes.setdefault(route.method, []).append(route)
+        # Los paths literales ganan a los placeholders (/products/sku/{sku} antes que /products/{id}/...)
+        for routes in self.routes.values():
+            routes.sort(key=lambda r: (len(r.placeholders), -len(r.template)))
+        for route in self.routes.get("GET", []):
+            if route.is_item:
+                self._list_templates.add(_PLACEHOLDER_RE.sub("{}", route.template.rsplit("/", 1)[0]))
+        self.store = MockStore(merged, self.config)
+        self.buckets: Dict[str, LeakyBucket] = {}
+        self.requests = 0
+        self.throttled = 0
+        self.injected_errors = 0
+
+    @classmethod
+    def from_files(cls, paths=CATALOG_FILES, config: Optional[MockConfig] = None) -> "MockTiendaNube":
+        return cls([load_api_database(path)[0] for path in paths if Path(path).exists()], config)
+
+    @property
+    def endpoints(self) -> int:
+        return sum(len(routes) for routes in self.routes.values())
+
+    def resolve(self, method: str, path: str) -> Optional[Tuple[Route, Dict[str, str]]]:
+        for route in self.routes.get(method, []):
+            params = route.match(path)
+            if params is not None:
+                return route, params
+        return None
+
+    def _is_list(self, route: Route) -> bool:
+        parameters = route.endpoint.get("parameters") or {}
+        schema = route.endpoint.get("response_schema") or {}
+        return (schema.get("type") == "array" or bool({"page", "per_page", "since_id"} & set(parameters))
+                or _PLACEHOLDER_RE.sub("{}", route.template) in self._list_templates
+                or "}/" in route.template)
+
+    def _rate_limit_headers(self, bucket: LeakyBucket) -> Dict[str, str]:
+        level = bucket.level
+        return {
+            "x-rate-limit-limit": str(bucket.capacity),
+            "x-rate-limit-remaining": str(max(0, int(bucket.capacity - level))),
+            "x-rate-limit-reset": str(int(level / bucket.leak_rate * 1000)),
+        }
+
+    async def handle(self, store_id: str, request: Request) -> Response:
+        self.requests += 1
+        config = self.config
+        if config.latency_ms or config.jitter_ms:
+            await asyncio.sleep((config.latency_ms + self.random.uniform(0, config.jitter_ms)) / 1000.0)
+
+        headers: Dict[str, str] = {}
+        if config.rate_limit:
+            bucket = self.buckets.get(store_id)
+            if bucket is None:
+                bucket = self.buckets[store_id] = LeakyBucket(config.bucket, config.leak_rate)
+            if bucket.delay() > 0:
+                self.throttled += 1
+                return FastJSONResponse({"code": 429, "message": "Too Many Requests",
+                                         "description": "Rate limit exceeded"},
+                                        status_code=429, headers=self._rate_limit_headers(bucket))
+            bucket.take()
+            headers = self._rate_limit_headers(bucket)
+
+        forced = request.headers.get("x-mock-status")
+        if forced or (config.error_rate and self.random.random() < config.error_rate):
+            self.injected_errors += 1
+            status = int(forced) if forced else self.random.choice(config.error_statuses)
+            return FastJSONResponse({"code": status, "message": "Injected error"},
+                                    status_code=status, headers=headers)
+
+        method = request.method.upper()
+        path = "/" + request.path_params["path"].strip("/")
+        resolved = self.resolve(method, path)
+        if resolved is None:
+            return FastJSONResponse({"code": 404, "message": "Not Found", "description": f"{method} {path}"},
+                                    status_code=404, headers=headers)
+        route, path_params = resolved
+        body = await request.body()
+        payload = loads(body) if body else None
+        status, data, extra = self._dispatch(store_id, route, path, path_params, request, payload)
+        return FastJSONResponse(data, status_code=status, headers={**headers, **extra})
+
+    def _parent(self, store_id: str, path: str, route: Route, path_params: Mapping[str, str]):
+        """Colección de un path de item o listado; con el item padre si está anidada"""
+        segments = path.strip("/").split("/")
+        template = route.template.split("/")
+        if len(segments) < 3 or len(template) < 3 or not template[2].startswith("{"):
+            return None, None
+        # /products/{product_id}/variants...: el padre es el item /products/{product_id}
+        name = route.placeholders[0]
+        if name == "id":
+            name = f"{segments[0].rstrip('s')}_id"
+        parent_id = int(segments[1]) if segments[1].isdigit() else segments[1]
+        owner = self.store.collection(store_id, "/" + segments[0], segments[0])
+        return (name, parent_id), owner.get(parent_id)
+
+    def _dispatch(self, store_id: str, route: Route, path: str, path_params: Mapping[str, str],
+                  request: Request, payload: Any) -> Tuple[int, Any, Dict[str, str]]:
+        method = route.method
+        resource = route.resource
+        collection_path, _, last = path.rpartition("/")
+
+        if route.is_item and method in ("GET", "PUT", "PATCH", "DELETE"):
+            parent, parent_entity = self._parent(store_id, collection_path, route, path_params)
+            if collection_path.count("/") >= 2 and parent is None:
+                # /products/sku/{sku}: búsqueda por atributo en la colección de arriba
+                owner_path = collection_path.rsplit("/", 1)[0]
+                attribute = route.placeholders[-1]
+                items = self.store.collection(store_id, owner_path, resource)
+                found = next((item for item in items.values() if _has_value(item, attribute, last)), None)
+                if found is None:
+                    return 404, {"code": 404, "message": "Not Found"}, {}
+                return 200, found, {}
+            items = self.store.collection(store_id, collection_path or "/", resource, parent, parent_entity)
+            entity_id = int(last) if last.isdigit() else last
+            entity = items.get(entity_id)
+            if entity is None:
+                return 404, {"code": 404, "message": "Not Found", "description": f"{resource} {last}"}, {}
+            if method == "GET":
+                return 200, _project(entity, request.query_params.get("fields")), {}
+            if method == "DELETE":
+                del items[entity_id]
+                return 200, {}, {}
+            entity.update(payload if isinstance(payload, dict) else {})
+            entity["id"] = entity_id
+            entity["updated_at"] = _now()
+            return 200, entity, {}
+
+        if method == "GET":
+            if not self._is_list(route):
+                return 200, self.store.object(store_id, path, resource), {}
+            parent, parent_entity = self._parent(store_id, path, route, path_params)
+            items = self.store.collection(store_id, path, resource, parent, parent_entity)
+            return self._list(items, request)
+
+        if method == "POST" and self._is_list_path(route.template):
+            parent, parent_entity = self._parent(store_id, path, route, path_params)
+            items = self.store.collection(store_id, path, resource, parent, parent_entity)
+            entity_id = max((k for k in items if isinstance(k, int)), default=0) + 1
+            entity = self.store.entity(resource, entity_id, parent)
+            entity.update(payload if isinstance(payload, dict) else {})
+            entity.update({"id": entity_id, "created_at": _now(), "updated_at": _now()})
+            items[entity_id] = entity
+            return 201, entity, {}
+
+        owner_path, _, owner_id = collection_path.rpartition("/")
+        if method == "POST" and owner_id and route.template.rsplit("/", 1)[0].endswith("}"):
+            # POST /orders/{id}/close: acción sobre el item
+            items = self.store.collection(store_id, owner_path, resource)
+            entity = items.get(int(owner_id) if owner_id.isdigit() else owner_id)
+            if entity is None:
+                return 404, {"code": 404, "message": "Not Found"}, {}
+            if last in ACTIONS:
+                field, value = ACTIONS[last]
+                entity[field] = value
+            entity["updated_at"] = _now()
+            return 200, entity, {}
+
+        if method in ("PUT", "PATCH") and isinstance(payload, list):
+            # PATCH /products/stock-price: cambios por item (y variantes) de la colección de arriba
+            items = self.store.collection(store_id, collection_path or "/", resource)
+            updated = []
+            for change in payload:
+                entity = items.get(change.get("id")) if isinstance(change, dict) else None
+                if entity is not None:
+                    _merge(entity, change)
+                    entity["updated_at"] = _now()
+                    updated.append(entity)
+            return 200, updated, {}
+
+        if method in ("PUT", "PATCH"):
+            # PUT /store: objeto único
+            entity = self.store.object(store_id, path, resource)
+            entity.update(payload if isinstance(payload, dict) else {})
+            entity["updated_at"] = _now()
+            return 200, entity, {}
+
+        return 200, payload if payload is not None else {}, {}
+
+    def _is_list_path(self, template: str) -> bool:
+        return _PLACEHOLDER_RE.sub("{}", template) in self._list_templates
+
+    def _list(self, items: Mapping[Any, Dict[str, Any]], request: Request) -> Tuple[int, Any, Dict[str, str]]:
+        query = request.query_params
+        selected = list(items.values())
+        if query.get("ids"):
+            wanted = {i.strip() for i in query["ids"].split(",")}
+            selected = [item for item in selected if str(item["id"]) in wanted]
+        if query.get("since_id"):
+            since = int(query["since_id"])
+            selected = sorted((item for item in selected if item["id"] > since), key=lambda item: item["id"])
+        for name, op in (("created_at_min", "ge"), ("created_at_max", "le"),
+                         ("updated_at_min", "ge"), ("updated_at_max", "le")):
+            if query.get(name):
+                field = name.rsplit("_", 1)[0]
+                value = query[name]
+                selected = [item for item in selected
+                            if (str(item.get(field, "")) >= value if op == "ge" else str(item.get(field, "")) <= value)]
+        for name, value in query.items():
+            if name not in LIST_PARAMS:
+                selected = [item for item in selected
+                            if name not in item or isinstance(item[name], (dict, list)) or _same(item[name], value)]
+
+        per_page = min(max(1, int(query.get("per_page", DEFAULT_PER_PAGE))), MAX_PER_PAGE)
+        page = max(1, int(query.get("page", 1)))
+        total = len(selected)
+        last_page = max(1, -(-total // per_page))
+        if page > last_page:
+            return 404, {"code": 404, "message": "Not Found", "description": f"Last page is {last_page}"}, {}
+
+        fields = query.get("fields")
+        data = [_project(item, fields) for item in selected[(page - 1) * per_page:page * per_page]]
+        links = []
+        if page < last_page:
+            links.append(f'<{_page_url(request, page + 1)}>; rel="next"')
+        links.append(f'<{_page_url(request, last_page)}>; rel="last"')
+        return 200, data, {"x-total-count": str(total), "link": ", ".join(links)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"endpoints": self.endpoints, "requests": self.requests, "throttled_429": self.throttled,
+                "injected_errors": self.injected_errors}
+
+
+def _same(actual: Any, expected: str) -> bool:
+    if isinstance(actual, bool):
+        return str(actual).lower() == expected.lower()
+    return str(actual) == expected
+
+
+def _has_value(item: Mapping[str, Any], attribute: str, value: str) -> bool:
+    """El item (o alguna de sus listas embebidas, ej. variantes) tiene attribute == value"""
+    if str(item.get(attribute)) == value:
+        return True
+    return any(isinstance(child, dict) and str(child.get(attribute)) == value
+               for nested in item.values() if isinstance(nested, list) for child in nested)
+
+
+def _merge(entity: Dict[str, Any], change: Mapping[str, Any]):
+    """Aplicar un cambio; las listas de dicts con id se combinan elemento a elemento"""
+    for name, value in change.items():
+        current = entity.get(name)
+        if isinstance(value, list) and isinstance(current, list) and all(isinstance(v, dict) for v in value):
+            by_id = {item.get("id"): item for item in current if isinstance(item, dict)}
+            for item in value:
+                if item.get("id") in by_id:
+                    _merge(by_id[item["id"]], item)
+        else:
+            entity[name] = value
+
+
+def _project(item: Mapping[str, Any], fields: Optional[str]) -> Mapping[str, Any]:
+    if not fields:
+        return item
+    wanted = {name.strip() for name in fields.split(",")}
+    return {name: value for name, value in item.items() if name in wanted}
+
+
+def _page_url(request: Request, page: int) -> str:
+    params = dict(request.query_params)
+    params["page"] = str(page)
+    return f"{str(request.url).split('?', 1)[0]}?{urlencode(params)}"
+
+
+def create_app(mock: Optional[MockTiendaNube] = None) -> FastAPI:
+    """App ASGI del mock (la API queda bajo /v1/{store_id}/...)"""
+    mock = mock or MockTiendaNube.from_files(config=MockConfig.from_env())
+    app = FastAPI(title="Mock Tienda Nube API", docs_url=None, redoc_url=None, openapi_url=None)
+    app.state.mock = mock
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return mock.stats()
+
+    @app.post("/mock/reset")
+    async def mock_reset():
+        mock.store.reset()
+        mock.buckets.clear()
+        return {"reset": True}
+
+    @app.api_route("/v1/{store_id}/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    async def api(store_id: str, request: Request):
+        return await mock.handle(store_id, request)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock de la API de Tienda Nube")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, help="Latencia fija por request")
+    parser.add_argument("--jitter-ms", type=float, help="Latencia extra aleatoria (uniforme)")
+    parser.add_argument("--items", type=int, help="Items por colección")
+    parser.add_argument("--error-rate", type=float, help="Fracción de requests que responden 5xx")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Sin leaky bucket ni 429")
+    parser.add_argument("--seed", type=int, help="Semilla de latencia y errores")
+    args = parser.parse_args()
+
+    config = MockConfig.from_env()
+    for name in ("latency_ms", "jitter_ms", "items", "error_rate", "seed"):
+        if getattr(args, name) is not None:
+            setattr(config, name, getattr(args, name))
+    if args.no_rate_limit:
+        config.rate_limit = False
+
+    import uvicorn
+    uvicorn.run(create_app(MockTiendaNube.from_files(config=config)), host=args.host, port=args.port,
+                log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Auto-paginación de listados de la API de Tienda Nube
+
+Recorre todas las páginas de un endpoint GET con per_page=250 (máximo de
+la API) entregando cada página apenas llega, sin acumular el listado
+completo: la memoria queda acotada a las páginas pedidas por adelantado.
+
+Modos:
+    page      page=1,2,3... con hasta `prefetch` páginas en vuelo. Se
+              detiene con una página incompleta, con el 404 de "Last page
+              is N" o con el total de x-total-count.
+    since_id  since_id=<último id> secuencial (cada página depende de la
+              anterior); no se ve afectado por altas durante el recorrido.
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Mapping, Optional
+
+import httpx
+
+from fast_json import dumps
+from rate_limiter import PRIORITY_LOW
+from tiendanube_client import TiendaNubeClient
+
+MAX_PER_PAGE = 250
+
+PAGINATION_MODES = ("page", "since_id")
+
+# Listados que aceptan since_id aunque el catálogo no lo documente
+SINCE_ID_PATHS = frozenset({"/products", "/orders"})
+
+
+class PaginationError(Exception):
+    """La API respondió con error en medio del recorrido"""
+
+    def __init__(self, status_code: int, payload: Any, page: Optional[int] = None):
+        super().__init__(f"Error {status_code} en la página {page}: {payload}")
+        self.status_code = status_code
+        self.payload = payload
+        self.page = page
+
+
+def _payload(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _page_items(response: httpx.Response, page: Optional[int]) -> List[Dict[str, Any]]:
+    """Items de una página; un 200 que no es una lista de objetos con id corta el recorrido"""
+    try:
+        items = response.json()
+    except ValueError:
+        raise PaginationError(response.status_code, f"respuesta no JSON: {response.text[:200]!r}", page)
+    if not isinstance(items, list):
+        raise PaginationError(response.status_code, f"se esperaba una lista y llegó {type(items).__name__}", page)
+    if not all(isinstance(item, dict) and "id" in item for item in items):
+        raise PaginationError(response.status_code, "items sin id en la página", page)
+    return items
+
+
+def supports_since_id(path: str, endpoint: Mapping[str, Any]) -> bool:
+    """¿El endpoint del catálogo se puede recorrer con since_id?"""
+    return path in SINCE_ID_PATHS or "since_id" in (endpoint.get("parameters") or {})
+
+
+class Paginator:
+    """
+    Recorrido paginado de un endpoint de una tienda
+
+    Uso:
+        paginator = Paginator(client, store_id, "/products", access_token=token)
+        async for page in paginator.pages():
+            ...
+        paginator.items, paginator.page_count
+    """
+
+    def __init__(self, client: TiendaNubeClient, store_id: str, path: str, *,
+                 access_token: Optional[str] = None,
+                 params: Optional[Mapping[str, Any]] = None,
+                 per_page: int = MAX_PER_PAGE, prefetch: int = 2,
+                 mode: str = "page", max_pages: Optional[int] = None,
+                 priority: int = PRIORITY_LOW):
+        if mode not in PAGINATION_MODES:
+            raise ValueError(f"Modo de paginación inválido: {mode}")
+        params = {k: v for k, v in (params or {}).items() if k != "per_page"}
+        # Suelen llegar como texto desde la query: validarlos antes de empezar a transmitir
+        page = params.pop("page", None)
+        try:
+            self.start_page = max(1, int(page)) if page not in (None, "") else 1
+        except (TypeError, ValueError):
+            raise ValueError(f"page inválido: {page!r}")
+        since_id = params.pop("since_id", None)
+        try:
+            self.since_id = int(since_id) if since_id not in (None, "") else None
+        except (TypeError, ValueError):
+            raise ValueError(f"since_id inválido: {since_id!r}")
+        if mode == "page" and self.since_id is not None:
+            # En modo 'page' since_id es sólo un filtro más
+            params["since_id"] = self.since_id
+        self.client = client
+        self.store_id = store_id
+        self.path = path
+        self.access_token = access_token
+        self.params = params
+        self.per_page = max(1, min(per_page, MAX_PER_PAGE))
+        self.prefetch = max(1, prefetch)
+        self.mode = mode
+        self.max_pages = max_pages
+        self.priority = priority
+        self.page_count = 0
+        self.items = 0
+        self.total: Optional[int] = None
+
+    async def _get(self, params: Dict[str, Any]) -> httpx.Response:
+        return await self.client.request(self.store_id, "GET", self.path,
+                                         access_token=self.access_token,
+                                         params={**params, "per_page": self.per_page},
+                                         priority=self.priority)
+
+    def _accept(self, items: List[Any]) -> List[Any]:
+        self.page_count += 1
+        self.items += len(items)
+        return items
+
+    def pages(self) -> AsyncIterator[List[Any]]:
+        """Iterar las páginas (listas de items) en orden"""
+        if self.mode == "since_id":
+            return self._since_id_pages()
+        return self._numbered_pages()
+
+    async def __aiter__(self):
+        async for page in self.pages():
+            for item in page:
+                yield item
+
+    async def _numbered_pages(self) -> AsyncIterator[List[Any]]:
+        start = self.start_page
+        next_page = start
+        last_page: Optional[int] = None
+        pending: Deque = deque()
+
+        def can_schedule() -> bool:
+            if last_page is not None and next_page > last_page:
+                return False
+            return self.max_pages is None or next_page < start + self.max_pages
+
+        try:
+            while True:
+                while len(pending) < self.prefetch and can_schedule():
+                    task = asyncio.ensure_future(self._get({**self.params, "page": next_page}))
+                    pending.append((next_page, task))
+                    next_page += 1
+                if not pending:
+                    return
+
+                page, task = pending.popleft()
+                response = await task
+                if response.status_code == 404 and page > start:
+                    # "Last page is N": no hay más páginas
+                    return
+                if response.status_code >= 400:
+                    raise PaginationError(response.status_code, _payload(response), page)
+
+                total = response.headers.get("x-total-count")
+                if total and total.isdigit():
+                    self.total = int(total)
+                    last_page = max(start, math.ceil(self.total / self.per_page))
+
+                items = _page_items(response, page)
+                if items:
+                    yield self._accept(items)
+                if len(items) < self.per_page:
+                    return
+        finally:
+            # Corte anticipado (error, límite o cliente desconectado): no dejar pedidos colgando
+            for _, task in pending:
+                task.cancel()
+
+    async def _since_id_pages(self) -> AsyncIterator[List[Any]]:
+        since_id = self.since_id
+        while self.max_pages is None or self.page_count < self.max_pages:
+            params = dict(self.params)
+            if since_id is not None:
+                params["since_id"] = since_id
+            response = await self._get(params)
+            if response.status_code >= 400:
+                raise PaginationError(response.status_code, _payload(response), self.page_count + 1)
+
+            items = _page_items(response, self.page_count + 1)
+            if items:
+                yield self._accept(items)
+            if len(items) < self.per_page:
+                return
+            last_id = items[-1]["id"]
+            if since_id is not None and last_id <= since_id:
+                # El servidor ignoró since_id: seguir repetiría la misma página
+                raise PaginationError(response.status_code, "since_id no avanza", self.page_count)
+            since_id = last_id
+
+
+async def ndjson_chunks(paginator: Paginator) -> AsyncIterator[bytes]:
+    """Una línea JSON por item, un chunk por página; un error corta con {"error": ...}"""
+    try:
+        async for page in paginator.pages():
+            yield b"".join(dumps(item) + b"\n" for item in page)
+    except PaginationError as e:
+        yield dumps({"error": str(e), "status_code": e.status_code, "page": e.page}) + b"\n"
+    except httpx.HTTPError as e:
+        yield dumps({"error": f"Error llamando a Tienda Nube: {e!r}"}) + b"\n"
+
+
+async def sse_chunks(paginator: Paginator) -> AsyncIterator[bytes]:
+    """Eventos SSE `item` (un chunk por página) y un `end` o `error` final"""
+    try:
+        async for page in paginator.pages():
+            yield b"".join(b"event: item\ndata: " + dumps(item) + b"\n\n" for item in page)
+    except PaginationError as e:
+        yield b"event: error\ndata: " + dumps({"error": str(e), "status_code": e.status_code,
+                                                "page": e.page}) + b"\n\n"
+        return
+    except httpx.HTTPError as e:
+        yield b"event: error\ndata: " + dumps({"error": f"Error llamando a Tienda Nube: {e!r}"}) + b"\n\n"
+        return
+    yield b"event: end\ndata: " + dumps({"items": paginator.items, "pages": paginator.page_count,
+                                          "total": paginator.total}) + b"\n\n"
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Scheduler de rate limit por tienda para las llamadas salientes
+
+Tienda Nube limita cada tienda con un leaky bucket (40 requests de
+capacidad que se vacía a 2 requests/segundo) y lo informa en cada
+respuesta con los headers:
+
+    x-rate-limit-limit      capacidad del bucket
+    x-rate-limit-remaining  requests disponibles
+    x-rate-limit-reset      milisegundos hasta que el bucket se vacía
+
+Cada tienda tiene un bucket local sincronizado con esos headers y una cola
+con prioridad: en lugar de dejar que las llamadas fallen con 429, se
+espera el tiempo justo para que entren en el bucket.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+DEFAULT_CAPACITY = 40
+DEFAULT_LEAK_RATE = 2.0
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LeakyBucket:
+    """
+    Bucket local de una tienda
+
+    `level` son los requests que ocupan el bucket; se vacía a `leak_rate`
+    requests por segundo. Un request entra si level + 1 <= capacity.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, leak_rate: float = DEFAULT_LEAK_RATE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.leak_rate = leak_rate
+        self.clock = clock
+        self.level = 0.0
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+
+    def _leak(self):
+        now = self.clock()
+        self.level = max(0.0, self.level - (now - self._updated_at) * self.leak_rate)
+        self._updated_at = now
+
+    def delay(self) -> float:
+        """Segundos a esperar para que entre un request más"""
+        self._leak()
+        wait = max(0.0, self._blocked_until - self.clock())
+        overflow = self.level + 1 - self.capacity
+        if overflow > 0:
+            wait = max(wait, overflow / self.leak_rate)
+        return wait
+
+    def take(self):
+        """Ocupar un lugar del bucket"""
+        self._leak()
+        self.level += 1
+
+    def sync(self, limit: Optional[float], remaining: Optional[float],
+             reset_ms: Optional[float], in_flight: int = 0):
+        """
+        Ajustar el bucket con los headers de una respuesta
+
+        El servidor es la fuente de verdad (el token puede estar compartido
+        con otros procesos); se le suman los requests propios que todavía
+        no recibieron respuesta.
+        """
+        self._leak()
+        if limit:
+            self.capacity = int(limit)
+        if remaining is None:
+            return
+        server_level = max(0.0, self.capacity - remaining)
+        if reset_ms and server_level > 0:
+            # reset = tiempo hasta vaciar el bucket completo
+            self.leak_rate = max(server_level / (reset_ms / 1000.0), 0.1)
+        self.level = min(float(self.capacity), server_level + in_flight)
+
+    def block(self, seconds: float):
+        """No dejar salir requests durante `seconds` (ej. tras un 429)"""
+        self._leak()
+        self.level = float(self.capacity)
+        self._blocked_until = max(self._blocked_until, self.clock() + seconds)
+
+
+class StoreScheduler:
+    """Cola con prioridad y bucket de una tienda"""
+
+    def __init__(self, bucket: LeakyBucket):
+        self.bucket = bucket
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self.in_flight = 0
+        self.requests = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for entry in self._queue if not entry[2].done())
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> float:
+        """Esperar turno; devuelve los segundos esperados"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        waiter = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+        if self._pump_task is None or self._pump_task.done() or self._pump_task.get_loop() is not loop:
+            self._pump_task = loop.create_task(self._pump())
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Se canceló justo después de recibir el turno: no queda en vuelo
+                self.in_flight = max(0, self.in_flight - 1)
+            raise
+
+        waited = loop.time() - started
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 0.001:
+            self.delayed += 1
+        return waited
+
+    async def _pump(self):
+        """Dejar salir la cabeza de la cola cuando el bucket lo permita"""
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.done():
+                # Cancelado mientras esperaba
+                heapq.heappop(self._queue)
+                continue
+            delay = self.bucket.delay()
+            if delay > 0:
+                # Tras dormir se vuelve a mirar la cabeza: pudo entrar algo más prioritario
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._queue)
+            self.bucket.take()
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def release(self, status_code: Optional[int] = None,
+                headers: Optional[Mapping[str, str]] = None):
+        """Registrar la respuesta (o el fallo) de un request que tenía turno"""
+        self.in_flight = max(0, self.in_flight - 1)
+        headers = headers or {}
+        self.bucket.sync(
+            _header_float(headers, "x-rate-limit-limit"),
+            _header_float(headers, "x-rate-limit-remaining"),
+            _header_float(headers, "x-rate-limit-reset"),
+            in_flight=self.in_flight,
+        )
+        if status_code == 429:
+            self.throttled += 1
+            retry_after = _header_float(headers, "retry-after")
+            reset_ms = _header_float(headers, "x-rate-limit-reset")
+            if retry_after is not None:
+                self.bucket.block(retry_after)
+            elif reset_ms is not None:
+                self.bucket.block(reset_ms / 1000.0)
+            else:
+                self.bucket.block(1.0 / self.bucket.leak_rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "bucket_level": round(self.bucket.level, 2),
+            "bucket_capacity": self.bucket.capacity,
+            "leak_rate": round(self.bucket.leak_rate, 3),
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "throttled_429": self.throttled,
+            "wait_seconds_total": round(self.total_wait, 3),
+            "wait_seconds_max": round(self.max_wait, 3),
+            "wait_seconds_avg": round(self.total_wait / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+class RateLimitScheduler:
+    """
+    Scheduler de llamadas salientes con un bucket por tienda
+
+    Uso:
+        await scheduler.acquire(store_id, priority)
+        try:
+            response = await ...
+        finally:
+            scheduler.release(store_id, response.status_code, response.headers)
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, leak_rate: float = DEFAULT_LEAK_RATE):
+        self.capacity = capacity
+        self.leak_rate = leak_rate
+        self._stores: Dict[str, StoreScheduler] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateLimitScheduler":
+        """TIENDANUBE_RATE_LIMIT_BUCKET y TIENDANUBE_RATE_LIMIT_LEAK (req/s) iniciales"""
+        return cls(
+            capacity=int(os.getenv("TIENDANUBE_RATE_LIMIT_BUCKET", DEFAULT_CAPACITY)),
+            leak_rate=float(os.getenv("TIENDANUBE_RATE_LIMIT_LEAK", DEFAULT_LEAK_RATE)),
+        )
+
+    def store(self, store_id: str) -> StoreScheduler:
+        scheduler = self._stores.get(store_id)
+        if scheduler is None:
+            scheduler = self._stores[store_id] = StoreScheduler(LeakyBucket(self.capacity, self.leak_rate))
+        return scheduler
+
+    async def acquire(self, store_id: str, priority: int = PRIORITY_NORMAL) -> float:
+        return await self.store(store_id).acquire(priority)
+
+    def release(self, store_id: str, status_code: Optional[int] = None,
+                headers: Optional[Mapping[str, str]] = None):
+        self.store(store_id).release(status_code, headers)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Cola, espera y estado del bucket por tienda"""
+        return {store_id: scheduler.stats() for store_id, scheduler in self._stores.items()}
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Reintentos y circuit breaker por tienda para las llamadas salientes
+
+Reintentos (RetryPolicy):
+    - 429, 500, 502, 503 y 504 y errores de red se reintentan con backoff
+      exponencial con jitter completo, respetando Retry-After
+    - Sólo los métodos idempotentes (GET, PUT, DELETE) se reintentan tras
+      un 5xx o un timeout: un POST/PATCH pudo haberse aplicado. Un 429 o un
+      error de conexión (el request no llegó) se reintentan con cualquier
+      método
+    - Un Retry-After mayor que `max_retry_after` no se espera: se devuelve
+      la respuesta tal cual
+
+Circuit breaker (CircuitBreaker):
+    closed      los requests pasan; `failure_threshold` fallos seguidos
+                (5xx o error de red) lo abren
+    open        los requests fallan enseguida con CircuitOpenError durante
+                `reset_timeout` segundos
+    half_open   pasa un único request de prueba: si responde bien se
+                cierra, si falla se vuelve a abrir
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+import httpx
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Errores en los que el request no llegó al servidor
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Segundos de Retry-After (número o fecha HTTP); None si no hay o es inválido"""
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """La tienda tiene el circuito abierto: no se llamó a la API"""
+
+    def __init__(self, store_id: str, retry_in: float):
+        super().__init__(f"Circuito abierto para la tienda {store_id} (API degradada); "
+                         f"reintentar en {retry_in:.1f}s")
+        self.store_id = store_id
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+    """
+    Cuándo y cuánto esperar para reintentar
+
+    Args:
+        max_retries: Reintentos por llamada (0 = ninguno)
+        base_delay: Espera base del backoff (se duplica en cada intento)
+        max_delay: Tope del backoff
+        max_retry_after: Retry-After máximo que se está dispuesto a esperar
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 10.0,
+                 max_retry_after: float = 60.0, random: Callable[[], float] = random.random,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.random = random
+        self.sleep = sleep
+        self.retries = 0
+        self.gave_up = 0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """
+        TIENDANUBE_MAX_RETRIES, TIENDANUBE_RETRY_BASE_DELAY,
+        TIENDANUBE_RETRY_MAX_DELAY, TIENDANUBE_RETRY_AFTER_MAX
+        """
+        return cls(
+            max_retries=int(os.getenv("TIENDANUBE_MAX_RETRIES", 3)),
+            base_delay=float(os.getenv("TIENDANUBE_RETRY_BASE_DELAY", 0.5)),
+            max_delay=float(os.getenv("TIENDANUBE_RETRY_MAX_DELAY", 10.0)),
+            max_retry_after=float(os.getenv("TIENDANUBE_RETRY_AFTER_MAX", 60.0)),
+        )
+
+    @staticmethod
+    def retryable(method: str, response: Optional[httpx.Response] = None,
+                  error: Optional[BaseException] = None) -> bool:
+        """Si el resultado de un intento se puede reintentar sin riesgo"""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if error is not None:
+            return isinstance(error, _NOT_SENT_ERRORS) or (idempotent and isinstance(error, httpx.TransportError))
+        if response is None or response.status_code not in RETRY_STATUSES:
+            return False
+        return idempotent or response.status_code == 429
+
+    def next_delay(self, method: str, attempt: int, response: Optional[httpx.Response] = None,
+                   error: Optional[BaseException] = None) -> Optional[float]:
+        """
+        Segundos a esperar antes del intento `attempt + 1`; None = no reintentar
+
+        `attempt` es la cantidad de reintentos ya hechos.
+        """
+        if not self.retryable(method, response, error):
+            return None
+        if attempt >= self.max_retries:
+            self.gave_up += 1
+            return None
+        # Jitter completo: los reintentos de muchas sesiones no salen juntos
+        backoff = self.random() * min(self.max_delay, self.base_delay * (2 ** attempt))
+        retry_after = parse_retry_after(response.headers) if response is not None else None
+        if retry_after is None:
+            return backoff
+        if retry_after > self.max_retry_after:
+            self.gave_up += 1
+            return None
+        return retry_after + self.random() * self.base_delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {"max_retries": self.max_retries, "retries": self.retries, "gave_up": self.gave_up}
+
+
+class CircuitBreaker:
+    """Circuit breaker de una tienda"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> Optional[float]:
+        """None si el request puede salir; si no, segundos hasta el próximo intento de prueba"""
+        state = self.state
+        if state == CLOSED:
+            return None
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return None
+        self.rejected += 1
+        if state == OPEN:
+            return self._opened_at + self.reset_timeout - self.clock()
+        # Ya hay un request de prueba en vuelo
+        return min(1.0, self.reset_timeout)
+
+    def success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self._opened_at is None or self._probing:
+                self.opened += 1
+            self._opened_at = self.clock()
+        self._probing = False
+
+    def abandon(self):
+        """El request de prueba se canceló sin resultado"""
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures,
+                "opened": self.opened, "rejected": self.rejected}
+
+
+class CircuitBreakers:
+    """Un circuit breaker por tienda"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._stores: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreakers":
+        """TIENDANUBE_BREAKER_THRESHOLD (fallos seguidos) y TIENDANUBE_BREAKER_RESET (segundos)"""
+        return cls(
+            failure_threshold=int(os.getenv("TIENDANUBE_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("TIENDANUBE_BREAKER_RESET", 30.0)),
+        )
+
+    def store(self, store_id: str) -> CircuitBreaker:
+        breaker = self._stores.get(store_id)
+        if breaker is None:
+            breaker = self._stores[store_id] = CircuitBreaker(self.failure_threshold, self.reset_timeout,
+                                                              self.clock)
+        return breaker
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estado del circuito por tienda"""
+        return {store_id: breaker.stats() for store_id, breaker in self._stores.items()}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Caché de resultados acotada en memoria
+LRU limitada por cantidad de entradas y por bytes, con TTL opcional y
+contadores de aciertos, fallos y desalojos para dimensionarla en producción.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fast_json import dumps
+
+_MISSING = object()
+
+
+def _serialized_size(value: Any) -> int:
+    """Tamaño de un resultado medido como su JSON serializado"""
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(dumps(value))
+
+
+class ResultCache:
+    """
+    Caché LRU acotada por entradas y bytes
+
+    Args:
+        max_entries: Máximo de entradas (0 desactiva la caché)
+        max_bytes: Máximo de bytes sumando el tamaño de cada valor
+        ttl: Segundos de vida de cada entrada (None = sin vencimiento)
+        sizer: Función que mide un valor en bytes (default: su JSON)
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024,
+                 ttl: Optional[float] = None, sizer: Callable[[Any], int] = _serialized_size,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        self.sizer = sizer
+        self.clock = clock
+        # clave -> (valor, tamaño, vencimiento)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls, prefix: str, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024,
+                 ttl: float = 0) -> "ResultCache":
+        """Crear la caché leyendo <PREFIX>_MAX_ENTRIES, <PREFIX>_MAX_BYTES y <PREFIX>_TTL"""
+        return cls(
+            max_entries=int(os.getenv(f"{prefix}_MAX_ENTRIES", max_entries)),
+            max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", max_bytes)),
+            ttl=float(os.getenv(f"{prefix}_TTL", ttl)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtener un valor (lo marca como usado recientemente)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None, ttl: Optional[float] = None):
+        """Guardar un valor, desalojando los menos usados si hace falta (ttl pisa el de la caché)"""
+        if self.max_entries <= 0:
+            return
+        size = self.sizer(value) if size is None else size
+        if size > self.max_bytes:
+            # Un valor más grande que toda la caché no se guarda
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Devolver el valor cacheado o calcularlo y guardarlo"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para dimensionar la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
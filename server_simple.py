@@ -8,21 +8,97 @@ Compatible con Cursor y otros clientes MCP
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
+
+from catalog import SEARCH_RESULTS_LIMIT, Catalog, CatalogIndex, CatalogReloader, endpoint_summary
+from catalog_search import SearchIndex, normalize_query
+from result_cache import ResultCache
+
+DB_PATH = Path(__file__).parent / "api_database.json"
+
+# Herramientas cuyo resultado sólo depende del catálogo -> clave del payload pre-armado
+STATIC_TOOLS = {
+    "get_authentication_info": "authentication_info",
+    "get_multi_inventory_info": "multi_inventory_info",
+    "list_resources": "list_resources",
+}
 
 
 class TiendaNubeAPIServer:
     """Servidor MCP para la API de Tienda Nube"""
 
-    def __init__(self):
-        self.api_database = self._load_api_database()
+    def __init__(self, db_path: Path = DB_PATH):
+        self.db_path = Path(db_path)
+        self.catalog = self._load_catalog(self.db_path)
+        self.reloader = CatalogReloader(self.db_path, self._load_catalog, self._swap_catalog,
+                                         signature=self.catalog.signature)
+        # Caché de búsquedas (SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES, SEARCH_CACHE_TTL)
+        self.search_cache = ResultCache.from_env("SEARCH_CACHE")
         self.tools = self._get_tools()
 
-    def _load_api_database(self) -> dict:
-        """Cargar la base de datos de la API"""
-        db_path = Path(__file__).parent / "api_database.json"
-        with open(db_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+    def _load_catalog(self, db_path: Path) -> Catalog:
+        """Cargar la base de datos de la API con sus índices y respuestas estáticas"""
+        catalog = Catalog.load(db_path)
+        payloads = self._build_static_payloads(catalog.api_database)
+        catalog.responses["payloads"] = payloads
+        catalog.responses.update(self._build_static_responses(payloads))
+        return catalog
+
+    def _swap_catalog(self, catalog: Catalog):
+        self.catalog = catalog
+
+    def reload_if_changed(self) -> bool:
+        """Recargar el catálogo si cambió en disco (True si hubo recarga)"""
+        return self.reloader.check()
+
+    @property
+    def api_database(self) -> Dict[str, Any]:
+        return self.catalog.api_database
+
+    @property
+    def catalog_index(self) -> CatalogIndex:
+        return self.catalog.index
+
+    @property
+    def search_index(self) -> SearchIndex:
+        return self.catalog.search_index
+
+    @property
+    def _static_responses(self) -> Dict[str, str]:
+        return self.catalog.responses
+
+    @property
+    def _static_payloads(self) -> Dict[str, Any]:
+        return self.catalog.responses["payloads"]
+
+    @staticmethod
+    def _build_static_payloads(api_database: Dict[str, Any]) -> Dict[str, Any]:
+        """Armar una sola vez los resultados que sólo dependen de la base de datos"""
+        notes = api_database.get("important_notes", {})
+        resources = {
+            resource_name: len(endpoints)
+            for resource_name, endpoints in api_database.get("endpoints", {}).items()
+        }
+        return {
+            "authentication_info": notes.get("authentication", {}),
+            "multi_inventory_info": notes.get("multi_inventory", {}),
+            "list_resources": {
+                "resources": resources,
+                "total_endpoints": sum(resources.values())
+            },
+        }
+
+    @classmethod
+    def _build_static_responses(cls, payloads: Dict[str, Any]) -> Dict[str, str]:
+        """Serializar una sola vez los resultados estáticos para stdio"""
+        return {name: cls._as_text(payload) for name, payload in payloads.items()}
+
+    @staticmethod
+    def _as_text(result: Any) -> str:
+        """Texto de un resultado para stdio (los mensajes ya son texto)"""
+        if isinstance(result, str):
+            return result
+        return json.dumps(result, indent=2, ensure_ascii=False)
 
     def _get_tools(self) -> List[Dict[str, Any]]:
         """Definir todas las herramientas disponibles"""
@@ -168,161 +244,169 @@ class TiendaNubeAPIServer:
             }
         ]
 
-    def search_endpoint(self, resource: str, method: str = None, query: str = None) -> str:
+    # ===== RESULTADOS ESTRUCTURADOS (capa HTTP) =====
+    # Devuelven listas/diccionarios listos para serializar una sola vez, o
+    # un mensaje de texto cuando no hay resultados.
+
+    def _search_key(self, tool: str, query: Optional[str], *filters: Any) -> tuple:
+        """Clave de caché: herramienta + versión del catálogo + query normalizada + filtros"""
+        return (tool, self.catalog.version, normalize_query(query)) + filters
+
+    def search_endpoint_data(self, resource: str, method: str = None, query: str = None) -> Union[List[dict], str]:
         """Buscar endpoints"""
-        endpoints = self.api_database.get("endpoints", {}).get(resource, [])
-        
-        if not endpoints:
+        catalog = self.catalog
+        if not catalog.resource_endpoints(resource):
             return f"No se encontraron endpoints para el recurso '{resource}'"
         
-        results = []
-        for endpoint in endpoints:
-            if method and endpoint.get("method") != method.upper():
-                continue
-            
-            if query:
-                query_lower = query.lower()
-                if not (query_lower in endpoint.get("name", "").lower() or
-                       query_lower in endpoint.get("description", "").lower() or
-                       query_lower in endpoint.get("path", "").lower()):
-                    continue
-            
-            results.append({
-                "method": endpoint.get("method"),
-                "path": endpoint.get("path"),
-                "name": endpoint.get("name"),
-                "description": endpoint.get("description")
-            })
+        key = self._search_key("search_endpoint", query, resource, (method or "").upper())
+        results = self.search_cache.get_or_compute(key, lambda: [
+            endpoint_summary(endpoint)
+            for _, endpoint, _ in catalog.search_endpoints(query, resource=resource, method=method)
+        ])
         
         if not results:
             return f"No se encontraron endpoints que coincidan con los criterios"
         
-        return json.dumps(results, indent=2, ensure_ascii=False)
+        return results
 
-    def get_endpoint_details(self, resource: str, path: str, method: str = "GET") -> str:
+    def get_endpoint_details_data(self, resource: str, path: str, method: str = "GET") -> Union[dict, str]:
         """Obtener detalles de un endpoint"""
-        endpoints = self.api_database.get("endpoints", {}).get(resource, [])
-        
-        for endpoint in endpoints:
-            if endpoint.get("path") == path and endpoint.get("method") == method.upper():
-                return json.dumps(endpoint, indent=2, ensure_ascii=False)
+        match = self.catalog.lookup(method, path, resource)
+        if match:
+            return dict(match[1])
         
         return f"Endpoint no encontrado: {method} {path}"
 
-    def get_schema(self, resource: str, endpoint_type: str = "response") -> str:
+    def get_schema_data(self, resource: str, endpoint_type: str = "response") -> Union[List[dict], str]:
         """Obtener esquema"""
-        endpoints = self.api_database.get("endpoints", {}).get(resource, [])
-        
-        schemas = []
-        for endpoint in endpoints:
-            if endpoint_type == "request" and "request_schema" in endpoint:
-                schemas.append({
-                    "method": endpoint.get("method"),
-                    "path": endpoint.get("path"),
-                    "schema": endpoint.get("request_schema")
-                })
-            elif endpoint_type == "response" and "response_schema" in endpoint:
-                schemas.append({
-                    "method": endpoint.get("method"),
-                    "path": endpoint.get("path"),
-                    "schema": endpoint.get("response_schema")
-                })
+        schemas = self.catalog.schemas(resource, endpoint_type)
         
         if not schemas:
             return f"No se encontraron esquemas de {endpoint_type} para {resource}"
         
-        return json.dumps(schemas, indent=2, ensure_ascii=False)
+        return schemas
 
-    def search_documentation(self, query: str) -> str:
-        """Buscar en documentación"""
-        query_lower = query.lower()
+    def _search_documentation_results(self, query: str) -> List[dict]:
         results = []
         
-        for resource_name, endpoints in self.api_database.get("endpoints", {}).items():
-            for endpoint in endpoints:
-                if (query_lower in endpoint.get("name", "").lower() or
-                    query_lower in endpoint.get("description", "").lower() or
-                    query_lower in endpoint.get("path", "").lower()):
-                    results.append({
-                        "type": "endpoint",
-                        "resource": resource_name,
-                        "method": endpoint.get("method"),
-                        "path": endpoint.get("path"),
-                        "name": endpoint.get("name"),
-                        "description": endpoint.get("description")
-                    })
-        
-        for note_key, note_data in self.api_database.get("important_notes", {}).items():
-            if (query_lower in note_key.lower() or
-                query_lower in str(note_data).lower()):
+        # Igual que los front ends HTTP: sólo los mejores resultados
+        for document, score in self.catalog.search_documentation(query)[:SEARCH_RESULTS_LIMIT]:
+            if document["type"] == "note":
                 results.append({
                     "type": "note",
-                    "key": note_key,
-                    "data": note_data
+                    "key": document["key"],
+                    "data": document["data"]
                 })
+                continue
+            results.append({"type": "endpoint", "resource": document["resource"],
+                            **endpoint_summary(document["endpoint"])})
+        
+        return results
+
+    def search_documentation_data(self, query: str) -> Union[List[dict], str]:
+        """Buscar en documentación"""
+        results = self.search_cache.get_or_compute(
+            self._search_key("search_documentation", query),
+            lambda: self._search_documentation_results(query))
         
         if not results:
             return f"No se encontraron resultados para: {query}"
         
-        return json.dumps(results, indent=2, ensure_ascii=False)
+        return results
 
-    def get_code_example(self, resource: str, path: str, method: str = "GET", language: str = "python") -> str:
-        """Obtener ejemplo de código"""
-        endpoints = self.api_database.get("endpoints", {}).get(resource, [])
-        
-        for endpoint in endpoints:
-            if endpoint.get("path") == path and endpoint.get("method") == method.upper():
-                examples = endpoint.get("code_examples", {})
-                if language in examples:
-                    return examples[language]
-                else:
-                    available = list(examples.keys())
-                    return f"Ejemplo no disponible en {language}. Disponibles: {', '.join(available)}"
+    def get_code_example_data(self, resource: str, path: str, method: str = "GET", language: str = "python") -> str:
+        """Obtener ejemplo de código (el resultado ya es texto)"""
+        catalog = self.catalog
+        match = catalog.lookup(method, path, resource)
+        if match:
+            code = catalog.code_example(match[1], language)
+            if code is not None:
+                return code
+            available = catalog.code_example_languages(match[1])
+            return f"Ejemplo no disponible en {language}. Disponibles: {', '.join(available)}"
         
         return f"Endpoint no encontrado: {method} {path}"
 
-    def get_authentication_info(self) -> str:
+    def get_authentication_info_data(self) -> dict:
         """Obtener info de autenticación"""
-        auth_info = self.api_database.get("important_notes", {}).get("authentication", {})
-        return json.dumps(auth_info, indent=2, ensure_ascii=False)
+        return self._static_payloads["authentication_info"]
 
-    def get_multi_inventory_info(self) -> str:
+    def get_multi_inventory_info_data(self) -> dict:
         """Obtener info de multi-inventario"""
-        multi_inv = self.api_database.get("important_notes", {}).get("multi_inventory", {})
-        return json.dumps(multi_inv, indent=2, ensure_ascii=False)
+        return self._static_payloads["multi_inventory_info"]
 
-    def list_resources(self) -> str:
+    def list_resources_data(self) -> dict:
         """Listar recursos"""
-        resources = {}
-        for resource_name, endpoints in self.api_database.get("endpoints", {}).items():
-            resources[resource_name] = len(endpoints)
-        
-        return json.dumps({
-            "resources": resources,
-            "total_endpoints": sum(resources.values())
-        }, indent=2, ensure_ascii=False)
+        return self._static_payloads["list_resources"]
 
-    def process_tool_call(self, tool_name: str, tool_input: Dict[str, Any]) -> str:
-        """Procesar llamada a herramienta"""
+    def call_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Any:
+        """Procesar llamada a herramienta devolviendo el resultado estructurado"""
         if tool_name == "search_endpoint":
-            return self.search_endpoint(**tool_input)
+            return self.search_endpoint_data(**tool_input)
         elif tool_name == "get_endpoint_details":
-            return self.get_endpoint_details(**tool_input)
+            return self.get_endpoint_details_data(**tool_input)
         elif tool_name == "get_schema":
-            return self.get_schema(**tool_input)
+            return self.get_schema_data(**tool_input)
         elif tool_name == "search_documentation":
-            return self.search_documentation(**tool_input)
+            return self.search_documentation_data(**tool_input)
         elif tool_name == "get_code_example":
-            return self.get_code_example(**tool_input)
+            return self.get_code_example_data(**tool_input)
         elif tool_name == "get_authentication_info":
-            return self.get_authentication_info()
+            return self.get_authentication_info_data()
         elif tool_name == "get_multi_inventory_info":
-            return self.get_multi_inventory_info()
+            return self.get_multi_inventory_info_data()
         elif tool_name == "list_resources":
-            return self.list_resources()
+            return self.list_resources_data()
         else:
             return f"Herramienta desconocida: {tool_name}"
 
+    # ===== RESULTADOS EN TEXTO (stdio MCP) =====
+
+    def search_endpoint(self, resource: str, method: str = None, query: str = None) -> str:
+        """Buscar endpoints"""
+        key = self._search_key("search_endpoint:text", query, resource, (method or "").upper())
+        return self.search_cache.get_or_compute(
+            key, lambda: self._as_text(self.search_endpoint_data(resource, method, query)))
+
+    def get_endpoint_details(self, resource: str, path: str, method: str = "GET") -> str:
+        """Obtener detalles de un endpoint"""
+        return self._as_text(self.get_endpoint_details_data(resource, path, method))
+
+    def get_schema(self, resource: str, endpoint_type: str = "response") -> str:
+        """Obtener esquema"""
+        return self._as_text(self.get_schema_data(resource, endpoint_type))
+
+    def search_documentation(self, query: str) -> str:
+        """Buscar en documentación"""
+        result = self.search_documentation_data(query)
+        if isinstance(result, str):
+            # El mensaje incluye la query original: no se cachea por query normalizada
+            return result
+        return self.search_cache.get_or_compute(
+            self._search_key("search_documentation:text", query), lambda: self._as_text(result))
+
+    def get_code_example(self, resource: str, path: str, method: str = "GET", language: str = "python") -> str:
+        """Obtener ejemplo de código"""
+        return self.get_code_example_data(resource, path, method, language)
+
+    def get_authentication_info(self) -> str:
+        """Obtener info de autenticación"""
+        return self._static_responses["authentication_info"]
+
+    def get_multi_inventory_info(self) -> str:
+        """Obtener info de multi-inventario"""
+        return self._static_responses["multi_inventory_info"]
+
+    def list_resources(self) -> str:
+        """Listar recursos"""
+        return self._static_responses["list_resources"]
+
+    def process_tool_call(self, tool_name: str, tool_input: Dict[str, Any]) -> str:
+        """Procesar llamada a herramienta"""
+        if tool_name in STATIC_TOOLS:
+            return self._static_responses[STATIC_TOOLS[tool_name]]
+        return self._as_text(self.call_tool(tool_name, tool_input))
+
     def get_tools_definition(self) -> List[Dict[str, Any]]:
         """Obtener definición de herramientas"""
         return self.tools
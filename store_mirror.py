@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Espejo local (SQLite) de productos, variantes, órdenes y clientes
+
+Las consultas repetidas de los agentes ("productos con stock < 5",
+"órdenes de la última semana") se responden desde una base SQLite local
+en lugar de recorrer GET /products o GET /orders en cada pregunta.
+
+Sincronización:
+    completa      recorre todo el listado (since_id en /products y /orders,
+                  page/per_page en /customers) y al terminar borra las filas
+                  que ya no existen en la tienda
+    incremental   updated_at_min=<último updated_at visto>: sólo trae lo
+                  creado o modificado desde la sincronización anterior (las
+                  bajas se reflejan en la siguiente sincronización completa)
+
+Cada página se guarda apenas llega, así que la memoria no depende del
+tamaño de la tienda.
+
+Con varios workers (gunicorn con preload) la conexión SQLite se abre en
+cada proceso en su primer uso, nunca se hereda por fork. La sincronización
+periódica la corre un solo worker: el que toma el lock de
+`<STORE_MIRROR_PATH>.sync.lock` (si ese worker termina, lo toma otro en la
+vuelta siguiente). Con STORE_MIRROR_SYNC_INTERVAL=0 ningún worker
+sincroniza (ej. cuando lo hace un proceso aparte).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: un solo proceso
+    fcntl = None
+
+from pagination import Paginator, supports_since_id
+from tiendanube_client import TiendaNubeClient
+
+logger = logging.getLogger(__name__)
+
+# Recurso sincronizable -> path del listado
+SYNC_RESOURCES = {
+    "products": "/products",
+    "orders": "/orders",
+    "customers": "/customers",
+}
+
+# Columnas consultables de cada tabla (además de `data`, el JSON completo)
+MIRROR_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "products": ("id", "name", "handle", "published", "created_at", "updated_at"),
+    "variants": ("id", "product_id", "sku", "price", "promotional_price", "stock",
+                 "created_at", "updated_at"),
+    "orders": ("id", "number", "status", "payment_status", "shipping_status", "total",
+               "currency", "customer_id", "created_at", "updated_at"),
+    "customers": ("id", "name", "email", "total_spent", "created_at", "updated_at"),
+}
+
+# Operadores de filtro: {"stock__lt": 5}
+FILTER_OPERATORS = {
+    "eq": "=", "ne": "!=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">=", "like": "LIKE",
+}
+
+MAX_QUERY_LIMIT = 1000
+
+# Segundos entre sincronizaciones completas de run_periodic_sync (las incrementales no ven los borrados)
+DEFAULT_FULL_SYNC_INTERVAL = 86400.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    store_id TEXT NOT NULL, id INTEGER NOT NULL, name TEXT, handle TEXT, published INTEGER,
+    created_at TEXT, updated_at TEXT, synced_at REAL NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (store_id, id)
+);
+CREATE TABLE IF NOT EXISTS variants (
+    store_id TEXT NOT NULL, id INTEGER NOT NULL, product_id INTEGER NOT NULL, sku TEXT,
+    price REAL, promotional_price REAL, stock INTEGER, created_at TEXT, updated_at TEXT,
+    synced_at REAL NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (store_id, id)
+);
+CREATE INDEX IF NOT EXISTS variants_product ON variants (store_id, product_id);
+CREATE INDEX IF NOT EXISTS variants_stock ON variants (store_id, stock);
+CREATE TABLE IF NOT EXISTS orders (
+    store_id TEXT NOT NULL, id INTEGER NOT NULL, number INTEGER, status TEXT,
+    payment_status TEXT, shipping_status TEXT, total REAL, currency TEXT, customer_id INTEGER,
+    created_at TEXT, updated_at TEXT, synced_at REAL NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (store_id, id)
+);
+CREATE INDEX IF NOT EXISTS orders_created ON orders (store_id, created_at);
+CREATE TABLE IF NOT EXISTS customers (
+    store_id TEXT NOT NULL, id INTEGER NOT NULL, name TEXT, email TEXT, total_spent REAL,
+    created_at TEXT, updated_at TEXT, synced_at REAL NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (store_id, id)
+);
+CREATE INDEX IF NOT EXISTS customers_email ON customers (store_id, email);
+CREATE TABLE IF NOT EXISTS sync_state (
+    store_id TEXT NOT NULL, resource TEXT NOT NULL, cursor TEXT, last_sync REAL,
+    last_full_sync REAL, items INTEGER,
+    PRIMARY KEY (store_id, resource)
+);
+"""
+
+
+def _text(value: Any) -> Optional[str]:
+    """Campos multi-idioma ({'es': ..., 'pt': ...}) como un solo texto"""
+    if isinstance(value, dict):
+        return value.get("es") or next((v for v in value.values() if v), None)
+    return value
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _variant_stock(variant: Mapping[str, Any]) -> Optional[int]:
+    """Stock de la variante: `stock` o la suma de inventory_levels (None = infinito)"""
+    if variant.get("stock") is not None:
+        return int(variant["stock"])
+    levels = [level.get("stock") for level in variant.get("inventory_levels") or []]
+    if levels and all(stock is not None for stock in levels):
+        return int(sum(levels))
+    return None
+
+
+def _dumps(item: Any) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+
+
+class StoreMirror:
+    """
+    Base SQLite con los datos de una o más tiendas
+
+    Los métodos son sincrónicos y seguros entre hilos; desde código async
+    se llaman con asyncio.to_thread (ver sync_resource). La conexión es
+    por proceso y se abre en el primer uso.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Conexiones heredadas de otro proceso: no se usan ni se cierran
+        self._inherited: List[sqlite3.Connection] = []
+        self._sync_lock_file = None
+
+    @classmethod
+    def from_env(cls) -> Optional["StoreMirror"]:
+        """Espejo en STORE_MIRROR_PATH (None si no está configurado)"""
+        path = os.getenv("STORE_MIRROR_PATH")
+        return cls(path) if path else None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Conexión de este proceso (una abierta antes de un fork no se comparte)"""
+        if self._pid != os.getpid():
+            with self._open_lock:
+                if self._pid != os.getpid():
+                    if self._connection is not None:
+                        self._inherited.append(self._connection)
+                    self._connection = self._connect()
+                    self._pid = os.getpid()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        return conn
+
+    def acquire_sync_lock(self) -> bool:
+        """
+        Tomar (sin esperar) el lock de la sincronización periódica
+
+        Lo conserva el proceso hasta close() o hasta terminar; True si este
+        proceso es el que sincroniza.
+        """
+        if self._sync_lock_file is not None:
+            return True
+        if self.path == ":memory:" or fcntl is None:
+            # Base en memoria: es de este proceso
+            return True
+        lock_file = open(f"{self.path}.sync.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._sync_lock_file = lock_file
+        return True
+
+    def close(self):
+        if self._sync_lock_file is not None:
+            self._sync_lock_file.close()
+            self._sync_lock_file = None
+        with self._open_lock:
+            if self._connection is not None and self._pid == os.getpid():
+                with self._lock:
+                    self._connection.close()
+            self._connection = None
+            self._pid = None
+
+    # ----- escritura -----
+
+    def _product_rows(self, store_id: str, product: Mapping[str, Any], synced_at: float):
+        row = (store_id, product["id"], _text(product.get("name")), _text(product.get("handle")),
+               int(bool(product.get("published"))), product.get("created_at"),
+               product.get("updated_at"), synced_at, _dumps(product))
+        variants = [
+            (store_id, variant["id"], product["id"], variant.get("sku"), _number(variant.get("price")),
+             _number(variant.get("promotional_price")), _variant_stock(variant),
+             variant.get("created_at"), variant.get("updated_at"), synced_at, _dumps(variant))
+            for variant in product.get("variants") or []
+        ]
+        return row, variants
+
+    def upsert(self, store_id: str, resource: str, items: Iterable[Mapping[str, Any]],
+               synced_at: Optional[float] = None) -> int:
+        """Guardar (insertar o reemplazar) una página de items; devuelve la cantidad"""
+        synced_at = time.time() if synced_at is None else synced_at
+        store_id = str(store_id)
+        items = list(items)
+        with self._lock, self._conn:
+            if resource == "products":
+                products, variants = [], []
+                for product in items:
+                    row, product_variants = self._product_rows(store_id, product, synced_at)
+                    products.append(row)
+                    variants.extend(product_variants)
+                self._conn.executemany("INSERT OR REPLACE INTO products VALUES (?,?,?,?,?,?,?,?,?)", products)
+                # Las variantes borradas de un producto desaparecen con él
+                self._conn.executemany("DELETE FROM variants WHERE store_id = ? AND product_id = ?",
+                                       [(store_id, row[1]) for row in products])
+                self._conn.executemany("INSERT OR REPLACE INTO variants VALUES (?,?,?,?,?,?,?,?,?,?,?)", variants)
+            elif resource == "orders":
+                self._conn.executemany("INSERT OR REPLACE INTO orders VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", [
+                    (store_id, order["id"], order.get("number"), order.get("status"),
+                     order.get("payment_status"), order.get("shipping_status"),
+                     _number(order.get("total")), order.get("currency"),
+                     (order.get("customer") or {}).get("id"), order.get("created_at"),
+                     order.get("updated_at"), synced_at, _dumps(order))
+                    for order in items])
+            elif resource == "customers":
+                self._conn.executemany("INSERT OR REPLACE INTO customers VALUES (?,?,?,?,?,?,?,?,?)", [
+                    (store_id, customer["id"], customer.get("name"), customer.get("email"),
+                     _number(customer.get("total_spent")), customer.get("created_at"),
+                     customer.get("updated_at"), synced_at, _dumps(customer))
+                    for customer in items])
+            else:
+                raise ValueError(f"Recurso no sincronizable: {resource}")
+        return len(items)
+
+    def delete(self, store_id: str, resource: str, ids: Iterable[int]) -> int:
+        """Borrar items por id (los productos se llevan sus variantes)"""
+        params = [(str(store_id), int(entity_id)) for entity_id in ids]
+        if resource not in SYNC_RESOURCES:
+            raise ValueError(f"Recurso no sincronizable: {resource}")
+        with self._lock, self._conn:
+            if resource == "products":
+                self._conn.executemany("DELETE FROM variants WHERE store_id = ? AND product_id = ?", params)
+            return sum(self._conn.execute(f"DELETE FROM {resource} WHERE store_id = ? AND id = ?", p).rowcount
+                       for p in params)
+
+    def prune(self, store_id: str, resource: str, before: float) -> int:
+        """Borrar lo que una sincronización completa iniciada en `before` no volvió a ver"""
+        tables = ("products", "variants") if resource == "products" else (resource,)
+        deleted = 0
+        with self._lock, self._conn:
+            for table in tables:
+                deleted += self._conn.execute(
+                    f"DELETE FROM {table} WHERE store_id = ? AND synced_at < ?",
+                    (str(store_id), before)).rowcount
+        return deleted
+
+    def get_state(self, store_id: str, resource: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sync_state WHERE store_id = ? AND resource = ?",
+                                     (str(store_id), resource)).fetchone()
+        return dict(row) if row else None
+
+    def set_state(self, store_id: str, resource: str, cursor: Optional[str], full: bool):
+        now = time.time()
+        with self._lock, self._conn:
+            items = self._conn.execute(f"SELECT COUNT(*) FROM {resource} WHERE store_id = ?",
+                                       (str(store_id),)).fetchone()[0]
+            previous = self._conn.execute(
+                "SELECT last_full_sync FROM sync_state WHERE store_id = ? AND resource = ?",
+                (str(store_id), resource)).fetchone()
+            last_full = now if full else (previous[0] if previous else None)
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?,?,?,?,?,?)",
+                               (str(store_id), resource, cursor, now, last_full, items))
+
+    # ----- consultas -----
+
+    def query(self, store_id: str, resource: str, where: Optional[Mapping[str, Any]] = None,
+              order_by: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+        """
+        Consultar el espejo con filtros estructurados
+
+        Args:
+            resource: products, variants, orders o customers
+            where: {"columna": valor} o {"columna__op": valor} con op en
+                eq, ne, lt, lte, gt, gte, like, in, null (ej. {"stock__lt": 5})
+            order_by: Columna, con '-' adelante para orden descendente
+            limit: Máximo de items (hasta MAX_QUERY_LIMIT)
+
+        Raises:
+            ValueError: recurso, columna u operador inválidos
+        """
+        columns = MIRROR_COLUMNS.get(resource)
+        if columns is None:
+            raise ValueError(f"Recurso inválido: {resource}. Opciones: {', '.join(MIRROR_COLUMNS)}")
+
+        clauses, params = ["store_id = ?"], [str(store_id)]
+        for key, value in (where or {}).items():
+            column, _, op = key.partition("__")
+            op = op or "eq"
+            if column not in columns:
+                raise ValueError(f"Columna inválida para {resource}: {column}. Opciones: {', '.join(columns)}")
+            if op == "in":
+                values = list(value) if isinstance(value, (list, tuple)) else [value]
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            elif op == "null":
+                clauses.append(f"{column} IS {'' if value else 'NOT '}NULL")
+            elif op in FILTER_OPERATORS:
+                clauses.append(f"{column} {FILTER_OPERATORS[op]} ?")
+                params.append(int(value) if isinstance(value, bool) else value)
+            else:
+                raise ValueError(f"Operador inválido: {op}")
+
+        order = "id"
+        if order_by:
+            column = order_by.lstrip("-")
+            if column not in columns:
+                raise ValueError(f"Columna inválida para ordenar: {column}")
+            order = f"{column} {'DESC' if order_by.startswith('-') else 'ASC'}, id"
+
+        limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+        sql_where = " AND ".join(clauses)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {resource} WHERE {sql_where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT data FROM {resource} WHERE {sql_where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, int(offset)]).fetchall()
+        return {
+            "resource": resource,
+            "total": total,
+            "count": len(rows),
+            "items": [json.loads(row[0]) for row in rows],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Filas por tabla y estado de sincronización por tienda"""
+        with self._lock:
+            counts = {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in MIRROR_COLUMNS}
+            states = [dict(row) for row in self._conn.execute("SELECT * FROM sync_state")]
+        return {"path": self.path, "rows": counts, "sync": states}
+
+
+async def sync_resource(mirror: StoreMirror, client: TiendaNubeClient, store_id: str, resource: str, *,
+                        access_token: Optional[str] = None, full: bool = False,
+                        full_every: Optional[float] = None, prefetch: int = 2) -> Dict[str, Any]:
+    """
+    Sincronizar un recurso de una tienda (completa o incremental)
+
+    La incremental se hace con updated_at_min desde el último updated_at
+    visto y no se entera de lo borrado en la tienda; se hace la completa
+    (que además borra del espejo lo que ya no está) sin sincronización
+    previa o, con `full_every`, si la última completa tiene más de esos
+    segundos.
+    """
+    if resource not in SYNC_RESOURCES:
+        raise ValueError(f"Recurso no sincronizable: {resource}. Opciones: {', '.join(SYNC_RESOURCES)}")
+    path = SYNC_RESOURCES[resource]
+    state = await asyncio.to_thread(mirror.get_state, store_id, resource)
+    cursor = state["cursor"] if state else None
+    full = full or cursor is None
+    if full_every and state and (state["last_full_sync"] or 0) <= time.time() - full_every:
+        full = True
+
+    if full:
+        mode = "since_id" if supports_since_id(path, {}) else "page"
+        params: Dict[str, Any] = {}
+    else:
+        mode, params = "page", {"updated_at_min": cursor}
+
+    started = time.time()
+    paginator = Paginator(client, store_id, path, access_token=access_token, params=params,
+                          prefetch=prefetch, mode=mode)
+    async for page in paginator.pages():
+        await asyncio.to_thread(mirror.upsert, store_id, resource, page, started)
+        cursor = max([cursor or ""] + [item.get("updated_at") or "" for item in page]) or None
+
+    pruned = await asyncio.to_thread(mirror.prune, store_id, resource, started) if full else 0
+    await asyncio.to_thread(mirror.set_state, store_id, resource, cursor, full)
+    return {
+        "resource": resource,
+        "mode": "full" if full else "incremental",
+        "items": paginator.items,
+        "pages": paginator.page_count,
+        "pruned": pruned,
+        "cursor": cursor,
+        "seconds": round(time.time() - started, 3),
+    }
+
+
+async def sync_store(mirror: StoreMirror, client: TiendaNubeClient, store_id: str, *,
+                     access_token: Optional[str] = None, resources: Optional[List[str]] = None,
+                     full: bool = False, full_every: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Sincronizar varios recursos de una tienda (uno tras otro, comparten el rate limit)"""
+    results = []
+    for resource in resources or list(SYNC_RESOURCES):
+        results.append(await sync_resource(mirror, client, store_id, resource,
+                                           access_token=access_token, full=full, full_every=full_every))
+    return results
+
+
+async def run_periodic_sync(mirror: StoreMirror, client: TiendaNubeClient, store_id: str,
+                            access_token: Optional[str], interval: float,
+                            leader: Optional[Callable[[], bool]] = None,
+                            full_every: Optional[float] = DEFAULT_FULL_SYNC_INTERVAL):
+    """
+    Sincronización cada `interval` segundos
+
+    Incremental desde el último cursor guardado, también después de un
+    reinicio. Un recurso sin sincronizar, o cuya última completa tiene más
+    de `full_every` segundos (None o 0 = sólo la primera), se sincroniza
+    completo para borrar del espejo lo eliminado en la tienda.
+
+    Con `leader` (ej. mirror.acquire_sync_lock) sólo sincroniza mientras
+    devuelva True; si no, vuelve a intentarlo en la vuelta siguiente.
+    """
+    while True:
+        if leader is not None and not leader():
+            await asyncio.sleep(interval)
+            continue
+        try:
+            for result in await sync_store(mirror, client, store_id, access_token=access_token,
+                                           full_every=full_every):
+                logger.info(f"🔄 Espejo {store_id}/{result['resource']}: {result['mode']}, "
+                            f"{result['items']} items en {result['seconds']}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error sincronizando el espejo de {store_id}: {e!r}")
+        await asyncio.sleep(interval)
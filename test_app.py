@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Pruebas del servidor HTTP (app.py) con TestClient
+No requieren un servidor corriendo
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from fast_json import dumps
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app.app)
+
+
+class TestToolEndpoints:
+    """Pruebas de resultados estructurados de las herramientas"""
+
+    def test_search_endpoint(self, client):
+        data = client.post("/tools/search_endpoint",
+                           params={"resource": "products", "query": "stock"}).json()
+        assert data["tool"] == "search_endpoint"
+        assert data["result"][0]["path"] == "/products/stock-price"
+
+    def test_result_matches_stdio_text(self, client):
+        params = {"resource": "orders", "path": "/orders/{id}", "method": "GET"}
+        data = client.post("/tools/get_endpoint_details", params=params).json()
+        assert data["result"] == json.loads(app.mcp_server.get_endpoint_details(**params))
+
+    def test_not_found_is_message(self, client):
+        response = client.post("/tools/get_endpoint_details",
+                               params={"resource": "products", "path": "/nada"})
+        assert response.status_code == 200
+        assert response.json()["result"] == "Endpoint no encontrado: GET /nada"
+
+    def test_search_documentation_capped(self, client):
+        # Una query en blanco lista todo el catálogo
+        data = client.post("/tools/search_documentation", params={"query": " "}).json()
+        assert len(data["result"]) == 20
+        data = client.post("/tools/search_documentation", params={"query": "de la"}).json()
+        assert data["result"] == "No se encontraron resultados para: de la"
+
+    def test_static_tool(self, client):
+        data = client.post("/tools/list_resources").json()
+        assert data["result"]["total_endpoints"] == app.mcp_server.catalog.total_endpoints
+
+    def test_info_prebuilt(self, client):
+        response = client.get("/info")
+        assert response.content == app.mcp_server.catalog.responses["http_info"]
+        assert response.json()["tools"] == len(app.mcp_server.tools)
+
+
+class TestFastJson:
+    """Pruebas de la serialización rápida"""
+
+    def test_dumps_mappings(self):
+        endpoint = app.mcp_server.catalog.lookup("GET", "/products")[1]
+
+        class Wrapper(dict):
+            pass
+
+        assert json.loads(dumps({"e": endpoint, "w": Wrapper(a=1), "ñ": "á"})) == {
+            "e": dict(endpoint), "w": {"a": 1}, "ñ": "á"}
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Pruebas del servidor HTTP completo (app_complete.py) con TestClient
+No requieren un servidor corriendo
+"""
+
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app_complete
+from catalog_pack import pack_path_for, write_catalog_pack
+from resilience import CircuitBreakers
+from result_cache import ResultCache
+from store_mirror import StoreMirror
+from tiendanube_client import ClientConfig, TiendaNubeClient
+from upstream_cache import UpstreamCache
+from webhook_ingest import SIGNATURE_HEADER, WebhookIngestor, sign
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app_complete.app)
+
+
+def _total_endpoints():
+    return app_complete.CATALOG.total_endpoints
+
+
+class TestStaticResponses:
+    """Pruebas de respuestas pre-serializadas"""
+
+    def test_info(self, client):
+        response = client.get("/info")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["endpoints"] == _total_endpoints()
+        assert data["resources_list"] == list(app_complete.CATALOG.api_database["endpoints"])
+
+    def test_ready(self, client):
+        data = client.get("/ready").json()
+        assert data["status"] == "ready"
+        assert data["endpoints"] == _total_endpoints()
+        assert data["catalog"]["version"] == app_complete.CATALOG.version
+        assert "timestamp" in data
+
+    def test_root(self, client):
+        data = client.get("/").json()
+        assert data["mcp_endpoint"] == "/mcp"
+        assert data["endpoints"]["health"] == "/health"
+
+    def test_list_resources(self, client):
+        data = client.post("/tools/list_resources").json()
+        assert data["total_endpoints"] == _total_endpoints()
+        assert data["total_resources"] == len(data["resources"])
+        products = next(r for r in data["resources"] if r["resource"] == "products")
+        assert {"method": "GET", "path": "/products", "name": "List Products"} in products["endpoints"]
+
+    def test_authentication_info(self, client):
+        data = client.post("/tools/get_authentication_info").json()
+        assert data["authentication_type"] == "OAuth 2.0"
+
+    def test_multi_inventory_info(self, client):
+        data = client.post("/tools/get_multi_inventory_info").json()
+        assert "PATCH /products/stock-price" in data["endpoints_affected"]
+
+    def test_payload_is_prebuilt(self, client):
+        assert client.get("/info").content == app_complete.CATALOG.responses["info"]
+
+
+class TestLookupTools:
+    """Pruebas de herramientas de consulta"""
+
+    def test_get_endpoint_details(self, client):
+        data = client.post("/tools/get_endpoint_details",
+                           params={"path": "/products/{id}", "method": "GET"}).json()
+        assert data["found"] is True
+        assert data["resource"] == "products"
+
+    def test_get_endpoint_details_missing(self, client):
+        data = client.post("/tools/get_endpoint_details",
+                           params={"path": "/nada", "method": "GET"}).json()
+        assert data["found"] is False
+
+    def test_get_schema(self, client):
+        data = client.post("/tools/get_schema", params={"path": "/products", "method": "GET"}).json()
+        assert "since_id" in data["parameters"]
+
+    def test_get_code_example(self, client):
+        data = client.post("/tools/get_code_example",
+                           params={"path": "/orders", "method": "GET", "language": "javascript"}).json()
+        assert "fetch(url, options)" in data["code"]
+
+    def test_search_endpoint_ranked(self, client):
+        data = client.post("/tools/search_endpoint", params={"query": "categoría"}).json()
+        assert data["results_count"] > 0
+        assert data["results"][0]["path"].startswith("/categories")
+
+    def test_search_results_cached(self, client):
+        cache = app_complete.SEARCH_CACHE
+        cache.clear()
+        first = client.post("/tools/search_endpoint", params={"query": "Categoría"}).json()
+        hits = cache.hits
+        again = client.post("/tools/search_endpoint", params={"query": "categoria"}).json()
+        assert cache.hits == hits + 1
+        assert again["results"] == first["results"]
+        assert again["query"] == "categoria"
+        assert client.get("/ready").json()["search_cache"]["entries"] == 1
+
+    def test_search_documentation(self, client):
+        data = client.post("/tools/search_documentation", params={"query": "order pay"}).json()
+        assert data["results"][0]["path"] == "/orders/{id}/pay"
+
+
+class TestCatalogReload:
+    """Pruebas del reemplazo atómico del catálogo"""
+
+    def test_swap_is_visible_to_handlers(self, client):
+        current = app_complete.CATALOG
+        replacement = app_complete._build_catalog(current.source)
+        replacement.responses["info"] = b'{"swapped":true}'
+        try:
+            app_complete._swap_catalog(replacement)
+            assert client.get("/info").json() == {"swapped": True}
+            assert client.get("/ready").json()["catalog"]["loaded_at"] == replacement.loaded_at
+        finally:
+            app_complete._swap_catalog(current)
+
+    def test_retired_catalog_closed_on_next_reload(self, tmp_path, monkeypatch):
+        source = tmp_path / "api_database_complete.json"
+        source.write_bytes(app_complete.DB_PATH.read_bytes())
+        write_catalog_pack(json.loads(source.read_text(encoding="utf-8")), pack_path_for(source),
+                           source=source)
+        monkeypatch.setattr(app_complete, "_RETIRED_CATALOGS", [])
+        current = app_complete.CATALOG
+        first, second = (app_complete._build_catalog(source) for _ in range(2))
+        try:
+            app_complete._swap_catalog(first)
+            app_complete._swap_catalog(second)
+            # La versión recién reemplazada sigue abierta (puede haber un request usándola)
+            assert not first.pack._mmap.closed
+            app_complete._swap_catalog(current)
+            assert first.pack._mmap.closed
+            assert not second.pack._mmap.closed
+        finally:
+            app_complete._swap_catalog(current)
+            second.close()
+
+
+class TestConditionalRequests:
+    """Pruebas de ETag / If-None-Match / Cache-Control"""
+
+    def test_etag_and_cache_control(self, client):
+        response = client.get("/info")
+        assert response.headers["etag"].startswith(f'W/"{app_complete.CATALOG.version}-')
+        assert response.headers["cache-control"].startswith("public, max-age=")
+
+    def test_not_modified(self, client):
+        etag = client.get("/.well-known/mcp").headers["etag"]
+        response = client.get("/.well-known/mcp", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_tool_etag_depends_on_arguments(self, client):
+        first = client.post("/tools/get_schema", params={"path": "/products", "method": "GET"})
+        reordered = client.post("/tools/get_schema?method=GET&path=/products")
+        other = client.post("/tools/get_schema", params={"path": "/orders", "method": "GET"})
+        assert first.headers["etag"] == reordered.headers["etag"]
+        assert first.headers["etag"] != other.headers["etag"]
+
+        again = client.post("/tools/get_schema", params={"path": "/products", "method": "GET"},
+                            headers={"If-None-Match": f'"x", {first.headers["etag"]}'})
+        assert again.status_code == 304
+
+    def test_etag_changes_with_catalog_version(self, client):
+        current = app_complete.CATALOG
+        etag = client.get("/info").headers["etag"]
+        replacement = app_complete._build_catalog(current.source)
+        replacement.version = "otra"
+        try:
+            app_complete._swap_catalog(replacement)
+            response = client.get("/info", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+        finally:
+            app_complete._swap_catalog(current)
+
+    def test_uncached_routes(self, client):
+        response = client.get("/health")
+        assert "etag" not in response.headers
+        assert "cache-control" not in response.headers
+
+
+class TestExecuteEndpoint:
+    """Pruebas de la herramienta execute_endpoint contra un transporte simulado"""
+
+    @pytest.fixture
+    def upstream(self, monkeypatch):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if "/slow/" in request.url.path:
+                raise httpx.ReadTimeout("lento", request=request)
+            return httpx.Response(200, json={"id": 42}, headers={"x-rate-limit-remaining": "39"})
+
+        client = TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                  transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(app_complete, "TIENDANUBE_CLIENT", client)
+        monkeypatch.setattr(app_complete, "UPSTREAM_CACHE", UpstreamCache(ResultCache()))
+        return calls
+
+    def test_executes_catalog_endpoint(self, client, upstream):
+        data = client.post("/tools/execute_endpoint", json={
+            "method": "get", "path": "/products/{id}", "path_params": {"id": 42},
+            "query": {"fields": "id"}, "store_id": "99", "access_token": "tok"}).json()
+        assert data["status_code"] == 200
+        assert data["data"] == {"id": 42}
+        assert data["headers"] == {"x-rate-limit-remaining": "39"}
+        assert str(upstream[0].url) == "http://mock.local/v1/99/products/42?fields=id"
+
+    def test_rejects_unknown_endpoint(self, client, upstream):
+        data = client.post("/tools/execute_endpoint",
+                           json={"method": "GET", "path": "/nada", "store_id": "1"}).json()
+        assert "error" in data
+        assert upstream == []
+
+    def test_missing_path_param(self, client, upstream):
+        data = client.post("/tools/execute_endpoint",
+                           json={"method": "GET", "path": "/products/{id}", "store_id": "1"}).json()
+        assert "id" in data["error"]
+
+    def test_upstream_timeout(self, client, upstream):
+        response = client.post("/tools/execute_endpoint",
+                               json={"method": "GET", "path": "/products", "store_id": "slow"})
+        assert response.status_code == 504
+
+    def test_circuit_open(self, client, upstream):
+        breakers = CircuitBreakers(failure_threshold=1, reset_timeout=30)
+        app_complete.TIENDANUBE_CLIENT.breakers = breakers
+        breakers.store("slow").failure()
+        response = client.post("/tools/execute_endpoint",
+                               json={"method": "GET", "path": "/products", "store_id": "slow"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "30"
+        assert upstream == []
+
+    def test_upstream_cache_and_invalidation(self, client, upstream):
+        get = {"method": "GET", "path": "/products/{id}", "path_params": {"id": 1}, "store_id": "1"}
+        assert "cache" not in client.post("/tools/execute_endpoint", json=get).json()
+        assert client.post("/tools/execute_endpoint", json=get).json()["cache"] == "hit"
+        assert len(upstream) == 1
+
+        # Un write exitoso sobre el recurso invalida sus GET cacheados
+        client.post("/tools/execute_endpoint", json={**get, "method": "PUT", "body": {"published": True}})
+        assert "cache" not in client.post("/tools/execute_endpoint", json=get).json()
+        assert len(upstream) == 3
+
+        assert "cache" not in client.post("/tools/execute_endpoint", json={**get, "use_cache": False}).json()
+        assert len(upstream) == 4
+
+    def test_hot_resource_not_cached(self, client, upstream):
+        get = {"method": "GET", "path": "/orders", "store_id": "1"}
+        client.post("/tools/execute_endpoint", json=get)
+        assert "cache" not in client.post("/tools/execute_endpoint", json=get).json()
+        assert len(upstream) == 2
+
+    def test_not_cached(self, client, upstream):
+        response = client.post("/tools/execute_endpoint",
+                               json={"method": "GET", "path": "/products", "store_id": "1"})
+        assert "etag" not in response.headers
+
+
+class TestStreamExecuteEndpoint:
+    """Pruebas del recorrido paginado transmitido como NDJSON / SSE"""
+
+    @pytest.fixture
+    def upstream(self, monkeypatch):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            page = int(request.url.params.get("page", 1))
+            if page > 2:
+                return httpx.Response(404, json={"description": "Last page is 2"})
+            first = (page - 1) * 250
+            return httpx.Response(200, json=[{"id": first + i} for i in range(250)])
+
+        client = TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                  transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(app_complete, "TIENDANUBE_CLIENT", client)
+        return calls
+
+    def test_ndjson(self, client, upstream):
+        response = client.post("/stream/execute_endpoint",
+                               json={"path": "/products", "store_id": "1", "query": {"published": True}})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert len(response.text.splitlines()) == 500
+        assert upstream[0].url.params["per_page"] == "250"
+        assert upstream[0].url.params["published"] == "true"
+
+    def test_sse_from_accept(self, client, upstream):
+        response = client.post("/stream/execute_endpoint", json={"path": "/products", "store_id": "1"},
+                               headers={"Accept": "text/event-stream"})
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.count("event: item\n") == 500
+        assert "event: end" in response.text
+
+    def test_rejects_non_get_and_bad_since_id(self, client, upstream):
+        assert client.post("/stream/execute_endpoint",
+                           json={"method": "POST", "path": "/products", "store_id": "1"}).status_code == 400
+        assert client.post("/stream/execute_endpoint",
+                           json={"path": "/orders/{id}/history", "path_params": {"id": 1},
+                                 "store_id": "1", "mode": "since_id"}).status_code == 400
+        assert upstream == []
+
+    def test_rejects_non_numeric_since_id(self, client, upstream):
+        response = client.post("/stream/execute_endpoint",
+                               json={"path": "/products", "store_id": "1", "mode": "since_id",
+                                     "query": {"since_id": "abc"}})
+        assert response.status_code == 422
+        assert "since_id" in response.json()["error"]
+        assert upstream == []
+
+
+class TestBatchGet:
+    """Pruebas de la herramienta batch_get"""
+
+    @pytest.fixture
+    def upstream(self, monkeypatch):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if "ids" in request.url.params:
+                return httpx.Response(200, json=[{"id": int(i)} for i in request.url.params["ids"].split(",")])
+            return httpx.Response(200, json={"id": int(request.url.path.rsplit("/", 1)[1])})
+
+        monkeypatch.setattr(app_complete, "TIENDANUBE_CLIENT",
+                            TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                             transport=httpx.MockTransport(handler)))
+        return calls
+
+    def test_products_use_ids(self, client, upstream):
+        data = client.post("/tools/batch_get",
+                           json={"path": "/products/{id}", "ids": list(range(1, 61)), "store_id": "1"}).json()
+        assert data["strategy"] == "ids"
+        assert len(data["items"]) == 60
+        assert data["requests"] == len(upstream) == 2
+
+    def test_orders_per_id(self, client, upstream):
+        data = client.post("/tools/batch_get",
+                           json={"path": "/orders/{id}", "ids": [1, 2, 3], "store_id": "1"}).json()
+        assert data["strategy"] == "per_id"
+        assert sorted(item["id"] for item in data["items"]) == [1, 2, 3]
+        assert sorted(r.url.path for r in upstream) == ["/v1/1/orders/1", "/v1/1/orders/2", "/v1/1/orders/3"]
+
+    def test_rejects_non_detail_path(self, client, upstream):
+        assert "error" in client.post("/tools/batch_get",
+                                      json={"path": "/orders", "ids": [1], "store_id": "1"}).json()
+        assert "error" in client.post("/tools/batch_get",
+                                      json={"path": "/products/{product_id}/variants/{id}", "ids": [1],
+                                            "store_id": "1"}).json()
+        assert upstream == []
+
+
+class TestBulkUpdateStockPrice:
+    """Pruebas de la herramienta bulk_update_stock_price"""
+
+    def test_batches_rows(self, client, monkeypatch):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200, json=[])
+
+        monkeypatch.setattr(app_complete, "TIENDANUBE_CLIENT",
+                            TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                             transport=httpx.MockTransport(handler)))
+        rows = [{"product_id": 1, "variant_id": v, "stock": 3, "location_id": "L1"} for v in range(60)]
+        data = client.post("/tools/bulk_update_stock_price", json={"rows": rows, "store_id": "5"}).json()
+        assert data["ok"] == 60
+        assert data["requests"] == len(calls) == 2
+        assert calls[0].method == "PATCH"
+        assert str(calls[0].url) == "http://mock.local/v1/5/products/stock-price"
+
+
+class TestStoreMirror:
+    """Pruebas de las herramientas del espejo local"""
+
+    def test_disabled_by_default(self, client, monkeypatch):
+        monkeypatch.setattr(app_complete, "STORE_MIRROR", None)
+        data = client.post("/tools/query_store_mirror", json={"resource": "products", "store_id": "1"}).json()
+        assert "STORE_MIRROR_PATH" in data["error"]
+
+    def test_sync_and_query(self, client, monkeypatch):
+        def handler(request):
+            if request.url.path.endswith("/products") and "since_id" not in request.url.params:
+                return httpx.Response(200, json=[{"id": 1, "name": {"es": "Pokébola"}, "variants": [
+                    {"id": 10, "stock": 2, "price": "5.00"}, {"id": 11, "stock": 9, "price": "6.00"}]}])
+            return httpx.Response(200, json=[])
+
+        monkeypatch.setattr(app_complete, "STORE_MIRROR", StoreMirror(":memory:"))
+        monkeypatch.setattr(app_complete, "TIENDANUBE_CLIENT",
+                            TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                             transport=httpx.MockTransport(handler)))
+        sync = client.post("/mirror/sync", json={"store_id": "1", "resources": ["products"]}).json()
+        assert sync["results"][0]["items"] == 1
+
+        data = client.post("/tools/query_store_mirror", json={
+            "resource": "variants", "where": {"stock__lt": 5}, "store_id": "1"}).json()
+        assert [v["id"] for v in data["items"]] == [10]
+        assert data["synced_at"] is not None
+
+        bad = client.post("/tools/query_store_mirror", json={
+            "resource": "variants", "where": {"nada": 1}, "store_id": "1"}).json()
+        assert "Columna" in bad["error"]
+
+
+class TestWebhooks:
+    """Pruebas del endpoint de webhooks"""
+
+    @pytest.fixture
+    def ingestor(self, monkeypatch):
+        monkeypatch.setattr(app_complete, "WEBHOOK_SECRET", "secreto")
+        async def apply(batch):
+            return None
+
+        ingestor = WebhookIngestor(apply, max_pending=1)
+        monkeypatch.setattr(app_complete, "WEBHOOK_INGESTOR", ingestor)
+        return ingestor
+
+    def _post(self, client, payload, secret="secreto"):
+        body = json.dumps(payload).encode()
+        return client.post("/webhooks/tiendanube", content=body,
+                           headers={"Content-Type": "application/json", SIGNATURE_HEADER: sign(body, secret)})
+
+    def test_accepts_signed(self, client, ingestor):
+        response = self._post(client, {"store_id": 1, "event": "product/updated", "id": 2})
+        assert response.status_code == 202
+        assert len(ingestor) == 1
+
+    def test_rejects_bad_signature(self, client, ingestor):
+        response = self._post(client, {"store_id": 1, "event": "product/updated", "id": 2}, secret="otro")
+        assert response.status_code == 401
+        assert len(ingestor) == 0
+
+    def test_full_queue(self, client, ingestor):
+        assert self._post(client, {"store_id": 1, "event": "order/created", "id": 1}).status_code == 202
+        response = self._post(client, {"store_id": 1, "event": "order/created", "id": 2})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+
+    def test_disabled_without_secret(self, client, monkeypatch):
+        monkeypatch.setattr(app_complete, "WEBHOOK_SECRET", None)
+        assert self._post(client, {"store_id": 1, "event": "order/created", "id": 1}).status_code == 503
+
+
+class TestMetrics:
+    """Pruebas del endpoint /metrics"""
+
+    def test_metrics(self, client):
+        pytest.importorskip("prometheus_client")
+        client.post("/tools/get_endpoint_details", params={"path": "/products/{id}", "method": "GET"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert 'mcp_tool_calls_total{status="200",tool="get_endpoint_details"}' in text
+        assert 'mcp_tool_duration_seconds_bucket{le="0.005",tool="get_endpoint_details"}' in text
+        assert f'mcp_catalog_info{{version="{app_complete.CATALOG.version}"}} 1.0' in text
+        assert 'mcp_cache_hits_total{cache="search"}' in text
+        assert "mcp_sessions_active" in text
+        # /metrics no se expone como herramienta MCP
+        assert "/metrics" not in client.get("/openapi.json").json()["paths"]
+
+    def test_counts_mcp_sessions(self):
+        pytest.importorskip("prometheus_client")
+        initialize = {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+                      "params": {"protocolVersion": "2025-03-26", "capabilities": {},
+                                 "clientInfo": {"name": "test", "version": "1"}}}
+
+        def sessions(client):
+            for line in client.get("/metrics").text.splitlines():
+                if line.startswith("mcp_sessions_active "):
+                    return float(line.split()[1])
+
+        # Con el lifespan corriendo, como en producción
+        with TestClient(app_complete.app) as client:
+            before = sessions(client)
+            response = client.post("/mcp", json=initialize,
+                                   headers={"Accept": "application/json, text/event-stream"})
+            session_id = response.headers["mcp-session-id"]
+            assert sessions(client) == before + 1
+            client.delete("/mcp", headers={"mcp-session-id": session_id})
+            assert sessions(client) == before
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la lectura de muchos IDs (batch_get.py)
+Usan httpx.MockTransport en lugar de la API real
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from batch_get import BatchGet, json_document_chunks, split_detail_path
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+def _client(handler):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                            transport=httpx.MockTransport(handler))
+
+
+def _document(batch):
+    async def collect():
+        return b"".join([chunk async for chunk in json_document_chunks(batch)])
+    return json.loads(asyncio.run(collect()))
+
+
+def test_split_detail_path():
+    assert split_detail_path("/orders/{id}") == ("/orders", "id")
+    assert split_detail_path("/products/{product_id}/variants/{id}") == ("/products/{product_id}/variants", "id")
+    assert split_detail_path("/orders") is None
+
+
+class TestBatchGet:
+    """Pruebas de ambas estrategias"""
+
+    def test_ids_chunks_of_30(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            ids = request.url.params["ids"].split(",")
+            # El 7 no existe en la tienda
+            return httpx.Response(200, json=[{"id": int(i)} for i in ids if i != "7"])
+
+        batch = BatchGet(_client(handler), "1", "/products/{id}", list(range(70)) + [3],
+                         use_ids=True, params={"fields": "id"})
+        document = _document(batch)
+
+        assert document["strategy"] == "ids"
+        assert document["requests"] == len(requests) == 3
+        assert [len(r.url.params["ids"].split(",")) for r in requests] == [30, 30, 10]
+        assert requests[0].url.path == "/v1/1/products"
+        assert requests[0].url.params["fields"] == "id"
+        assert sorted(item["id"] for item in document["items"]) == [i for i in range(70) if i != 7]
+        assert document["missing"] == ["7"]
+        assert document["errors"] == []
+
+    def test_per_id_concurrent(self):
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            entity_id = int(request.url.path.rsplit("/", 1)[1])
+            if entity_id == 404:
+                return httpx.Response(404, json={"description": "Not found"})
+            if entity_id == 500:
+                return httpx.Response(500, json={"description": "boom"})
+            return httpx.Response(200, json={"id": entity_id})
+
+        batch = BatchGet(_client(handler), "1", "/products/{product_id}/variants/{id}",
+                         list(range(20)) + [404, 500], path_params={"product_id": 9}, concurrency=5)
+        document = _document(batch)
+
+        assert document["strategy"] == "per_id"
+        assert document["requests"] == 22
+        assert 1 < peak <= 5
+        assert sorted(item["id"] for item in document["items"]) == list(range(20))
+        assert document["missing"] == ["404"]
+        assert document["errors"][0]["id"] == "500"
+        assert document["errors"][0]["status_code"] == 500
+
+    def test_failed_chunk_reports_every_id(self):
+        batch = BatchGet(_client(lambda request: httpx.Response(401, json={"error": "Unauthorized"})),
+                         "1", "/products/{id}", [1, 2], use_ids=True)
+        document = _document(batch)
+        assert document["items"] == []
+        assert [e["id"] for e in document["errors"]] == ["1", "2"]
+
+    def test_non_json_200_reports_every_id(self):
+        def handler(request):
+            if request.url.path.endswith("/2"):
+                return httpx.Response(200, json={"id": 2})
+            return httpx.Response(200, text="<html>Bad gateway</html>")
+
+        per_id = _document(BatchGet(_client(handler), "1", "/products/{id}", [1, 2]))
+        assert [item["id"] for item in per_id["items"]] == [2]
+        assert per_id["errors"][0]["id"] == "1"
+        assert per_id["errors"][0]["status_code"] == 200
+        assert "Bad gateway" in per_id["errors"][0]["error"]
+
+        ids = _document(BatchGet(_client(handler), "1", "/products/{id}", [1, 2], use_ids=True))
+        assert ids["items"] == []
+        assert [e["id"] for e in ids["errors"]] == ["1", "2"]
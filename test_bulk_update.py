@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la actualización masiva de stock y precio (bulk_update.py)
+Usan httpx.MockTransport: no hacen llamadas de red
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from bulk_update import build_batches, bulk_update_stock_price, coalesce_rows
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+def _client(handler):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                            transport=httpx.MockTransport(handler))
+
+
+class TestCoalesce:
+    """Pruebas de combinación de filas y armado de lotes"""
+
+    def test_merges_rows_per_variant(self):
+        variants, keys, invalid = coalesce_rows([
+            {"product_id": 1, "variant_id": 10, "stock": 5, "location_id": "A"},
+            {"product_id": 1, "variant_id": 10, "price": 12.5},
+            {"product_id": 1, "variant_id": 10, "stock": 7, "location_id": "A"},
+            {"product_id": 1, "variant_id": 10, "stock": 3, "location_id": "B"},
+            {"product_id": 1, "variant_id": 11, "stock": 1},
+            {"product_id": 2},
+        ])
+        assert variants[(1, 10)] == {"inventory_levels": {"A": 7, "B": 3}, "price": "12.50"}
+        assert variants[(1, 11)] == {"stock": 1}
+        assert keys == [(1, 10)] * 4 + [(1, 11), None]
+        assert invalid[0]["row"] == 5
+
+    def test_batches_respect_size(self):
+        variants, _, _ = coalesce_rows(
+            [{"product_id": p, "variant_id": v, "stock": 1} for p in range(3) for v in range(30)])
+        batches = build_batches(variants, batch_size=50)
+        sizes = [sum(len(product["variants"]) for product in batch) for batch in batches]
+        assert sizes == [50, 40]
+        # El producto 1 queda repartido entre los dos lotes
+        assert [product["id"] for product in batches[0]] == [0, 1]
+        assert [product["id"] for product in batches[1]] == [1, 2]
+
+    def test_inventory_levels_body(self):
+        variants, _, _ = coalesce_rows([{"product_id": 1, "variant_id": 2, "stock": 4, "location_id": "L"}])
+        assert build_batches(variants) == [
+            [{"id": 1, "variants": [{"id": 2, "inventory_levels": [{"location_id": "L", "stock": 4}]}]}]]
+
+
+class TestBulkUpdate:
+    """Pruebas del envío de lotes y el reporte por fila"""
+
+    def test_report_and_request_count(self):
+        bodies = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            bodies.append(body)
+            return httpx.Response(200, json=body)
+
+        rows = [{"product_id": v // 10, "variant_id": v, "stock": 1} for v in range(120)]
+        rows.append({"product_id": 0, "variant_id": 0, "price": "9.99"})
+        report = asyncio.run(bulk_update_stock_price(_client(handler), "7", rows, batch_size=50))
+
+        assert report["requests"] == 3 == len(bodies)
+        assert report["variants"] == 120
+        assert report["rows"] == 121
+        assert report["ok"] == 121 and report["failed"] == 0
+        assert report["results"][-1]["coalesced"] is True
+        assert sum(len(p["variants"]) for body in bodies for p in body) == 120
+
+    def test_failed_batch_and_rejected_variant(self):
+        def handler(request):
+            body = json.loads(request.content)
+            if body[0]["id"] == 2:
+                return httpx.Response(422, json={"description": "Invalid"})
+            return httpx.Response(200, json=[
+                {"id": 1, "variants": [{"id": 10, "success": True}, {"id": 11, "success": False}]}])
+
+        rows = [{"product_id": 1, "variant_id": 10, "stock": 1},
+                {"product_id": 1, "variant_id": 11, "stock": 1},
+                {"product_id": 2, "variant_id": 20, "stock": 1},
+                {"variant_id": 30, "stock": 1}]
+        report = asyncio.run(bulk_update_stock_price(_client(handler), "7", rows, batch_size=2))
+
+        assert [r["status"] for r in report["results"]] == ["ok", "error", "error", "invalid"]
+        assert report["results"][2]["status_code"] == 422
+        assert report["failed"] == 3
+
+    def test_concurrency_bound(self):
+        active = {"now": 0, "max": 0}
+
+        async def handler(request):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            return httpx.Response(200, json=[])
+
+        rows = [{"product_id": v, "variant_id": v, "stock": 1} for v in range(20)]
+        report = asyncio.run(bulk_update_stock_price(_client(handler), "7", rows,
+                                                     batch_size=2, concurrency=3))
+        assert report["requests"] == 10
+        assert 1 < active["max"] <= 3
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Pruebas del índice del catálogo (catalog.py)
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from catalog import Catalog, CatalogIndex, CatalogReloader, endpoint_key, normalize_path
+
+DB_PATH = Path(__file__).parent / "api_database_complete.json"
+
+
+@pytest.fixture(scope="module")
+def api_database():
+    with open(DB_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def index(api_database):
+    return CatalogIndex(api_database)
+
+
+class TestNormalization:
+    """Pruebas de normalización de claves"""
+
+    def test_method_uppercase(self):
+        assert endpoint_key("get", "/products") == ("GET", "/products")
+
+    def test_trailing_slash_and_query(self):
+        assert normalize_path("/products/?page=2") == "/products"
+        assert normalize_path("products") == "/products"
+        assert normalize_path("/") == "/"
+
+    def test_placeholder_names(self):
+        assert normalize_path("/orders/{order_id}") == normalize_path("/orders/{id}")
+
+
+class TestCatalogIndex:
+    """Pruebas de búsqueda por (método, path)"""
+
+    def test_indexes_every_endpoint(self, api_database, index):
+        total = sum(len(e) for e in api_database["endpoints"].values())
+        assert len(index) == total
+
+    def test_lookup_matches_linear_scan(self, api_database, index):
+        for resource, endpoints in api_database["endpoints"].items():
+            for endpoint in endpoints:
+                found = index.lookup(endpoint["method"], endpoint["path"])
+                assert found == (resource, endpoint)
+
+    def test_lookup_normalized(self, index):
+        resource, endpoint = index.lookup("get", "/products/{product_id}/")
+        assert resource == "products"
+        assert endpoint["path"] == "/products/{id}"
+
+    def test_lookup_missing(self, index):
+        assert index.lookup("GET", "/no/existe") is None
+
+    def test_lookup_by_resource(self, index):
+        assert index.lookup("GET", "/products", resource="products")[0] == "products"
+        assert index.lookup("GET", "/products", resource="orders") is None
+        assert index.lookup("GET", "/products", resource="no_existe") is None
+
+    def test_resource_endpoints(self, api_database, index):
+        assert index.resource_endpoints("orders") is api_database["endpoints"]["orders"]
+        assert index.resource_endpoints("no_existe") == []
+
+
+class TestCatalogReloader:
+    """Pruebas de recarga en caliente del catálogo"""
+
+    @pytest.fixture
+    def catalog_path(self, tmp_path):
+        path = tmp_path / "api_database.json"
+        shutil.copy(Path(__file__).parent / "api_database.json", path)
+        return path
+
+    def _reloader(self, path, holder):
+        holder["catalog"] = Catalog.load(path)
+        return CatalogReloader(path, Catalog.load, lambda c: holder.update(catalog=c),
+                               signature=holder["catalog"].signature)
+
+    def _rewrite(self, path, database):
+        path.write_text(json.dumps(database), encoding="utf-8")
+        stat = path.stat()
+        # Asegurar que cambie el mtime aunque el filesystem tenga poca resolución
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_version_info(self, catalog_path):
+        catalog = Catalog.load(catalog_path)
+        info = catalog.version_info()
+        assert len(info["version"]) == 12
+        assert info["generated_at"] and info["loaded_at"]
+        assert catalog.total_endpoints == len(catalog.index)
+
+    def test_no_change_no_reload(self, catalog_path):
+        holder = {}
+        assert self._reloader(catalog_path, holder).check() is False
+
+    def test_reload_on_change(self, catalog_path):
+        holder = {}
+        reloader = self._reloader(catalog_path, holder)
+        old = holder["catalog"]
+
+        database = json.loads(catalog_path.read_text(encoding="utf-8"))
+        database["endpoints"]["products"].pop()
+        self._rewrite(catalog_path, database)
+
+        assert reloader.check() is True
+        assert holder["catalog"] is not old
+        assert holder["catalog"].version != old.version
+        assert holder["catalog"].total_endpoints == old.total_endpoints - 1
+        assert reloader.check() is False
+
+    def test_keeps_old_catalog_on_error(self, catalog_path):
+        holder = {}
+        reloader = self._reloader(catalog_path, holder)
+        old = holder["catalog"]
+
+        catalog_path.write_text("{roto", encoding="utf-8")
+        os.utime(catalog_path, ns=(0, old.signature[0][0] + 10**9))
+
+        assert reloader.check() is False
+        assert holder["catalog"] is old
+
+
+class TestCatalogEngine:
+    """Pruebas de las consultas compartidas por todos los front ends"""
+
+    @pytest.fixture(scope="class")
+    def catalog(self):
+        return Catalog.load(Path(__file__).parent / "api_database.json")
+
+    def test_search_endpoints_filters_method(self, catalog):
+        hits = catalog.search_endpoints(None, resource="products", method="get")
+        assert hits
+        assert all(resource == "products" and endpoint["method"] == "GET"
+                   for resource, endpoint, _ in hits)
+
+    def test_schemas(self, catalog):
+        schemas = catalog.schemas("products", "request")
+        assert schemas and all(set(s) == {"method", "path", "schema"} for s in schemas)
+        assert catalog.schemas("nada") == []
+
+    def test_code_example_prefers_catalog(self, catalog):
+        _, endpoint = catalog.lookup("GET", "/products")
+        assert catalog.code_example(endpoint, "python") == endpoint["code_examples"]["python"]
+
+    def test_code_example_template(self, catalog):
+        _, endpoint = catalog.lookup("DELETE", "/products/{id}")
+        code = catalog.code_example(endpoint, "javascript")
+        assert "method: 'DELETE'" in code
+        assert catalog.code_example(endpoint, "javascript") is code
+        assert catalog.code_example(endpoint, "cobol") is None
+        assert "javascript" in catalog.code_example_languages(endpoint)
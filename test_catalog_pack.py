@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Pruebas del catálogo binario compacto (catalog_pack.py)
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from catalog import CatalogIndex
+from catalog_pack import CatalogPack, load_api_database, pack_path_for, write_catalog_pack
+from catalog_search import SearchIndex
+
+BASE_DIR = Path(__file__).parent
+
+
+@pytest.fixture(params=["api_database.json", "api_database_complete.json"])
+def catalog_json(request, tmp_path):
+    path = tmp_path / request.param
+    shutil.copy(BASE_DIR / request.param, path)
+    return path
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class TestCatalogPack:
+    """Pruebas de escritura y lectura del .pack"""
+
+    def test_roundtrip(self, catalog_json):
+        original = _load_json(catalog_json)
+        pack = CatalogPack(write_catalog_pack(original, pack_path_for(catalog_json)))
+        database = pack.api_database
+
+        assert database["metadata"] == original["metadata"]
+        assert database.get("important_notes", {}) == original.get("important_notes", {})
+        assert list(database["endpoints"]) == list(original["endpoints"])
+        for resource, endpoints in original["endpoints"].items():
+            assert [dict(e) for e in database["endpoints"][resource]] == endpoints
+
+    def test_bodies_decoded_lazily(self, catalog_json):
+        pack = CatalogPack(write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json)))
+        endpoints = [e for es in pack.api_database["endpoints"].values() for e in es]
+
+        # Índices y resúmenes sólo usan la cabecera
+        CatalogIndex(pack.api_database)
+        assert endpoints[0]["path"] == "/products"
+        assert not any(e.is_decoded for e in endpoints)
+
+        assert "since_id" in endpoints[0]["parameters"]
+        assert [e.is_decoded for e in endpoints].count(True) == 1
+
+    def test_smaller_than_json(self, catalog_json):
+        pack_path = write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json))
+        assert pack_path.stat().st_size < catalog_json.stat().st_size
+
+    def test_summary_only_has_present_keys(self, tmp_path):
+        database = {"metadata": {}, "endpoints": {"x": [
+            {"method": "GET", "path": "/x", "name": "Listar", "parameters": {"page": {}}},
+            {"path": "/y", "method": "POST", "description": None, "body": {}},
+        ]}}
+        with CatalogPack(write_catalog_pack(database, tmp_path / "x.pack")) as pack:
+            first, second = pack.api_database["endpoints"]["x"]
+
+            assert "description" not in first
+            assert first.get("description") is None
+            assert not first.is_decoded
+            assert list(first) == ["method", "path", "name", "parameters"]
+
+            # Campos del resumen fuera de orden o no textuales: el cuerpo guarda el original
+            assert second["path"] == "/y"
+            assert "description" in second
+            assert list(second) == ["path", "method", "description", "body"]
+
+    def test_long_summary_fields(self, tmp_path):
+        description = "descripción larga " * 5000
+        assert len(description.encode("utf-8")) > 65535
+        database = {"metadata": {}, "endpoints": {"x": [
+            {"method": "GET", "path": "/x", "description": description, "parameters": {}},
+            {"method": "GET", "path": "/y", "name": "Siguiente"},
+        ]}}
+        with CatalogPack(write_catalog_pack(database, tmp_path / "x.pack")) as pack:
+            first, second = pack.api_database["endpoints"]["x"]
+            assert first["description"] == description
+            assert dict(second) == database["endpoints"]["x"][1]
+
+    def test_close(self, catalog_json):
+        pack = CatalogPack(write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json)))
+        endpoints = pack.api_database["endpoints"]["products"]
+        decoded = dict(endpoints[0])
+        pack.close()
+        pack.close()
+        # Lo ya decodificado y los resúmenes siguen disponibles
+        assert dict(endpoints[0]) == decoded
+        assert endpoints[1]["path"]
+        with pytest.raises(ValueError):
+            dict(endpoints[1])
+
+    def test_invalid_file(self, tmp_path):
+        bad = tmp_path / "bad.pack"
+        bad.write_bytes(b"not a pack")
+        with pytest.raises(ValueError):
+            CatalogPack(bad)
+
+
+class TestLoadApiDatabase:
+    """Pruebas de carga con preferencia por el .pack"""
+
+    def test_json_without_pack(self, catalog_json):
+        database, search_state = load_api_database(catalog_json)
+        assert database == _load_json(catalog_json)
+        assert search_state is None
+
+    def test_prefers_fresh_pack(self, catalog_json):
+        write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json), source=catalog_json)
+        database, search_state = load_api_database(catalog_json)
+        assert search_state is not None
+        assert not isinstance(database["endpoints"]["products"][0], dict)
+
+    def test_ignores_stale_pack(self, catalog_json):
+        pack_path = write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json), source=catalog_json)
+        # JSON editado con un mtime más viejo que el .pack (ej. restaurado de un backup)
+        edited = _load_json(catalog_json)
+        edited["metadata"]["editado"] = True
+        catalog_json.write_text(json.dumps(edited), encoding="utf-8")
+        stat = pack_path.stat()
+        os.utime(catalog_json, (stat.st_atime, stat.st_mtime - 60))
+        database, search_state = load_api_database(catalog_json)
+        assert search_state is None
+        assert database["metadata"]["editado"] is True
+
+    def test_touched_json_keeps_pack(self, catalog_json):
+        pack_path = write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json), source=catalog_json)
+        stat = pack_path.stat()
+        os.utime(catalog_json, (stat.st_atime, stat.st_mtime + 60))
+        _, search_state = load_api_database(catalog_json)
+        assert search_state is not None
+
+    def test_pack_without_source_ignored(self, catalog_json):
+        write_catalog_pack(_load_json(catalog_json), pack_path_for(catalog_json))
+        _, search_state = load_api_database(catalog_json)
+        assert search_state is None
+        catalog_json.unlink()
+        _, search_state = load_api_database(catalog_json)
+        assert search_state is not None
+
+    def test_falls_back_on_corrupt_pack(self, catalog_json):
+        pack_path_for(catalog_json).write_bytes(b"corrupto")
+        database, search_state = load_api_database(catalog_json)
+        assert search_state is None
+        assert database == _load_json(catalog_json)
+
+    def test_precomputed_search_index(self, catalog_json):
+        original = _load_json(catalog_json)
+        write_catalog_pack(original, pack_path_for(catalog_json), source=catalog_json)
+        database, search_state = load_api_database(catalog_json)
+
+        fresh = SearchIndex(original)
+        packed = SearchIndex(database, search_state)
+        for query in ["stock", "categoría", "order pay", "per_page"]:
+            assert _hit_keys(packed.search(query)) == _hit_keys(fresh.search(query))
+
+
+def _hit_keys(hits):
+    return [
+        (doc["endpoint"]["path"] if doc["type"] == "endpoint" else doc["key"], round(score, 4))
+        for doc, score in hits
+    ]
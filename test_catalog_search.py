@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pruebas del índice invertido de búsqueda (catalog_search.py)
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from catalog_search import SearchIndex, fold_accents, normalize_query, stem, tokenize
+
+BASE_DIR = Path(__file__).parent
+
+
+def _load(name):
+    with open(BASE_DIR / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex(_load("api_database_complete.json"))
+
+
+@pytest.fixture(scope="module")
+def notes_index():
+    return SearchIndex(_load("api_database.json"))
+
+
+def _paths(hits):
+    return [(doc["endpoint"]["method"], doc["endpoint"]["path"]) for doc, _ in hits]
+
+
+class TestTokenize:
+    """Pruebas de tokenización y normalización"""
+
+    def test_splits_paths_and_identifiers(self):
+        assert tokenize("/products/{product_id}/stock-price") == [
+            "product", "product", "id", "stock", "pric"
+        ]
+
+    def test_accent_folding_and_stopwords(self):
+        assert tokenize("ID de categoría") == ["id", "categor"]
+        assert fold_accents("información ção") == "informacion cao"
+
+    def test_stemming_across_languages(self):
+        assert stem("categoria") == stem("categorias") == stem("categories") == stem("category")
+        assert tokenize("informações") == tokenize("información") == tokenize("information")
+        assert stem("ordenes") == stem("orden")
+        assert stem("page") != stem("pago")
+
+    def test_empty(self):
+        assert tokenize(None) == []
+        assert tokenize("{} /") == []
+
+    def test_normalize_query(self):
+        assert normalize_query("Pay Order") == normalize_query(" order  PAY") == "order pay"
+        assert normalize_query("pago de la orden") == normalize_query("orden pago")
+        assert normalize_query("stóck") == normalize_query("STOCK")
+        assert normalize_query(None) == normalize_query(" ") == ""
+        assert normalize_query("de la") == "-"
+
+
+class TestSearchIndex:
+    """Pruebas de búsqueda"""
+
+    def test_intersection_of_terms(self, index):
+        assert _paths(index.search("order pay")) == [("POST", "/orders/{id}/pay")]
+
+    def test_ranked_by_field_weight(self, index):
+        hits = index.search("stock")
+        assert _paths(hits)[0] == ("PATCH", "/products/stock-price")
+        scores = [score for _, score in hits]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_prefix_expansion(self, index):
+        paths = _paths(index.search("webhook"))
+        assert len(paths) == 5
+        assert all(path.startswith("/webhooks") for _, path in paths)
+
+    def test_parameter_names_indexed(self, index):
+        assert ("GET", "/products") in _paths(index.search("since_id"))
+
+    def test_resource_filter(self, index):
+        hits = index.search("id", resource="orders")
+        assert hits
+        assert all(doc["resource"] == "orders" for doc, _ in hits)
+
+    def test_empty_query_returns_catalog_order(self, index):
+        hits = index.search("", resource="products")
+        assert [doc["endpoint"] for doc, _ in hits] == _load(
+            "api_database_complete.json")["endpoints"]["products"]
+
+    def test_stopwords_only_query_finds_nothing(self, index):
+        assert index.search("de la") == []
+        assert index.search("  ") != []
+
+    def test_accent_insensitive(self, index):
+        assert _paths(index.search("categoria")) == _paths(index.search("categoría"))
+        assert _paths(index.search("categoría"))[0][1].startswith("/categories")
+
+    def test_cross_language_synonyms(self, index):
+        assert _paths(index.search("cancelar pedido")) == [("POST", "/orders/{id}/cancel")]
+        assert _paths(index.search("informações da loja"))[0] == ("GET", "/store")
+
+    def test_best_match_first(self, index):
+        assert _paths(index.search("lista de productos"))[0] == ("GET", "/products")
+
+    def test_falls_back_to_any_term(self, index):
+        paths = _paths(index.search("webhook zzzinexistente"))
+        assert paths and all(path.startswith("/webhooks") for _, path in paths)
+
+    def test_no_match(self, index):
+        assert index.search("zzzinexistente") == []
+
+    def test_important_notes(self, notes_index):
+        docs = [doc for doc, _ in notes_index.search("per_page")]
+        assert any(doc["type"] == "note" and doc["key"] == "pagination" for doc in docs)
+        assert not any(doc["type"] == "note"
+                       for doc, _ in notes_index.search("per_page", include_notes=False))
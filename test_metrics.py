@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Pruebas de las métricas Prometheus (metrics.py)
+Incluye la agregación entre procesos con PROMETHEUS_MULTIPROC_DIR
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+import httpx
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from fastapi import FastAPI, HTTPException, Request, Response  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from metrics import UNMATCHED_ROUTE, Metrics, MetricsMiddleware  # noqa: E402
+from rate_limiter import RateLimitScheduler  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from tiendanube_client import ClientConfig, TiendaNubeClient  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _value(metrics, name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+def _app(metrics):
+    app = FastAPI()
+
+    @app.post("/tools/search")
+    async def search():
+        return {"results": []}
+
+    @app.post("/tools/nada")
+    async def nada():
+        raise HTTPException(status_code=404)
+
+    @app.post("/tools/roto")
+    async def roto():
+        raise RuntimeError("falla")
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics, paths=["/cacheable"])
+    return TestClient(app, raise_server_exceptions=False)
+
+
+class TestMiddleware:
+    """Requests y herramientas por ruta"""
+
+    def test_routes_use_templates(self):
+        metrics = Metrics()
+        client = _app(metrics)
+        for item_id in (1, 2, 3):
+            client.get(f"/items/{item_id}")
+        client.get("/otra/cosa")
+        client.get("/cacheable")
+
+        assert _value(metrics, "mcp_http_requests_total", route="/items/{item_id}", method="GET",
+                      status="200") == 3
+        assert _value(metrics, "mcp_http_request_duration_seconds_count", route="/items/{item_id}",
+                      method="GET") == 3
+        assert _value(metrics, "mcp_http_requests_total", route=UNMATCHED_ROUTE, method="GET", status="404") == 1
+        assert _value(metrics, "mcp_http_requests_total", route="/cacheable", method="GET", status="404") == 1
+
+    def test_tools(self):
+        metrics = Metrics()
+        client = _app(metrics)
+        client.post("/tools/search")
+        client.post("/tools/search")
+        client.post("/tools/nada")
+        client.post("/tools/roto")
+
+        assert _value(metrics, "mcp_tool_calls_total", tool="search", status="200") == 2
+        assert _value(metrics, "mcp_tool_calls_total", tool="nada", status="404") == 1
+        assert _value(metrics, "mcp_tool_calls_total", tool="roto", status="500") == 1
+        assert _value(metrics, "mcp_tool_duration_seconds_count", tool="search") == 2
+        assert _value(metrics, "mcp_http_requests_in_flight") == 0
+
+
+class TestSessions:
+    """Sesiones MCP contadas por el header mcp-session-id"""
+
+    def _client(self, metrics):
+        app = FastAPI()
+        opened = iter(range(1, 100))
+
+        @app.post("/mcp")
+        async def post(request: Request, response: Response):
+            session = request.headers.get("mcp-session-id")
+            if session is None:
+                response.headers["mcp-session-id"] = f"s{next(opened)}"
+            elif session == "vencida":
+                raise HTTPException(status_code=404)
+            else:
+                response.headers["mcp-session-id"] = session
+            return {}
+
+        @app.delete("/mcp")
+        async def delete():
+            return {}
+
+        app.add_middleware(MetricsMiddleware, metrics=metrics, sessions_path="/mcp")
+        return TestClient(app)
+
+    def test_open_and_close(self):
+        metrics = Metrics()
+        client = self._client(metrics)
+        client.post("/mcp")
+        client.post("/mcp")
+        client.post("/mcp", headers={"mcp-session-id": "s1"})
+        assert _value(metrics, "mcp_sessions_active") == 2
+
+        client.delete("/mcp", headers={"mcp-session-id": "s1"})
+        assert _value(metrics, "mcp_sessions_active") == 1
+        # Un 404 de sesión desconocida la da por cerrada
+        client.post("/mcp", headers={"mcp-session-id": "vencida"})
+        client.delete("/mcp", headers={"mcp-session-id": "s2"})
+        client.delete("/mcp", headers={"mcp-session-id": "s2"})
+        assert _value(metrics, "mcp_sessions_active") == 0
+
+    def test_idle_sessions_expire(self):
+        clock = FakeClock()
+        metrics = Metrics(session_idle_ttl=60, clock=clock)
+        client = self._client(metrics)
+        client.post("/mcp")
+        client.post("/mcp")
+        clock.now += 50
+        # s1 sigue activa; s2 fue abandonada (o la cerró otro worker)
+        client.post("/mcp", headers={"mcp-session-id": "s1"})
+        # Una sesión abierta en otro worker no se empieza a contar acá
+        client.post("/mcp", headers={"mcp-session-id": "ajena"})
+        assert _value(metrics, "mcp_sessions_active") == 2
+
+        clock.now += 20
+        metrics.refresh()
+        assert _value(metrics, "mcp_sessions_active") == 1
+        clock.now += 60
+        client.post("/mcp")
+        assert _value(metrics, "mcp_sessions_active") == 1
+
+
+class TestSources:
+    """Valores copiados desde cachés, sesiones y catálogo"""
+
+    def test_cache_counters(self):
+        metrics = Metrics()
+        cache = ResultCache()
+        metrics.watch(caches={"search": cache, "upstream": None})
+        metrics.refresh()
+        assert metrics.registry.get_sample_value("mcp_cache_hits_total", {"cache": "search"}) == 0
+
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("a", lambda: 1)
+        metrics.refresh()
+        metrics.refresh()
+        assert _value(metrics, "mcp_cache_hits_total", cache="search") == 2
+        assert _value(metrics, "mcp_cache_misses_total", cache="search") == 1
+        assert metrics.registry.get_sample_value("mcp_cache_hits_total", {"cache": "upstream"}) is None
+
+        # Un contador de origen reiniciado no hace retroceder la métrica
+        cache.hits = 1
+        metrics.refresh()
+        assert _value(metrics, "mcp_cache_hits_total", cache="search") == 3
+
+    def test_catalog_version(self):
+        metrics = Metrics()
+        state = {"version": "v1"}
+        metrics.watch(catalog_version=lambda: state["version"])
+        metrics.refresh()
+        assert _value(metrics, "mcp_catalog_info", version="v1") == 1
+
+        state.update(version="v2")
+        metrics.refresh()
+        assert _value(metrics, "mcp_catalog_info", version="v1") == 0
+        assert _value(metrics, "mcp_catalog_info", version="v2") == 1
+        assert b'mcp_catalog_info{version="v2"} 1.0' in metrics.render()
+
+    def test_requests_do_not_refresh(self):
+        metrics = Metrics()
+        cache = ResultCache()
+        metrics.watch(caches={"search": cache})
+        client = _app(metrics)
+        cache.get_or_compute("a", lambda: 1)
+        client.post("/tools/search")
+        assert _value(metrics, "mcp_cache_misses_total", cache="search") == 0
+
+        async def tick():
+            task = asyncio.create_task(metrics.run(0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(tick())
+        assert _value(metrics, "mcp_cache_misses_total", cache="search") == 1
+
+
+class TestUpstream:
+    """Latencia de la API y espera del rate limiter por tienda"""
+
+    def test_client_observes_per_store(self):
+        metrics = Metrics()
+
+        def handler(request):
+            if "/2/" in request.url.path:
+                raise httpx.ConnectError("caída", request=request)
+            return httpx.Response(201 if request.method == "POST" else 200, json={})
+
+        client = TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                  transport=httpx.MockTransport(handler), scheduler=RateLimitScheduler(),
+                                  metrics=metrics)
+
+        async def run():
+            await client.request("1", "GET", "/products")
+            await client.request("1", "POST", "/products", json={"name": "x"})
+            with pytest.raises(httpx.ConnectError):
+                await client.request("2", "GET", "/products")
+            await client.aclose()
+
+        asyncio.run(run())
+        duration = "mcp_upstream_request_duration_seconds_count"
+        assert _value(metrics, duration, store="1", method="GET", status="200") == 1
+        assert _value(metrics, duration, store="1", method="POST", status="201") == 1
+        assert _value(metrics, duration, store="2", method="GET", status="error") == 1
+        assert _value(metrics, "mcp_upstream_rate_limit_wait_seconds_count", store="1") == 2
+        assert _value(metrics, "mcp_upstream_rate_limit_wait_seconds_count", store="2") == 1
+
+
+WORKER = textwrap.dedent("""
+    import sys
+    from metrics import Metrics
+
+    metrics = Metrics.from_env()
+    for _ in range(int(sys.argv[1])):
+        metrics.observe_request("/tools/search_endpoint", "POST", 200, 0.004)
+    metrics.in_flight.inc()
+    metrics.observe_upstream("7", "GET", 200, 0.2)
+    print(flush=True)
+    sys.stdin.read()
+""")
+
+
+class TestMultiprocess:
+    """Con PROMETHEUS_MULTIPROC_DIR /metrics suma los valores de todos los workers"""
+
+    def test_aggregates_across_processes(self, tmp_path):
+        from prometheus_client import multiprocess
+
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        workers = [subprocess.Popen([sys.executable, "-c", WORKER, str(count)], env=env,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                   for count in (3, 4)]
+        try:
+            for worker in workers:
+                worker.stdout.readline()
+            text = Metrics(multiprocess_dir=str(tmp_path)).render().decode()
+        finally:
+            for worker in workers:
+                worker.communicate("")
+
+        assert 'mcp_tool_calls_total{status="200",tool="search_endpoint"} 7.0' in text
+        assert 'mcp_tool_duration_seconds_count{tool="search_endpoint"} 7.0' in text
+        assert ('mcp_upstream_request_duration_seconds_count{method="GET",status="200",store="7"} 2.0'
+                in text)
+        assert "mcp_http_requests_in_flight 2.0" in text
+
+        # Un worker terminado deja sus contadores pero no sus gauges en vivo
+        multiprocess.mark_process_dead(workers[0].pid, str(tmp_path))
+        text = Metrics(multiprocess_dir=str(tmp_path)).render().decode()
+        assert 'mcp_tool_calls_total{status="200",tool="search_endpoint"} 7.0' in text
+        assert "mcp_http_requests_in_flight 1.0" in text
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Pruebas del mock de la API de Tienda Nube (mock_tiendanube.py)
+Algunas recorren el cliente real contra el mock vía httpx.ASGITransport
+"""
+
+import asyncio
+import re
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from batch_get import BatchGet, json_document_chunks
+from bulk_update import bulk_update_stock_price
+from mock_tiendanube import MockConfig, MockTiendaNube, create_app
+from pagination import Paginator
+from rate_limiter import RateLimitScheduler
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+def _mock(**kwargs):
+    kwargs.setdefault("rate_limit", False)
+    return MockTiendaNube.from_files(config=MockConfig(seed=1, **kwargs))
+
+
+def _client(mock, scheduler=None):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                            transport=httpx.ASGITransport(app=create_app(mock)), scheduler=scheduler)
+
+
+@pytest.fixture
+def api():
+    return TestClient(create_app(_mock()))
+
+
+class TestCatalogCoverage:
+    """Todos los endpoints del catálogo responden"""
+
+    def test_every_endpoint(self):
+        mock = _mock()
+        api = TestClient(create_app(mock))
+        assert mock.endpoints >= 111
+        failures = []
+        for method, routes in mock.routes.items():
+            for route in routes:
+                # IDs que existen: el padre es 1; los anidados se numeran 100*padre + k
+                # (las variantes, 10*producto + k)
+                ids = iter(["1", "101", "101"])
+
+                def value(match):
+                    return {"sku": "SKU-11", "variant_id": "11"}.get(match.group(1)) or next(ids)
+
+                path = re.sub(r"\{([^}]*)\}", value, route.template)
+                body = None
+                if method in ("POST", "PUT", "PATCH"):
+                    body = [{"id": 1, "variants": [{"id": 11, "stock": 3}]}] if "stock-price" in path else {"note": "x"}
+                response = api.request(method, "/v1/1" + path, json=body)
+                if response.status_code >= 400:
+                    failures.append((method, route.template, response.status_code))
+                # Los DELETE no deben romper los endpoints siguientes de la misma tienda
+                api.post("/mock/reset")
+        assert failures == []
+
+
+class TestListings:
+    """Paginación, filtros y datos de los listados"""
+
+    def test_pagination_headers(self, api):
+        response = api.get("/v1/1/products", params={"per_page": 30, "page": 2})
+        assert [p["id"] for p in response.json()] == list(range(31, 61))
+        assert response.headers["x-total-count"] == "100"
+        assert 'rel="next"' in response.headers["link"] and "page=3" in response.headers["link"]
+        last = api.get("/v1/1/products", params={"per_page": 30, "page": 5})
+        assert last.status_code == 404
+        assert last.json()["description"] == "Last page is 4"
+
+    def test_filters(self, api):
+        assert [p["id"] for p in api.get("/v1/1/products", params={"ids": "3,5,500"}).json()] == [3, 5]
+        assert api.get("/v1/1/products", params={"since_id": 98}).json()[0]["id"] == 99
+        assert api.get("/v1/1/orders", params={"fields": "id,status", "per_page": 1}).json() == [
+            {"id": 1, "status": "closed"}]
+        statuses = {o["status"] for o in api.get("/v1/1/orders", params={"status": "open"}).json()}
+        assert statuses == {"open"}
+        recent = api.get("/v1/1/customers", params={"updated_at_min": "2024-01-05T00:00:00+0000"}).json()
+        assert [c["id"] for c in recent] == [96, 97, 98, 99, 100]
+
+    def test_paginator_against_mock(self):
+        async def run():
+            client = _client(_mock(items=520))
+            paginator = Paginator(client, "1", "/products", per_page=200, prefetch=2)
+            ids = [item["id"] async for item in paginator]
+            await client.aclose()
+            return ids, paginator.page_count
+
+        ids, pages = asyncio.run(run())
+        assert ids == list(range(1, 521))
+        assert pages == 3
+
+
+class TestWrites:
+    """Las escrituras se reflejan en los GET"""
+
+    def test_create_update_delete(self, api):
+        created = api.post("/v1/1/customers", json={"name": "Ana", "email": "ana@example.com"})
+        assert created.status_code == 201
+        customer_id = created.json()["id"]
+        assert customer_id == 101
+        api.put(f"/v1/1/customers/{customer_id}", json={"note": "vip"})
+        assert api.get(f"/v1/1/customers/{customer_id}").json()["note"] == "vip"
+        api.delete(f"/v1/1/customers/{customer_id}")
+        assert api.get(f"/v1/1/customers/{customer_id}").status_code == 404
+        # Cada tienda tiene sus datos
+        assert api.get("/v1/2/customers").headers["x-total-count"] == "100"
+
+    def test_order_actions(self, api):
+        assert api.post("/v1/1/orders/4/close").json()["status"] == "closed"
+        assert api.post("/v1/1/orders/4/pay").json()["payment_status"] == "paid"
+
+    def test_bulk_stock_price(self):
+        async def run():
+            mock = _mock()
+            client = _client(mock)
+            rows = [{"product_id": 1, "variant_id": 11, "stock": 42}, {"product_id": 2, "variant_id": 21,
+                                                                         "price": "9.99"}]
+            report = await bulk_update_stock_price(client, "1", rows)
+            variants = (await client.request("1", "GET", "/products/1/variants")).json()
+            await client.aclose()
+            return report, variants
+
+        report, variants = asyncio.run(run())
+        assert report["ok"] == 2
+        assert variants[0]["stock"] == 42
+
+    def test_batch_get(self):
+        async def run():
+            client = _client(_mock())
+            batch = BatchGet(client, "1", "/orders/{id}", [1, 2, 999], concurrency=3)
+            document = b"".join([chunk async for chunk in json_document_chunks(batch)])
+            await client.aclose()
+            return httpx.Response(200, content=document).json()
+
+        document = asyncio.run(run())
+        assert sorted(o["id"] for o in document["items"]) == [1, 2]
+        assert document["missing"] == ["999"]
+
+
+class TestFaults:
+    """Rate limit, latencia y errores inyectados"""
+
+    def test_rate_limit_headers_and_429(self):
+        api = TestClient(create_app(_mock(rate_limit=True, bucket=3, leak_rate=0.001)))
+        first = api.get("/v1/1/store")
+        assert first.headers["x-rate-limit-limit"] == "3"
+        assert first.headers["x-rate-limit-remaining"] == "2"
+        for _ in range(2):
+            api.get("/v1/1/store")
+        throttled = api.get("/v1/1/store")
+        assert throttled.status_code == 429
+        assert int(throttled.headers["x-rate-limit-reset"]) > 0
+        # Otra tienda tiene su propio bucket
+        assert api.get("/v1/2/store").status_code == 200
+
+    def test_scheduler_paces_against_mock(self):
+        async def run():
+            mock = _mock(rate_limit=True, bucket=4, leak_rate=40)
+            client = _client(mock, scheduler=RateLimitScheduler(capacity=4, leak_rate=40))
+            responses = await asyncio.gather(*[client.request("1", "GET", "/store") for _ in range(12)])
+            await client.aclose()
+            return [r.status_code for r in responses], mock.stats()
+
+        statuses, stats = asyncio.run(run())
+        assert statuses == [200] * 12
+        assert stats["throttled_429"] == 0
+
+    def test_latency(self):
+        api = TestClient(create_app(_mock(latency_ms=30)))
+        started = time.perf_counter()
+        api.get("/v1/1/store")
+        assert time.perf_counter() - started >= 0.03
+
+    def test_error_injection(self):
+        api = TestClient(create_app(_mock(error_rate=1.0, error_statuses=(503,))))
+        assert api.get("/v1/1/products").status_code == 503
+        forced = TestClient(create_app(_mock()))
+        assert forced.get("/v1/1/products", headers={"x-mock-status": "502"}).status_code == 502
+        assert forced.get("/mock/stats").json()["injected_errors"] == 1
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la auto-paginación (pagination.py)
+Usan httpx.MockTransport con una tienda simulada de N productos
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from pagination import PAGINATION_MODES, Paginator, PaginationError, ndjson_chunks, sse_chunks, supports_since_id
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+class FakeStore:
+    """Listado /products de `total` items con page/per_page y since_id"""
+
+    def __init__(self, total, total_header=False, delay=0.0):
+        self.total = total
+        self.total_header = total_header
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            params = request.url.params
+            per_page = int(params.get("per_page", 30))
+            if "since_id" in params:
+                first = int(params["since_id"]) + 1
+            else:
+                page = int(params.get("page", 1))
+                first = (page - 1) * per_page + 1
+                if page > 1 and first > self.total:
+                    return httpx.Response(404, json={"code": 404, "description": "Last page is 1"})
+            ids = range(first, min(first + per_page, self.total + 1))
+            headers = {"x-total-count": str(self.total)} if self.total_header else {}
+            return httpx.Response(200, json=[{"id": i} for i in ids], headers=headers)
+        finally:
+            self.active -= 1
+
+
+def _client(handler):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                            transport=httpx.MockTransport(handler))
+
+
+def _collect(paginator):
+    async def run():
+        return [item["id"] async for item in paginator]
+    return asyncio.run(run())
+
+
+class TestPaginator:
+    """Pruebas del recorrido de páginas"""
+
+    def test_walks_all_pages_in_order(self):
+        store = FakeStore(600)
+        paginator = Paginator(_client(store), "1", "/products", prefetch=3)
+        assert _collect(paginator) == list(range(1, 601))
+        assert paginator.page_count == 3
+        assert paginator.items == 600
+        assert all(r.url.params["per_page"] == "250" for r in store.requests)
+
+    def test_exact_multiple_stops_on_404(self):
+        store = FakeStore(500)
+        paginator = Paginator(_client(store), "1", "/products", prefetch=1)
+        assert len(_collect(paginator)) == 500
+        assert [r.url.params["page"] for r in store.requests] == ["1", "2", "3"]
+
+    def test_total_count_bounds_requests(self):
+        store = FakeStore(500, total_header=True)
+        paginator = Paginator(_client(store), "1", "/products", prefetch=1)
+        assert len(_collect(paginator)) == 500
+        assert len(store.requests) == 2
+        assert paginator.total == 500
+
+    def test_prefetch_is_bounded(self):
+        store = FakeStore(2500, delay=0.01)
+        paginator = Paginator(_client(store), "1", "/products", prefetch=3)
+        assert len(_collect(paginator)) == 2500
+        assert 1 < store.max_active <= 3
+
+    def test_max_pages(self):
+        store = FakeStore(2500)
+        paginator = Paginator(_client(store), "1", "/products", per_page=100, max_pages=2, prefetch=4)
+        assert _collect(paginator) == list(range(1, 201))
+        assert len(store.requests) == 2
+
+    def test_since_id(self):
+        store = FakeStore(520)
+        paginator = Paginator(_client(store), "1", "/products", mode="since_id",
+                              params={"since_id": 10, "page": 5})
+        assert _collect(paginator) == list(range(11, 521))
+        assert [r.url.params.get("since_id") for r in store.requests] == ["10", "260", "510"]
+        assert all("page" not in r.url.params for r in store.requests)
+
+    def test_start_page(self):
+        store = FakeStore(600)
+        paginator = Paginator(_client(store), "1", "/products", params={"page": "2"}, prefetch=1)
+        assert _collect(paginator) == list(range(251, 601))
+        assert [r.url.params["page"] for r in store.requests] == ["2", "3"]
+
+    def test_since_id_from_query_string(self):
+        store = FakeStore(520)
+        paginator = Paginator(_client(store), "1", "/products", mode="since_id", params={"since_id": "10"})
+        assert paginator.since_id == 10
+        assert _collect(paginator) == list(range(11, 521))
+
+    def test_invalid_numbers(self):
+        with pytest.raises(ValueError, match="since_id"):
+            Paginator(_client(FakeStore(1)), "1", "/products", mode="since_id", params={"since_id": "abc"})
+        with pytest.raises(ValueError, match="page"):
+            Paginator(_client(FakeStore(1)), "1", "/products", params={"page": "x"})
+
+    def test_since_id_ignored_by_server(self):
+        def handler(request):
+            return httpx.Response(200, json=[{"id": i} for i in range(1, 11)])
+
+        with pytest.raises(PaginationError, match="since_id"):
+            _collect(Paginator(_client(handler), "1", "/products", mode="since_id", per_page=10))
+
+    def test_error_raises(self):
+        def handler(request):
+            return httpx.Response(401, json={"description": "Invalid access token"})
+
+        with pytest.raises(PaginationError) as exc:
+            _collect(Paginator(_client(handler), "1", "/products"))
+        assert exc.value.status_code == 401
+        assert exc.value.page == 1
+
+    @pytest.mark.parametrize("mode", PAGINATION_MODES)
+    @pytest.mark.parametrize("body", [{"description": "no es una lista"}, [1, 2], [{"name": "sin id"}]])
+    def test_invalid_body_raises(self, mode, body):
+        def handler(request):
+            return httpx.Response(200, json=body)
+
+        with pytest.raises(PaginationError) as exc:
+            _collect(Paginator(_client(handler), "1", "/products", mode=mode))
+        assert exc.value.status_code == 200
+        assert exc.value.page == 1
+
+    def test_non_json_body_raises(self):
+        def handler(request):
+            return httpx.Response(200, text="<html>mantenimiento</html>")
+
+        with pytest.raises(PaginationError, match="no JSON"):
+            _collect(Paginator(_client(handler), "1", "/products"))
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            Paginator(_client(FakeStore(1)), "1", "/products", mode="cursor")
+
+    def test_supports_since_id(self):
+        assert supports_since_id("/orders", {})
+        assert supports_since_id("/customers", {"parameters": {"since_id": {}}})
+        assert not supports_since_id("/categories", {"parameters": {"page": {}}})
+
+
+class TestChunks:
+    """Pruebas de la salida NDJSON / SSE"""
+
+    def _chunks(self, encoder, paginator):
+        async def run():
+            return [chunk async for chunk in encoder(paginator)]
+        return asyncio.run(run())
+
+    def test_ndjson_one_chunk_per_page(self):
+        paginator = Paginator(_client(FakeStore(300)), "1", "/products", per_page=100)
+        chunks = self._chunks(ndjson_chunks, paginator)
+        assert len(chunks) == 3
+        lines = b"".join(chunks).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == list(range(1, 301))
+
+    def test_ndjson_error_line(self):
+        def handler(request):
+            return httpx.Response(500, text="boom")
+
+        chunks = self._chunks(ndjson_chunks, Paginator(_client(handler), "1", "/products"))
+        assert json.loads(chunks[-1])["status_code"] == 500
+
+    def test_sse_end_event(self):
+        paginator = Paginator(_client(FakeStore(3, total_header=True)), "1", "/products")
+        text = b"".join(self._chunks(sse_chunks, paginator)).decode()
+        assert text.count("event: item\n") == 3
+        assert 'event: end\ndata: {"items":3,"pages":1,"total":3}' in text
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Pruebas del scheduler de rate limit por tienda (rate_limiter.py)
+"""
+
+import asyncio
+
+import httpx
+
+from rate_limiter import (PRIORITY_HIGH, PRIORITY_LOW, LeakyBucket, RateLimitScheduler,
+                          StoreScheduler)
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLeakyBucket:
+    """Pruebas del bucket local"""
+
+    def test_fills_and_leaks(self):
+        clock = FakeClock()
+        bucket = LeakyBucket(capacity=4, leak_rate=2, clock=clock)
+        for _ in range(4):
+            assert bucket.delay() == 0
+            bucket.take()
+        assert bucket.delay() == 0.5
+        clock.now += 0.5
+        assert bucket.delay() == 0
+
+    def test_sync_from_headers(self):
+        bucket = LeakyBucket(clock=FakeClock())
+        bucket.sync(limit=40, remaining=10, reset_ms=15000, in_flight=2)
+        assert bucket.level == 32
+        assert bucket.leak_rate == 2.0
+
+    def test_block(self):
+        clock = FakeClock()
+        bucket = LeakyBucket(capacity=40, leak_rate=2, clock=clock)
+        bucket.block(3)
+        assert bucket.delay() == 3
+        clock.now += 3
+        assert bucket.delay() == 0
+
+
+class TestStoreScheduler:
+    """Pruebas de la cola con prioridad"""
+
+    def test_paces_instead_of_failing(self):
+        async def run():
+            scheduler = StoreScheduler(LeakyBucket(capacity=2, leak_rate=50))
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await asyncio.gather(*(scheduler.acquire() for _ in range(5)))
+            return loop.time() - started, scheduler.stats()
+
+        elapsed, stats = asyncio.run(run())
+        # 2 entran de inmediato, los otros 3 a 50/s
+        assert elapsed >= 0.05
+        assert stats["requests"] == 5 and stats["delayed"] >= 3
+        assert stats["in_flight"] == 5 and stats["queue_depth"] == 0
+
+    def test_priority_order(self):
+        async def run():
+            scheduler = StoreScheduler(LeakyBucket(capacity=1, leak_rate=100))
+            await scheduler.acquire()
+            order = []
+
+            async def call(name, priority):
+                await scheduler.acquire(priority)
+                order.append(name)
+
+            low = asyncio.ensure_future(call("low", PRIORITY_LOW))
+            await asyncio.sleep(0)
+            high = asyncio.ensure_future(call("high", PRIORITY_HIGH))
+            await asyncio.sleep(0)
+            depth = scheduler.queue_depth
+            await asyncio.gather(low, high)
+            return order, depth
+
+        order, depth = asyncio.run(run())
+        assert depth == 2
+        assert order == ["high", "low"]
+
+    def test_cancelled_waiter_is_skipped(self):
+        async def run():
+            scheduler = StoreScheduler(LeakyBucket(capacity=1, leak_rate=100))
+            await scheduler.acquire()
+            waiting = asyncio.ensure_future(scheduler.acquire())
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await scheduler.acquire()
+            return scheduler.stats()
+
+        stats = asyncio.run(run())
+        assert stats["requests"] == 2 and stats["queue_depth"] == 0
+
+    def test_429_blocks_store(self):
+        scheduler = StoreScheduler(LeakyBucket(capacity=40, leak_rate=2))
+        scheduler.in_flight = 1
+        scheduler.release(429, {"retry-after": "2"})
+        assert scheduler.throttled == 1
+        assert 1.9 < scheduler.bucket.delay() <= 2
+
+
+class TestClientIntegration:
+    """El cliente pasa por el scheduler y lo sincroniza con los headers"""
+
+    def test_headers_sync_bucket(self):
+        def handler(request):
+            return httpx.Response(200, json={}, headers={
+                "x-rate-limit-limit": "40", "x-rate-limit-remaining": "5", "x-rate-limit-reset": "17500"})
+
+        async def run():
+            client = TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                      transport=httpx.MockTransport(handler),
+                                      scheduler=RateLimitScheduler())
+            await client.request("7", "GET", "/products")
+            await client.aclose()
+            return client.stats()["rate_limit"]["7"]
+
+        stats = asyncio.run(run())
+        assert stats["bucket_level"] == 35
+        assert stats["leak_rate"] == 2.0
+        assert stats["in_flight"] == 0 and stats["requests"] == 1
+
+    def test_released_on_transport_error(self):
+        def handler(request):
+            raise httpx.ConnectError("caído", request=request)
+
+        async def run():
+            client = TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                      transport=httpx.MockTransport(handler),
+                                      scheduler=RateLimitScheduler())
+            try:
+                await client.request("7", "GET", "/products")
+            except httpx.ConnectError:
+                pass
+            await client.aclose()
+            return client.scheduler.stats()["7"]
+
+        assert asyncio.run(run())["in_flight"] == 0
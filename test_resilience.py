@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Pruebas de reintentos y circuit breaker (resilience.py)
+Usan un MockTransport que inyecta fallos según un guion
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from rate_limiter import RateLimitScheduler
+from resilience import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, CircuitOpenError,
+                        RetryPolicy, parse_retry_after)
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FaultInjector:
+    """
+    Transport que responde según un guion: cada elemento es un status, un
+    (status, headers) o una excepción de httpx a lanzar. Agotado el guion
+    responde 200.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        fault = self.script.pop(0) if self.script else 200
+        if isinstance(fault, type) and issubclass(fault, httpx.HTTPError):
+            raise fault("fallo inyectado", request=request)
+        status, headers = fault if isinstance(fault, tuple) else (fault, {})
+        return httpx.Response(status, json={"status": status}, headers=headers)
+
+
+class Sleeps:
+    """Reemplazo de asyncio.sleep que registra las esperas"""
+
+    def __init__(self):
+        self.delays = []
+
+    async def __call__(self, seconds):
+        self.delays.append(seconds)
+
+
+def _client(injector, retry=None, breakers=None, scheduler=None):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1", single_flight=False),
+                            transport=httpx.MockTransport(injector), scheduler=scheduler,
+                            retry=retry, breakers=breakers)
+
+
+def _policy(**kwargs):
+    return RetryPolicy(random=lambda: 1.0, sleep=Sleeps(), **kwargs)
+
+
+def _call(client, method="GET", path="/products", **kwargs):
+    async def run():
+        try:
+            return await client.request("1", method, path, **kwargs)
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+class TestRetryPolicy:
+    """Pruebas de qué se reintenta y cuánto se espera"""
+
+    def test_idempotency(self):
+        assert RetryPolicy.retryable("GET", httpx.Response(503))
+        assert RetryPolicy.retryable("PUT", httpx.Response(500))
+        assert RetryPolicy.retryable("DELETE", httpx.Response(502))
+        assert not RetryPolicy.retryable("POST", httpx.Response(503))
+        assert not RetryPolicy.retryable("PATCH", httpx.Response(504))
+        assert not RetryPolicy.retryable("GET", httpx.Response(404))
+        # El 429 y los errores de conexión no llegaron a aplicarse
+        assert RetryPolicy.retryable("POST", httpx.Response(429))
+        assert RetryPolicy.retryable("POST", error=httpx.ConnectError("x"))
+        assert not RetryPolicy.retryable("POST", error=httpx.ReadTimeout("x"))
+        assert RetryPolicy.retryable("GET", error=httpx.ReadTimeout("x"))
+
+    def test_exponential_backoff_with_jitter(self):
+        policy = RetryPolicy(max_retries=5, base_delay=0.5, max_delay=3.0, random=lambda: 1.0)
+        delays = [policy.next_delay("GET", attempt, httpx.Response(503)) for attempt in range(5)]
+        assert delays == [0.5, 1.0, 2.0, 3.0, 3.0]
+        assert policy.next_delay("GET", 5, httpx.Response(503)) is None
+        assert policy.gave_up == 1
+        jittered = RetryPolicy(base_delay=1.0, random=lambda: 0.25)
+        assert jittered.next_delay("GET", 2, httpx.Response(503)) == 1.0
+
+    def test_retry_after(self):
+        policy = RetryPolicy(base_delay=0.5, max_retry_after=10, random=lambda: 0.0)
+        assert policy.next_delay("GET", 0, httpx.Response(429, headers={"retry-after": "4"})) == 4.0
+        assert policy.next_delay("GET", 0, httpx.Response(429, headers={"retry-after": "30"})) is None
+        assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+        assert parse_retry_after({"retry-after": "mañana"}) is None
+
+
+class TestClientRetries:
+    """El cliente reintenta contra el mock con fallos"""
+
+    def test_get_recovers_from_transient_errors(self):
+        injector = FaultInjector(503, httpx.ReadTimeout, (429, {"retry-after": "2"}))
+        retry = _policy(base_delay=0.1)
+        response = _call(_client(injector, retry=retry))
+        assert response.status_code == 200
+        assert len(injector.requests) == 4
+        assert retry.sleep.delays == [0.1, 0.2, 2.1]
+        assert retry.stats()["retries"] == 3
+
+    def test_post_not_retried_after_5xx(self):
+        injector = FaultInjector(503)
+        response = _call(_client(injector, retry=_policy()), "POST", "/products", json={"name": "x"})
+        assert response.status_code == 503
+        assert len(injector.requests) == 1
+
+    def test_post_retried_after_429(self):
+        injector = FaultInjector((429, {"retry-after": "1"}), 201)
+        response = _call(_client(injector, retry=_policy()), "POST", "/products", json={"name": "x"})
+        assert response.status_code == 201
+        assert len(injector.requests) == 2
+
+    def test_gives_up(self):
+        injector = FaultInjector(500, 500, 500, 500, 500)
+        retry = _policy(max_retries=2)
+        assert _call(_client(injector, retry=retry)).status_code == 500
+        assert len(injector.requests) == 3
+        assert retry.gave_up == 1
+
+    def test_transport_error_raised_after_retries(self):
+        injector = FaultInjector(httpx.ConnectError, httpx.ConnectError)
+        with pytest.raises(httpx.ConnectError):
+            _call(_client(injector, retry=_policy(max_retries=1)))
+        assert len(injector.requests) == 2
+
+    def test_retries_go_through_scheduler(self):
+        injector = FaultInjector(502)
+        scheduler = RateLimitScheduler()
+        _call(_client(injector, retry=_policy(), scheduler=scheduler))
+        stats = scheduler.stats()["1"]
+        assert stats["requests"] == 2 and stats["in_flight"] == 0
+
+
+class TestCircuitBreaker:
+    """Pruebas del circuit breaker por tienda"""
+
+    def test_state_machine(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+        for _ in range(2):
+            breaker.failure()
+        assert breaker.state == CLOSED
+        breaker.success()
+        for _ in range(3):
+            assert breaker.allow() is None
+            breaker.failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() == 10
+
+        clock.now += 10
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is None
+        # Sólo un request de prueba a la vez
+        assert breaker.allow() is not None
+        breaker.failure()
+        assert breaker.state == OPEN and breaker.opened == 2
+
+        clock.now += 10
+        assert breaker.allow() is None
+        breaker.success()
+        assert breaker.state == CLOSED
+        assert breaker.stats()["rejected"] == 2
+
+    def test_fails_fast_per_store(self):
+        clock = FakeClock()
+        injector = FaultInjector(503, 503, 503)
+        breakers = CircuitBreakers(failure_threshold=3, reset_timeout=30, clock=clock)
+        client = _client(injector, retry=_policy(max_retries=5), breakers=breakers)
+
+        async def run():
+            with pytest.raises(CircuitOpenError) as raised:
+                await client.request("1", "GET", "/products")
+            # Otra tienda no se ve afectada
+            other = await client.request("2", "GET", "/products")
+            await client.aclose()
+            return raised.value, other
+
+        error, other = asyncio.run(run())
+        # 3 intentos abren el circuito; los reintentos restantes fallan sin llamar a la API
+        assert [r.url.path for r in injector.requests].count("/v1/1/products") == 3
+        assert error.retry_in == 30
+        assert other.status_code == 200
+        assert breakers.stats()["1"]["state"] == OPEN
+        assert breakers.stats()["2"]["state"] == CLOSED
+
+    def test_4xx_does_not_open(self):
+        injector = FaultInjector(404, 404, 404)
+        breakers = CircuitBreakers(failure_threshold=2)
+        client = _client(injector, breakers=breakers)
+        for _ in range(3):
+            assert _call(client).status_code == 404
+        assert breakers.stats()["1"]["state"] == CLOSED
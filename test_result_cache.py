@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché de resultados acotada (result_cache.py)
+"""
+
+from result_cache import ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache:
+    """Pruebas de LRU, límites y contadores"""
+
+    def test_hit_and_miss(self):
+        cache = ResultCache()
+        assert cache.get("a") is None
+        cache.put("a", [1, 2])
+        assert cache.get("a") == [1, 2]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_bounded_by_bytes(self):
+        cache = ResultCache(max_entries=100, max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.put("c", "123")
+        assert len(cache) == 2 and cache.size_bytes == 8
+        assert cache.get("a") is None
+
+        cache.put("huge", "x" * 11)
+        assert cache.get("huge") is None
+        assert len(cache) == 2
+
+    def test_replace_keeps_byte_count(self):
+        cache = ResultCache()
+        cache.put("a", "1234")
+        cache.put("a", "12")
+        assert len(cache) == 1 and cache.size_bytes == 2
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 9
+        assert cache.get("a") == 1
+        clock.now = 11
+        assert cache.get("a") is None
+        assert cache.expirations == 1 and len(cache) == 0
+
+    def test_ttl_per_entry(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.put("a", 1, ttl=2)
+        cache.put("b", 2)
+        clock.now = 5
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_get_or_compute(self):
+        cache = ResultCache()
+        calls = []
+        for _ in range(3):
+            assert cache.get_or_compute("k", lambda: calls.append(1) or "v") == "v"
+        assert len(calls) == 1
+
+    def test_disabled(self):
+        cache = ResultCache(max_entries=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("X_CACHE_MAX_ENTRIES", "7")
+        monkeypatch.setenv("X_CACHE_TTL", "30")
+        cache = ResultCache.from_env("X_CACHE")
+        assert cache.max_entries == 7 and cache.ttl == 30.0
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Pruebas del servidor MCP por stdio (server.py) con una sesión en memoria
+No requieren lanzar el proceso
+"""
+
+import asyncio
+import json
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from server import TiendaNubeMCPServer
+
+
+@pytest.fixture(scope="module")
+def mcp_server():
+    return TiendaNubeMCPServer()
+
+
+def _run(mcp_server, calls):
+    async def session():
+        async with create_connected_server_and_client_session(mcp_server.server) as client:
+            return await calls(client)
+    return asyncio.run(session())
+
+
+class TestStdioServer:
+    """Pruebas de las herramientas expuestas por stdio"""
+
+    def test_list_tools(self, mcp_server):
+        result = _run(mcp_server, lambda client: client.list_tools())
+        names = [tool.name for tool in result.tools]
+        assert names == [tool["name"] for tool in mcp_server.api_server.get_tools_definition()]
+
+    def test_call_tool_uses_shared_engine(self, mcp_server):
+        result = _run(mcp_server, lambda client: client.call_tool(
+            "search_endpoint", {"resource": "products", "query": "stock"}))
+        assert not result.isError
+        data = json.loads(result.content[0].text)
+        assert data[0]["path"] == "/products/stock-price"
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Pruebas del espejo SQLite de la tienda (store_mirror.py)
+Usan httpx.MockTransport y una base en memoria
+"""
+
+import asyncio
+import multiprocessing
+
+import httpx
+import pytest
+
+from store_mirror import StoreMirror, run_periodic_sync, sync_resource, sync_store
+from tiendanube_client import ClientConfig, TiendaNubeClient
+
+
+def _product(pid, stock, updated_at="2024-01-01T00:00:00+0000"):
+    return {"id": pid, "name": {"es": f"Producto {pid}"}, "handle": {"es": f"p-{pid}"},
+            "published": True, "updated_at": updated_at,
+            "variants": [{"id": pid * 10, "price": "10.50", "stock": stock, "sku": f"SKU-{pid}"},
+                         {"id": pid * 10 + 1, "price": "12.00", "stock": None,
+                          "inventory_levels": [{"location_id": "A", "stock": 2}, {"location_id": "B", "stock": 1}]}]}
+
+
+class FakeApi:
+    """Tienda con productos, órdenes y clientes; responde since_id, page y updated_at_min"""
+
+    def __init__(self):
+        self.data = {
+            "products": [_product(i, i, f"2024-01-0{i}T00:00:00+0000") for i in range(1, 8)],
+            "orders": [{"id": 100 + i, "number": i, "status": "open", "total": "99.90",
+                        "customer": {"id": 5}, "created_at": f"2024-01-0{i}T00:00:00+0000",
+                        "updated_at": f"2024-01-0{i}T00:00:00+0000"} for i in range(1, 4)],
+            "customers": [{"id": 5, "name": "Ana", "email": "ana@example.com", "total_spent": "300",
+                           "updated_at": "2024-01-01T00:00:00+0000"}],
+        }
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        resource = request.url.path.rsplit("/", 1)[-1]
+        params = request.url.params
+        items = self.data[resource]
+        if "updated_at_min" in params:
+            items = [i for i in items if i["updated_at"] >= params["updated_at_min"]]
+        if "since_id" in params:
+            items = [i for i in items if i["id"] > int(params["since_id"])]
+        per_page = int(params.get("per_page", 30))
+        page = int(params.get("page", 1))
+        chunk = items[(page - 1) * per_page:page * per_page]
+        if page > 1 and not chunk:
+            return httpx.Response(404, json={"description": "Last page"})
+        return httpx.Response(200, json=chunk)
+
+
+@pytest.fixture
+def api():
+    return FakeApi()
+
+
+@pytest.fixture
+def client(api):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                            transport=httpx.MockTransport(api.handler))
+
+
+@pytest.fixture
+def mirror():
+    mirror = StoreMirror(":memory:")
+    yield mirror
+    mirror.close()
+
+
+class TestSync:
+    """Pruebas de sincronización completa e incremental"""
+
+    def test_full_then_incremental(self, api, client, mirror):
+        result = asyncio.run(sync_resource(mirror, client, "1", "products"))
+        assert result["mode"] == "full"
+        assert result["items"] == 7
+        assert "since_id" not in api.requests[0].url.params
+        assert mirror.query("1", "variants", limit=1000)["total"] == 14
+
+        api.data["products"][0] = _product(1, 0, updated_at="2024-02-01T00:00:00+0000")
+        api.requests.clear()
+        result = asyncio.run(sync_resource(mirror, client, "1", "products"))
+        assert result["mode"] == "incremental"
+        # updated_at_min es inclusivo: vuelve a traer el último visto
+        assert result["items"] == 2
+        assert api.requests[0].url.params["updated_at_min"] == "2024-01-07T00:00:00+0000"
+        assert mirror.query("1", "variants", where={"id": 10})["items"][0]["stock"] == 0
+
+    def test_full_sync_prunes_deleted(self, api, client, mirror):
+        asyncio.run(sync_resource(mirror, client, "1", "products"))
+        del api.data["products"][-1]
+        result = asyncio.run(sync_resource(mirror, client, "1", "products", full=True))
+        assert result["pruned"] == 3  # el producto y sus dos variantes
+        assert mirror.query("1", "products")["total"] == 6
+
+    def test_stale_full_sync_repeats(self, api, client, mirror):
+        asyncio.run(sync_resource(mirror, client, "1", "products"))
+        del api.data["products"][-1]
+        # Reinicio: sigue incremental mientras la última completa sea reciente
+        result = asyncio.run(sync_resource(mirror, client, "1", "products", full_every=3600))
+        assert result["mode"] == "incremental"
+        assert mirror.query("1", "products")["total"] == 7
+
+        with mirror._conn:
+            mirror._conn.execute("UPDATE sync_state SET last_full_sync = last_full_sync - 7200")
+        result = asyncio.run(sync_resource(mirror, client, "1", "products", full_every=3600))
+        assert result["mode"] == "full"
+        assert result["pruned"] == 3
+        state = mirror.get_state("1", "products")
+        assert state["last_full_sync"] == state["last_sync"]
+
+    def test_sync_store_all_resources(self, client, mirror):
+        results = asyncio.run(sync_store(mirror, client, "1"))
+        assert [r["resource"] for r in results] == ["products", "orders", "customers"]
+        stats = mirror.stats()
+        assert stats["rows"] == {"products": 7, "variants": 14, "orders": 3, "customers": 1}
+        assert {s["resource"] for s in stats["sync"]} == {"products", "orders", "customers"}
+
+
+class TestQuery:
+    """Pruebas de consultas con filtros"""
+
+    @pytest.fixture(autouse=True)
+    def synced(self, client, mirror):
+        asyncio.run(sync_store(mirror, client, "1"))
+
+    def test_filters_and_order(self, mirror):
+        result = mirror.query("1", "variants", where={"stock__lt": 5, "sku__null": False},
+                              order_by="-stock")
+        assert [v["id"] for v in result["items"]] == [40, 30, 20, 10]
+        assert result["total"] == 4
+
+    def test_inventory_levels_stock(self, mirror):
+        assert mirror.query("1", "variants", where={"id": 11})["items"][0]["inventory_levels"]
+        assert mirror.query("1", "variants", where={"stock": 3, "product_id": 1})["count"] == 1
+
+    def test_dates_and_in(self, mirror):
+        result = mirror.query("1", "orders", where={"created_at__gte": "2024-01-02", "customer_id__in": [5]})
+        assert [o["number"] for o in result["items"]] == [2, 3]
+
+    def test_other_store_is_isolated(self, mirror):
+        assert mirror.query("2", "products")["total"] == 0
+
+    def test_rejects_unknown_column(self, mirror):
+        with pytest.raises(ValueError, match="Columna"):
+            mirror.query("1", "products", where={"data": "x"})
+        with pytest.raises(ValueError, match="Operador"):
+            mirror.query("1", "products", where={"id__between": 1})
+        with pytest.raises(ValueError, match="Recurso"):
+            mirror.query("1", "sync_state")
+
+
+def _query_in_child(mirror, queue):
+    # Proceso hijo por fork: usa el mismo objeto que el padre
+    mirror.upsert("1", "products", [_product(2, 4)])
+    queue.put(mirror.query("1", "products")["total"])
+
+
+class TestProcesses:
+    """Conexión por proceso y un solo sincronizador entre workers"""
+
+    def test_connection_opens_lazily_per_process(self, tmp_path):
+        path = str(tmp_path / "mirror.db")
+        mirror = StoreMirror(path)
+        assert mirror._connection is None
+        mirror.upsert("1", "products", [_product(1, 3)])
+        parent_connection = mirror._connection
+
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        child = context.Process(target=_query_in_child, args=(mirror, queue))
+        child.start()
+        assert queue.get(timeout=10) == 2
+        child.join(10)
+        assert child.exitcode == 0
+
+        assert mirror._connection is parent_connection
+        assert mirror.query("1", "products")["total"] == 2
+        mirror.close()
+
+    def test_single_sync_leader(self, tmp_path, client):
+        path = str(tmp_path / "mirror.db")
+        first, second = StoreMirror(path), StoreMirror(path)
+        assert first.acquire_sync_lock()
+        assert first.acquire_sync_lock()
+        assert not second.acquire_sync_lock()
+
+        async def follower():
+            task = asyncio.create_task(run_periodic_sync(second, client, "1", None, 0.01,
+                                                         leader=second.acquire_sync_lock))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(follower())
+        assert second.get_state("1", "products") is None
+
+        # Si el líder termina, otro toma el lock
+        first.close()
+        assert second.acquire_sync_lock()
+        second.close()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cliente asíncrono de Tienda Nube (tiendanube_client.py)
+Usan httpx.MockTransport: no hacen llamadas de red
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from tiendanube_client import ClientConfig, TiendaNubeClient, build_path, response_payload
+
+
+def _client(handler, **config):
+    return TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1/", **config),
+                            transport=httpx.MockTransport(handler))
+
+
+class TestBuildPath:
+    """Pruebas de armado de paths"""
+
+    def test_fills_placeholders(self):
+        assert build_path("/products/{id}/variants/{variant_id}", {"id": 1, "variant_id": "x"}) \
+            == "/products/1/variants/x"
+        assert build_path("/products") == "/products"
+
+    def test_missing_param(self):
+        with pytest.raises(ValueError, match="id"):
+            build_path("/products/{id}", {})
+
+
+class TestTiendaNubeClient:
+    """Pruebas de las llamadas y los pools por tienda"""
+
+    def test_request(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json=[{"id": 1}], headers={"x-total-count": "1", "x-other": "a"})
+
+        async def run():
+            client = _client(handler)
+            response = await client.request(123, "get", "/products", access_token="tok",
+                                            params={"per_page": 5})
+            await client.aclose()
+            return response
+
+        payload = response_payload(asyncio.run(run()))
+        assert str(seen[0].url) == "http://mock.local/v1/123/products?per_page=5"
+        assert seen[0].method == "GET"
+        assert seen[0].headers["authentication"] == "bearer tok"
+        assert seen[0].headers["user-agent"]
+        assert payload == {"status_code": 200, "headers": {"x-total-count": "1"}, "data": [{"id": 1}]}
+
+    def test_json_body_and_text_response(self):
+        def handler(request):
+            return httpx.Response(422, text="bad " + json.loads(request.content)["name"])
+
+        async def run():
+            client = _client(handler)
+            response = await client.request("1", "POST", "/products", json={"name": "x"})
+            await client.aclose()
+            return response
+
+        assert response_payload(asyncio.run(run()))["data"] == "bad x"
+
+    def test_pool_per_store_bounded(self):
+        async def run():
+            client = _client(lambda request: httpx.Response(200, json={}), max_stores=2)
+            for store in ("1", "2", "1", "3"):
+                await client.request(store, "GET", "/store")
+            stores = list(client._clients)
+            await client.aclose()
+            return stores
+
+        # La tienda 2 es la menos usada cuando entra la 3
+        assert asyncio.run(run()) == ["1", "3"]
+
+    def test_config_from_env(self, monkeypatch):
+        monkeypatch.setenv("TIENDANUBE_API_BASE_URL", "http://localhost:9000/v1")
+        monkeypatch.setenv("TIENDANUBE_READ_TIMEOUT", "3")
+        config = ClientConfig.from_env()
+        assert config.base_url == "http://localhost:9000/v1"
+        assert config.read_timeout == 3.0
+        assert TiendaNubeClient(config).url_for("7", "/orders") == "http://localhost:9000/v1/7/orders"
+
+
+class TestSingleFlight:
+    """Pruebas de la unificación de GETs idénticos en vuelo"""
+
+    def _slow_handler(self, seen):
+        async def handler(request):
+            seen.append(request)
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, json={"id": 1, "path": request.url.path})
+        return handler
+
+    def test_identical_gets_share_request(self):
+        seen = []
+        client = _client(self._slow_handler(seen))
+
+        async def run():
+            return await asyncio.gather(*(
+                client.request("1", "GET", "/products/1", access_token="t", params={"a": 1, "b": 2})
+                for _ in range(5)))
+
+        responses = asyncio.run(run())
+        assert len(seen) == 1
+        assert all(r.json()["id"] == 1 for r in responses)
+        assert client.coalesced == 4
+        assert client.stats()["single_flight"]["in_flight"] == 0
+
+    def test_different_requests_not_shared(self):
+        seen = []
+        client = _client(self._slow_handler(seen))
+
+        async def run():
+            await asyncio.gather(
+                client.request("1", "GET", "/store", access_token="t"),
+                client.request("2", "GET", "/store", access_token="t"),
+                client.request("1", "GET", "/store", access_token="otro"),
+                client.request("1", "GET", "/store", access_token="t", params={"fields": "id"}),
+                client.request("1", "PUT", "/store", access_token="t", json={}),
+                client.request("1", "PUT", "/store", access_token="t", json={}),
+            )
+
+        asyncio.run(run())
+        assert len(seen) == 6
+        assert client.coalesced == 0
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        seen = []
+        client = _client(self._slow_handler(seen))
+
+        async def run():
+            first = asyncio.ensure_future(client.request("1", "GET", "/store"))
+            second = asyncio.ensure_future(client.request("1", "GET", "/store"))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()).status_code == 200
+        assert len(seen) == 1
+
+    def test_disabled(self):
+        seen = []
+        client = _client(self._slow_handler(seen), single_flight=False)
+
+        async def run():
+            await asyncio.gather(*(client.request("1", "GET", "/store") for _ in range(3)))
+
+        asyncio.run(run())
+        assert len(seen) == 3
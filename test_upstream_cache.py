@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché de respuestas de la API (upstream_cache.py)
+"""
+
+import asyncio
+import multiprocessing
+import threading
+
+import pytest
+
+from result_cache import ResultCache
+from upstream_cache import DiskCache, UpstreamCache, parse_ttls
+
+OK = {"status_code": 200, "headers": {}, "data": {"id": 1}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    clock = FakeClock()
+    if request.param == "memory":
+        cache = ResultCache(clock=clock)
+    else:
+        cache = DiskCache(str(tmp_path / "cache.sqlite"), clock=clock)
+    cache.fake_clock = clock
+    return cache
+
+
+def _put_in_child(cache, queue):
+    # Proceso hijo por fork: usa el mismo objeto que el padre
+    cache.put("b", {"y": 2}, ttl=60)
+    queue.put(cache.get("a"))
+
+
+class TestUpstreamCache:
+    """Pruebas de TTL por recurso e invalidación (ambos backends)"""
+
+    def test_hit_and_ttl(self, backend):
+        cache = UpstreamCache(backend, ttls={"products": 60})
+        cache.put("1", "products", "tok", "/products/1", {"fields": "id"}, OK)
+        assert cache.get("1", "products", "tok", "/products/1", {"fields": "id"}) == OK
+        assert cache.get("1", "products", "otro", "/products/1", {"fields": "id"}) is None
+        assert cache.get("2", "products", "tok", "/products/1", {"fields": "id"}) is None
+        backend.fake_clock.now += 61
+        assert cache.get("1", "products", "tok", "/products/1", {"fields": "id"}) is None
+
+    def test_per_resource_ttls(self, backend):
+        cache = UpstreamCache(backend, ttls={"products": 10})
+        assert cache.ttl_for("store") == 3600
+        assert cache.ttl_for("orders") == 0
+        assert cache.ttl_for("products") == 10
+        cache.put("1", "orders", None, "/orders", None, OK)
+        assert cache.get("1", "orders", None, "/orders") is None
+
+    def test_only_200(self, backend):
+        cache = UpstreamCache(backend)
+        cache.put("1", "store", None, "/store", None, {**OK, "status_code": 404})
+        assert cache.get("1", "store", None, "/store") is None
+
+    def test_invalidation_includes_related(self, backend):
+        cache = UpstreamCache(backend)
+        cache.put("1", "products", None, "/products", None, OK)
+        cache.put("1", "product_variants", None, "/products/1/variants", None, OK)
+        cache.put("1", "store", None, "/store", None, OK)
+        cache.put("2", "products", None, "/products", None, OK)
+
+        assert "products" in cache.invalidate("1", "product_variants")
+        assert cache.get("1", "products", None, "/products") is None
+        assert cache.get("1", "product_variants", None, "/products/1/variants") is None
+        assert cache.get("1", "store", None, "/store") == OK
+        assert cache.get("2", "products", None, "/products") == OK
+        assert cache.stats()["invalidations"] == 1
+
+    def test_invalidation_between_get_and_put(self, backend):
+        cache = UpstreamCache(backend)
+        key, cached = cache.lookup("1", "products", None, "/products")
+        assert cached is None
+        # Un webhook o una escritura invalida mientras el GET está en vuelo
+        cache.invalidate("1", "products")
+        cache.put("1", "products", None, "/products", None, OK, key=key)
+        assert cache.get("1", "products", None, "/products") is None
+        cache.put("1", "products", None, "/products", None, OK)
+        assert cache.get("1", "products", None, "/products") == OK
+
+
+    def test_async_api_off_the_loop_for_disk(self, backend):
+        cache = UpstreamCache(backend)
+        threads = []
+        get = backend.get
+        backend.get = lambda *args: threads.append(threading.get_ident()) or get(*args)
+
+        async def run():
+            key, cached = await cache.alookup("1", "products", None, "/products")
+            await cache.aput("1", "products", None, "/products", None, OK, key=key)
+            hit = (await cache.alookup("1", "products", None, "/products"))[1]
+            assert "products" in await cache.ainvalidate("1", "product_variants")
+            return cached, hit, (await cache.alookup("1", "products", None, "/products"))[1]
+
+        assert asyncio.run(run()) == (None, OK, None)
+        on_loop = [ident == threading.get_ident() for ident in threads]
+        assert on_loop == [not isinstance(backend, DiskCache)] * 3
+
+
+class TestDiskCache:
+    """Pruebas de los límites del backend en disco"""
+
+    def test_bounded_by_entries_lru(self, tmp_path):
+        clock = FakeClock()
+        cache = DiskCache(str(tmp_path / "c.sqlite"), max_entries=2, clock=clock)
+        cache.put("a", 1)
+        clock.now += 1
+        cache.put("b", 2)
+        clock.now += 1
+        assert cache.get("a") == 1
+        clock.now += 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_bounded_by_bytes(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "c.sqlite"), max_bytes=100)
+        for i in range(10):
+            cache.put(str(i), "x" * 30)
+        assert cache.stats()["bytes"] <= 100
+        cache.put("grande", "x" * 200)
+        assert cache.get("grande") is None
+
+    def test_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "c.sqlite")
+        DiskCache(path).put("a", {"x": 1}, ttl=60)
+        assert DiskCache(path).get("a") == {"x": 1}
+
+    def test_invalidation_reaches_every_worker(self, tmp_path):
+        # Dos workers: cada uno con su UpstreamCache sobre la misma base
+        path = str(tmp_path / "c.sqlite")
+        first, second = UpstreamCache(DiskCache(path)), UpstreamCache(DiskCache(path))
+        key = first.key("1", "products", None, "/products")
+        first.put("1", "products", None, "/products", None, OK)
+        assert second.get("1", "products", None, "/products") == OK
+
+        second.invalidate("1", "product_variants")
+        assert first.get("1", "products", None, "/products") is None
+        # Una respuesta leída antes de la escritura no vuelve a quedar visible
+        first.backend.put(key, OK, ttl=60, tag="1|products")
+        assert first.get("1", "products", None, "/products") is None
+        assert second.key("1", "products", None, "/products") != key
+
+    def test_connection_opens_per_process(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "c.sqlite"))
+        assert cache._connection is None
+        cache.put("a", {"x": 1}, ttl=60)
+
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        child = context.Process(target=_put_in_child, args=(cache, queue))
+        child.start()
+        assert queue.get(timeout=10) == {"x": 1}
+        child.join(10)
+        assert child.exitcode == 0
+        assert cache.get("b") == {"y": 2}
+        cache.close()
+
+
+def test_parse_ttls():
+    assert parse_ttls("orders=0, products=60,,bad") == {"orders": 0.0, "products": 60.0}
+    assert parse_ttls(None) == {}
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("UPSTREAM_CACHE", "off")
+    assert UpstreamCache.from_env() is None
+    monkeypatch.setenv("UPSTREAM_CACHE", "disk")
+    monkeypatch.setenv("UPSTREAM_CACHE_PATH", str(tmp_path / "u.sqlite"))
+    monkeypatch.setenv("UPSTREAM_CACHE_TTLS", "store=5")
+    cache = UpstreamCache.from_env()
+    assert isinstance(cache.backend, DiskCache)
+    assert cache.ttl_for("store") == 5
+
+
+def test_from_env_defaults_to_disk_with_workers(monkeypatch, tmp_path):
+    monkeypatch.delenv("UPSTREAM_CACHE", raising=False)
+    monkeypatch.delenv("GUNICORN_WORKERS", raising=False)
+    monkeypatch.setenv("UPSTREAM_CACHE_PATH", str(tmp_path / "u.sqlite"))
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    assert isinstance(UpstreamCache.from_env().backend, ResultCache)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert isinstance(UpstreamCache.from_env().backend, DiskCache)
+    monkeypatch.setenv("UPSTREAM_CACHE", "memory")
+    assert isinstance(UpstreamCache.from_env().backend, ResultCache)
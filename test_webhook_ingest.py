@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la ingesta de webhooks (webhook_ingest.py)
+Usan httpx.MockTransport y un espejo en memoria
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from store_mirror import StoreMirror
+from tiendanube_client import ClientConfig, TiendaNubeClient
+from webhook_ingest import (MirrorWebhookApplier, WebhookIngestor, parse_event, read_events,
+                            replay_into, sign, verify_signature)
+
+
+class Recorder:
+    """Applier que guarda los lotes recibidos"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, batch):
+        self.batches.append(batch)
+
+
+def _event(event, entity_id, store_id=1):
+    return {"store_id": store_id, "event": event, "id": entity_id}
+
+
+class TestSignature:
+    """Pruebas de la verificación HMAC"""
+
+    def test_verify(self):
+        body = b'{"store_id":1,"event":"product/updated","id":2}'
+        signature = sign(body, "secreto")
+        assert verify_signature(body, signature, "secreto")
+        assert verify_signature(body, signature.upper(), "secreto")
+        assert not verify_signature(body, signature, "otro")
+        assert not verify_signature(body + b" ", signature, "secreto")
+        assert not verify_signature(body, None, "secreto")
+
+    def test_parse_event(self):
+        assert parse_event(_event("order/paid", "7")) == {
+            "store_id": "1", "resource": "orders", "action": "paid", "id": 7, "event": "order/paid"}
+        assert parse_event(_event("app/uninstalled", 1)) is None
+        assert parse_event({"event": "product/created"}) is None
+
+
+class TestIngestor:
+    """Pruebas del buffer con combinación por entidad"""
+
+    def test_coalesces_per_entity(self):
+        recorder = Recorder()
+        ingestor = WebhookIngestor(recorder, batch_size=10)
+        for _ in range(5):
+            ingestor.offer(_event("product/updated", 1))
+        ingestor.offer(_event("product/updated", 2))
+        ingestor.offer(_event("product/deleted", 2))
+        ingestor.offer(_event("product/updated", 2))
+        ingestor.offer(_event("app/uninstalled", 1))
+        asyncio.run(ingestor.flush())
+
+        assert [(e["id"], e["action"]) for e in recorder.batches[0]] == [(1, "updated"), (2, "deleted")]
+        stats = ingestor.stats()
+        assert stats["received"] == 9
+        assert stats["coalesced"] == 6
+        assert stats["ignored"] == 1
+        assert stats["applied"] == 2
+
+    def test_bounded(self):
+        ingestor = WebhookIngestor(Recorder(), max_pending=2)
+        assert ingestor.offer(_event("order/created", 1))
+        assert ingestor.offer(_event("order/created", 2))
+        assert not ingestor.offer(_event("order/created", 3))
+        # Un evento de una entidad ya pendiente entra igual
+        assert ingestor.offer(_event("order/paid", 2))
+        assert ingestor.stats()["rejected_full"] == 1
+
+    def test_batches(self):
+        recorder = Recorder()
+        ingestor = WebhookIngestor(recorder, batch_size=3)
+        for i in range(7):
+            ingestor.offer(_event("customer/updated", i))
+        assert asyncio.run(ingestor.flush()) == 7
+        assert [len(b) for b in recorder.batches] == [3, 3, 1]
+
+    def test_run_flushes_in_background(self):
+        recorder = Recorder()
+        ingestor = WebhookIngestor(recorder, batch_size=2, flush_interval=10)
+
+        async def scenario():
+            task = asyncio.create_task(ingestor.run())
+            ingestor.offer(_event("product/updated", 1))
+            ingestor.offer(_event("product/updated", 2))
+            for _ in range(50):
+                await asyncio.sleep(0.01)
+                if recorder.batches:
+                    break
+            task.cancel()
+
+        asyncio.run(scenario())
+        assert len(recorder.batches) == 1
+
+    def test_failed_batch_is_counted(self):
+        async def failing(batch):
+            raise RuntimeError("boom")
+
+        ingestor = WebhookIngestor(failing)
+        ingestor.offer(_event("order/created", 1))
+        asyncio.run(ingestor.flush())
+        assert ingestor.stats()["failed_batches"] == 1
+
+    def test_failed_batch_is_retried_with_backoff(self):
+        now = [0.0]
+        calls = []
+
+        async def flaky(batch):
+            calls.append([event["id"] for event in batch])
+            if len(calls) < 3:
+                raise RuntimeError("boom")
+
+        ingestor = WebhookIngestor(flaky, max_retries=3, retry_backoff=1.0, clock=lambda: now[0])
+        ingestor.offer(_event("order/created", 1))
+        ingestor.offer(_event("order/created", 2))
+
+        async def scenario():
+            assert await ingestor.flush() == 0
+            # Todavía no venció la espera
+            assert await ingestor.flush() == 0
+            assert ingestor.stats()["retrying"] == 2
+            now[0] = 1.0
+            assert await ingestor.flush() == 0
+            now[0] = 2.5
+            assert await ingestor.flush() == 0
+            now[0] = 3.0
+            return await ingestor.flush()
+
+        assert asyncio.run(scenario()) == 2
+        assert calls == [[1, 2]] * 3
+        stats = ingestor.stats()
+        assert stats["failed_batches"] == 2
+        assert stats["retried"] == 4
+        assert stats["retrying"] == 0
+        assert stats["dead_lettered"] == 0
+
+    def test_exhausted_events_go_to_dead_letter(self, tmp_path):
+        now = [0.0]
+        path = tmp_path / "fallidos.ndjson"
+
+        async def failing(batch):
+            raise RuntimeError("boom")
+
+        ingestor = WebhookIngestor(failing, max_retries=2, retry_backoff=0.5,
+                                   dead_letter_path=str(path), clock=lambda: now[0])
+        ingestor.offer(_event("product/deleted", 5))
+
+        async def scenario():
+            for _ in range(3):
+                await ingestor.flush()
+                now[0] += 10
+
+        asyncio.run(scenario())
+        assert ingestor.stats()["failed_batches"] == 3
+        assert ingestor.stats()["dead_lettered"] == 1
+        assert list(ingestor.dead_letters) == [{"store_id": "1", "event": "product/deleted", "id": 5}]
+
+        # El archivo se puede volver a pasar por el replay
+        recorder = Recorder()
+        result = asyncio.run(replay_into(WebhookIngestor(recorder), read_events(str(path))))
+        assert result["applied"] == 1
+        assert recorder.batches[0][0]["action"] == "deleted"
+
+    def test_retry_keeps_newer_event(self):
+        now = [0.0]
+        recorder = Recorder()
+        fail = [True]
+
+        async def apply(batch):
+            if fail[0]:
+                raise RuntimeError("boom")
+            await recorder(batch)
+
+        ingestor = WebhookIngestor(apply, clock=lambda: now[0])
+        ingestor.offer(_event("product/updated", 1))
+        asyncio.run(ingestor.flush())
+        ingestor.offer(_event("product/deleted", 1))
+        fail[0] = False
+        now[0] = 5
+        asyncio.run(ingestor.flush())
+        assert [event["action"] for event in recorder.batches[0]] == ["deleted"]
+
+    def test_spill_on_shutdown(self):
+        async def failing(batch):
+            raise RuntimeError("boom")
+
+        ingestor = WebhookIngestor(failing)
+        ingestor.offer(_event("order/created", 1))
+        asyncio.run(ingestor.flush())
+        ingestor.offer(_event("order/created", 2))
+        assert ingestor.spill() == 2
+        assert len(ingestor) == 0
+        assert sorted(payload["id"] for payload in ingestor.dead_letters) == [1, 2]
+
+    def test_replay_file(self, tmp_path):
+        path = tmp_path / "eventos.ndjson"
+        path.write_text("\n".join(json.dumps(_event("product/updated", i % 10)) for i in range(100)) + "\n")
+        recorder = Recorder()
+        result = asyncio.run(replay_into(WebhookIngestor(recorder, batch_size=4), read_events(str(path))))
+        assert result["received"] == 100
+        assert result["applied"] == 10
+
+
+class TestMirrorApplier:
+    """Pruebas de la aplicación de lotes al espejo"""
+
+    @pytest.fixture
+    def mirror(self):
+        mirror = StoreMirror(":memory:")
+        mirror.upsert("1", "products", [{"id": 1, "variants": [{"id": 10, "stock": 1}]},
+                                        {"id": 2, "variants": []}])
+        mirror.upsert("1", "orders", [{"id": 5, "status": "open"}])
+        yield mirror
+        mirror.close()
+
+    def test_applies_batch(self, mirror):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.path.endswith("/products"):
+                return httpx.Response(200, json=[{"id": 1, "variants": [{"id": 10, "stock": 0}]}])
+            if request.url.path.endswith("/orders/5"):
+                return httpx.Response(200, json={"id": 5, "status": "closed"})
+            return httpx.Response(404, json={})
+
+        client = TiendaNubeClient(ClientConfig(base_url="http://mock.local/v1"),
+                                  transport=httpx.MockTransport(handler))
+        applier = MirrorWebhookApplier(mirror, client, lambda store_id: "tok")
+        batch = [parse_event(e) for e in (_event("product/updated", 1), _event("product/updated", 3),
+                                          _event("product/deleted", 2), _event("order/paid", 5))]
+        asyncio.run(applier(batch))
+
+        # Un solo GET /products?ids=... para los productos del lote
+        product_requests = [r for r in requests if r.url.path.endswith("/products")]
+        assert len(product_requests) == 1
+        assert product_requests[0].url.params["ids"] == "1,3"
+        assert mirror.query("1", "variants", where={"id": 10})["items"][0]["stock"] == 0
+        assert mirror.query("1", "products", where={"id__in": [2, 3]})["total"] == 0
+        assert mirror.query("1", "orders")["items"][0]["status"] == "closed"
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Cliente HTTP asíncrono para la API de Tienda Nube
+Mantiene un pool de conexiones keep-alive (HTTP/2 si está disponible) por
+tienda, compartido por todas las herramientas que llaman a la API real.
+
+La URL de cada llamada es `{base_url}/{store_id}{path}`; el base URL se
+configura con TIENDANUBE_API_BASE_URL para poder apuntar a un mock local.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import httpx
+
+from rate_limiter import PRIORITY_NORMAL, RateLimitScheduler
+from resilience import CircuitBreakers, CircuitOpenError, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.tiendanube.com/v1"
+
+# Headers de la respuesta que se devuelven al agente
+RESPONSE_HEADERS = (
+    "link",
+    "x-total-count",
+    "x-rate-limit-limit",
+    "x-rate-limit-remaining",
+    "x-rate-limit-reset",
+    "retry-after",
+)
+
+_PATH_PARAM_RE = re.compile(r"\{([^}/]*)\}")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def build_path(template: str, path_params: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    Completar los placeholders de un path del catálogo
+
+    build_path('/products/{id}/variants', {'id': 12}) -> '/products/12/variants'
+
+    Raises:
+        ValueError: si falta algún parámetro del path
+    """
+    path_params = path_params or {}
+    missing = [name for name in _PATH_PARAM_RE.findall(template) if name not in path_params]
+    if missing:
+        raise ValueError(f"Faltan parámetros de path: {', '.join(missing)}")
+    return _PATH_PARAM_RE.sub(lambda m: str(path_params[m.group(1)]), template)
+
+
+class ClientConfig:
+    """Configuración del cliente (ver ClientConfig.from_env para las variables)"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL,
+                 user_agent: str = "TiendaNube MCP (soporte@example.com)",
+                 auth_header: str = "Authentication", auth_scheme: str = "bearer",
+                 http2: bool = True, max_connections: int = 20,
+                 max_keepalive_connections: int = 10, keepalive_expiry: float = 60.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 write_timeout: float = 30.0, pool_timeout: float = 10.0,
+                 max_stores: int = 256, single_flight: bool = True):
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.auth_header = auth_header
+        self.auth_scheme = auth_scheme
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.pool_timeout = pool_timeout
+        self.max_stores = max_stores
+        self.single_flight = single_flight
+
+    @classmethod
+    def from_env(cls) -> "ClientConfig":
+        """
+        Leer la configuración del entorno
+
+        TIENDANUBE_API_BASE_URL, TIENDANUBE_USER_AGENT, TIENDANUBE_AUTH_HEADER,
+        TIENDANUBE_HTTP2, TIENDANUBE_MAX_CONNECTIONS, TIENDANUBE_MAX_KEEPALIVE,
+        TIENDANUBE_KEEPALIVE_EXPIRY, TIENDANUBE_CONNECT_TIMEOUT,
+        TIENDANUBE_READ_TIMEOUT, TIENDANUBE_WRITE_TIMEOUT,
+        TIENDANUBE_POOL_TIMEOUT, TIENDANUBE_MAX_STORES, TIENDANUBE_SINGLE_FLIGHT
+        """
+        defaults = cls()
+        return cls(
+            base_url=os.getenv("TIENDANUBE_API_BASE_URL") or DEFAULT_BASE_URL,
+            user_agent=os.getenv("TIENDANUBE_USER_AGENT") or defaults.user_agent,
+            auth_header=os.getenv("TIENDANUBE_AUTH_HEADER") or defaults.auth_header,
+            http2=os.getenv("TIENDANUBE_HTTP2", "1").lower() not in ("0", "false", "no"),
+            max_connections=_env_int("TIENDANUBE_MAX_CONNECTIONS", defaults.max_connections),
+            max_keepalive_connections=_env_int("TIENDANUBE_MAX_KEEPALIVE",
+                                               defaults.max_keepalive_connections),
+            keepalive_expiry=_env_float("TIENDANUBE_KEEPALIVE_EXPIRY", defaults.keepalive_expiry),
+            connect_timeout=_env_float("TIENDANUBE_CONNECT_TIMEOUT", defaults.connect_timeout),
+            read_timeout=_env_float("TIENDANUBE_READ_TIMEOUT", defaults.read_timeout),
+            write_timeout=_env_float("TIENDANUBE_WRITE_TIMEOUT", defaults.write_timeout),
+            pool_timeout=_env_float("TIENDANUBE_POOL_TIMEOUT", defaults.pool_timeout),
+            max_stores=_env_int("TIENDANUBE_MAX_STORES", defaults.max_stores),
+            single_flight=os.getenv("TIENDANUBE_SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no"),
+        )
+
+
+class TiendaNubeClient:
+    """
+    Cliente compartido con un pool de conexiones por tienda
+
+    Cada tienda tiene su propio httpx.AsyncClient: una tienda con llamadas
+    lentas no agota las conexiones de las demás. Se mantienen como máximo
+    `max_stores` pools; el menos usado se cierra al superar el límite.
+
+    Los GET idénticos (tienda, token, path y query) que coinciden en vuelo
+    comparten un solo request a la API (single-flight).
+
+    Con `retry` los fallos transitorios se reintentan según el método (ver
+    resilience.py); con `breakers` una tienda con la API degradada falla
+    enseguida con CircuitOpenError en lugar de acumular requests.
+
+    Con `metrics` (metrics.Metrics) se registra la duración de cada intento
+    y la espera en el rate limiter por tienda.
+    """
+
+    def __init__(self, config: Optional[ClientConfig] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 scheduler: Optional[RateLimitScheduler] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 breakers: Optional[CircuitBreakers] = None,
+                 metrics=None):
+        self.config = config or ClientConfig()
+        self._transport = transport
+        self.scheduler = scheduler
+        self.retry = retry
+        self.breakers = breakers
+        self.metrics = metrics
+        self._clients: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self._in_flight: Dict[Tuple, asyncio.Task] = {}
+        self.coalesced = 0
+        self.http2 = self.config.http2 and transport is None and _http2_available()
+        if self.config.http2 and transport is None and not self.http2:
+            logger.warning("⚠️ HTTP/2 no disponible (instalar httpx[http2]). Usando HTTP/1.1")
+
+    @classmethod
+    def from_env(cls, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 metrics=None) -> "TiendaNubeClient":
+        """
+        Cliente configurado desde el entorno
+
+        TIENDANUBE_RATE_LIMIT=0 desactiva el scheduler, TIENDANUBE_MAX_RETRIES=0
+        los reintentos y TIENDANUBE_BREAKER_THRESHOLD=0 el circuit breaker.
+        """
+        scheduler = None
+        if os.getenv("TIENDANUBE_RATE_LIMIT", "1").lower() not in ("0", "false", "no"):
+            scheduler = RateLimitScheduler.from_env()
+        retry = RetryPolicy.from_env()
+        breakers = CircuitBreakers.from_env()
+        return cls(ClientConfig.from_env(), transport=transport, scheduler=scheduler,
+                   retry=retry if retry.max_retries > 0 else None,
+                   breakers=breakers if breakers.failure_threshold > 0 else None, metrics=metrics)
+
+    def _new_client(self) -> httpx.AsyncClient:
+        config = self.config
+        return httpx.AsyncClient(
+            http2=self.http2,
+            transport=self._transport,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.write_timeout,
+                pool=config.pool_timeout,
+            ),
+            headers={"User-Agent": config.user_agent},
+        )
+
+    async def _client_for(self, store_id: str) -> httpx.AsyncClient:
+        client = self._clients.get(store_id)
+        if client is not None:
+            self._clients.move_to_end(store_id)
+            return client
+
+        client = self._clients[store_id] = self._new_client()
+        while len(self._clients) > self.config.max_stores:
+            _, oldest = self._clients.popitem(last=False)
+            await oldest.aclose()
+        return client
+
+    def url_for(self, store_id: str, path: str) -> str:
+        """URL completa de un path para una tienda"""
+        return f"{self.config.base_url}/{store_id}{path}"
+
+    async def request(self, store_id: str, method: str, path: str, *,
+                      access_token: Optional[str] = None,
+                      params: Optional[Mapping[str, Any]] = None,
+                      json: Any = None,
+                      headers: Optional[Mapping[str, str]] = None,
+                      priority: int = PRIORITY_NORMAL) -> httpx.Response:
+        """
+        Ejecutar una llamada a la API de una tienda
+
+        Args:
+            store_id: ID de la tienda (user_id de la autorización)
+            method: Método HTTP
+            path: Path ya completado (ej. '/products/123')
+            access_token: Token de acceso de la tienda
+            params: Parámetros de query
+            json: Cuerpo JSON
+            headers: Headers adicionales
+            priority: Prioridad en la cola de la tienda (menor sale antes)
+        """
+        store_id = str(store_id)
+        method = method.upper()
+        if method != "GET" or json is not None or not self.config.single_flight:
+            return await self._send(store_id, method, path, access_token, params, json, headers, priority)
+
+        key = (store_id, access_token, path,
+               tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())),
+               tuple(sorted((headers or {}).items())))
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._send(store_id, method, path, access_token, params, json, headers, priority))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # shield: si un solicitante se cancela, el request sigue para los demás
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Tuple, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # Marcar la excepción como leída aunque todos los solicitantes se hayan ido
+            task.exception()
+
+    async def _send(self, store_id: str, method: str, path: str, access_token: Optional[str],
+                    params: Optional[Mapping[str, Any]], json: Any,
+                    headers: Optional[Mapping[str, str]], priority: int) -> httpx.Response:
+        """Enviar con reintentos y circuit breaker (si están configurados)"""
+        breaker = self.breakers.store(store_id) if self.breakers is not None else None
+        attempt = 0
+        while True:
+            if breaker is not None:
+                retry_in = breaker.allow()
+                if retry_in is not None:
+                    raise CircuitOpenError(store_id, retry_in)
+            try:
+                response = await self._send_once(store_id, method, path, access_token, params, json,
+                                                 headers, priority)
+            except httpx.HTTPError as e:
+                if breaker is not None:
+                    breaker.failure()
+                delay = self.retry.next_delay(method, attempt, error=e) if self.retry else None
+                if delay is None:
+                    raise
+                logger.warning(f"Reintentando {method} {path} (tienda {store_id}) en {delay:.2f}s: {e!r}")
+            except BaseException:
+                if breaker is not None:
+                    breaker.abandon()
+                raise
+            else:
+                if breaker is not None:
+                    if response.status_code >= 500:
+                        breaker.failure()
+                    else:
+                        breaker.success()
+                delay = self.retry.next_delay(method, attempt, response=response) if self.retry else None
+                if delay is None:
+                    return response
+                logger.warning(f"Reintentando {method} {path} (tienda {store_id}) en {delay:.2f}s: "
+                               f"HTTP {response.status_code}")
+            attempt += 1
+            self.retry.retries += 1
+            await self.retry.sleep(delay)
+
+    async def _send_once(self, store_id: str, method: str, path: str, access_token: Optional[str],
+                         params: Optional[Mapping[str, Any]], json: Any,
+                         headers: Optional[Mapping[str, str]], priority: int) -> httpx.Response:
+        request_headers = dict(headers or {})
+        if access_token:
+            request_headers[self.config.auth_header] = f"{self.config.auth_scheme} {access_token}"
+
+        client = await self._client_for(store_id)
+        if self.scheduler is None:
+            return await self._timed_request(client, store_id, method, path, params, json, request_headers)
+
+        # Esperar lugar en el bucket de la tienda en lugar de recibir un 429
+        waited = await self.scheduler.acquire(store_id, priority)
+        if self.metrics is not None:
+            self.metrics.observe_rate_limit_wait(store_id, waited)
+        response = None
+        try:
+            response = await self._timed_request(client, store_id, method, path, params, json, request_headers)
+            return response
+        finally:
+            if response is not None:
+                self.scheduler.release(store_id, response.status_code, response.headers)
+            else:
+                self.scheduler.release(store_id)
+
+    async def _timed_request(self, client: httpx.AsyncClient, store_id: str, method: str, path: str,
+                             params: Optional[Mapping[str, Any]], json: Any,
+                             headers: Dict[str, str]) -> httpx.Response:
+        if self.metrics is None:
+            return await client.request(method, self.url_for(store_id, path),
+                                        params=params, json=json, headers=headers)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, self.url_for(store_id, path),
+                                            params=params, json=json, headers=headers)
+        except httpx.HTTPError:
+            self.metrics.observe_upstream(store_id, method, "error", time.perf_counter() - started)
+            raise
+        self.metrics.observe_upstream(store_id, method, response.status_code, time.perf_counter() - started)
+        return response
+
+    async def aclose(self):
+        """Cerrar todos los pools"""
+        clients, self._clients = list(self._clients.values()), OrderedDict()
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.config.base_url,
+            "http2": self.http2,
+            "stores": len(self._clients),
+            "single_flight": {"enabled": self.config.single_flight,
+                              "in_flight": len(self._in_flight),
+                              "coalesced": self.coalesced},
+            "rate_limit": self.scheduler.stats() if self.scheduler else {},
+            "retries": self.retry.stats() if self.retry else {},
+            "circuit_breakers": self.breakers.stats() if self.breakers else {},
+        }
+
+
+def response_payload(response: httpx.Response) -> Dict[str, Any]:
+    """Resultado de una llamada para devolver al agente"""
+    try:
+        data = response.json()
+    except ValueError:
+        data = response.text
+    return {
+        "status_code": response.status_code,
+        "headers": {name: response.headers[name] for name in RESPONSE_HEADERS if name in response.headers},
+        "data": data,
+    }
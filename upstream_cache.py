@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Caché de respuestas de la API de Tienda Nube para execute_endpoint
+
+Guarda las respuestas 200 de los GET con un TTL por recurso del catálogo
+(/store o /locations casi no cambian; /orders cambia todo el tiempo). Un
+POST/PUT/PATCH/DELETE exitoso sobre un recurso invalida los GET cacheados
+de ese recurso y de sus relacionados en la misma tienda.
+
+Backends:
+    memory  ResultCache (LRU acotada por entradas y bytes); sólo sirve con
+            un worker: cada proceso tiene la suya
+    disk    SQLite acotado por entradas y bytes, desalojo por último uso;
+            sobrevive reinicios y se comparte entre workers (cada proceso
+            abre su conexión en el primer uso, después del fork)
+
+Sin UPSTREAM_CACHE (o con 'auto') se usa disk si WEB_CONCURRENCY o
+GUNICORN_WORKERS indican más de un worker y memory si no.
+
+La invalidación usa una generación por (tienda, recurso) que forma parte
+de la clave: invalidar es O(1) y las entradas viejas quedan inalcanzables
+hasta que se desalojan (el backend en disco además las borra). Con disk
+las generaciones viven en la misma base, así una escritura atendida por
+un worker invalida la caché de todos. Desde el event loop se usan
+alookup/aput/ainvalidate, que con disk corren en un thread (SQLite es
+bloqueante) y con memory directo.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from fast_json import dumps, loads
+from result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+# TTL (segundos) por recurso del catálogo; 0 = no cachear
+DEFAULT_TTLS: Dict[str, float] = {
+    "store": 3600,
+    "payment_providers": 3600,
+    "payment_options": 3600,
+    "shipping_carriers": 3600,
+    "locations": 3600,
+    "email_templates": 3600,
+    "billing": 3600,
+    "scripts": 600,
+    "pages": 600,
+    "blog": 600,
+    "categories": 300,
+    "webhooks": 300,
+    "orders": 0,
+    "draft_orders": 0,
+    "fulfillment_orders": 0,
+    "transactions": 0,
+    "abandoned_checkouts": 0,
+    "cart": 0,
+}
+DEFAULT_TTL = 30.0
+
+# Recursos cuyos GET cambian cuando se escribe en otro
+RELATED_RESOURCES: Dict[str, Tuple[str, ...]] = {
+    "products": ("product_variants", "product_images", "metafields"),
+    "product_variants": ("products",),
+    "product_images": ("products",),
+    "orders": ("fulfillment_orders", "transactions", "customers"),
+    "fulfillment_orders": ("orders",),
+    "transactions": ("orders",),
+    "draft_orders": ("orders",),
+    "locations": ("products", "product_variants"),
+    "metafields": ("products", "customers", "orders"),
+}
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def worker_count() -> int:
+    """Workers según WEB_CONCURRENCY / GUNICORN_WORKERS (gunicorn.conf.py define el primero)"""
+    for name in ("WEB_CONCURRENCY", "GUNICORN_WORKERS"):
+        value = os.getenv(name)
+        if value and value.isdigit():
+            return int(value)
+    return 1
+
+
+def parse_ttls(value: Optional[str]) -> Dict[str, float]:
+    """'orders=0,products=60' -> {'orders': 0.0, 'products': 60.0}"""
+    ttls: Dict[str, float] = {}
+    for item in (value or "").split(","):
+        name, sep, seconds = item.partition("=")
+        if sep and name.strip():
+            ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+class DiskCache:
+    """
+    Caché en SQLite acotada por entradas y bytes
+
+    Misma interfaz que ResultCache para get/put/stats, más `invalidate`
+    y `generation` por etiqueta (tienda y recurso), compartidas entre
+    procesos. La conexión es por proceso y se abre en el primer uso.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Conexiones heredadas de otro proceso: no se usan ni se cierran
+        self._inherited: List[sqlite3.Connection] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Conexión de este proceso (una abierta antes de un fork no se comparte)"""
+        if self._pid != os.getpid():
+            with self._open_lock:
+                if self._pid != os.getpid():
+                    if self._connection is not None:
+                        self._inherited.append(self._connection)
+                    self._connection = self._connect()
+                    self._pid = os.getpid()
+        return self._connection
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, tag TEXT NOT NULL, value BLOB NOT NULL,
+                size INTEGER NOT NULL, expires_at REAL, used_at REAL NOT NULL
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_tag ON entries (tag)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS generations (tag TEXT PRIMARY KEY, generation INTEGER NOT NULL)")
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return loads(row[0])
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None, tag: str = ""):
+        data = dumps(value)
+        if self.max_entries <= 0 or len(data) > self.max_bytes:
+            return
+        now = self.clock()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                               (key, tag, data, len(data), now + ttl if ttl else None, now))
+            self._evict()
+
+    def _evict(self):
+        count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        # Primero lo vencido, después lo menos usado
+        expired = self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ? "
+                                     "RETURNING size", (self.clock(),)).fetchall()
+        count -= len(expired)
+        size -= sum(row[0] for row in expired)
+        victims = []
+        for key, entry_size in self._conn.execute("SELECT key, size FROM entries ORDER BY used_at"):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            size -= entry_size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def generation(self, tag: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT generation FROM generations WHERE tag = ?", (tag,)).fetchone()
+        return row[0] if row else 0
+
+    def invalidate(self, tag: str) -> int:
+        """Avanzar la generación de la etiqueta y borrar sus entradas"""
+        with self._lock:
+            self._conn.execute("INSERT INTO generations VALUES (?, 1) "
+                               "ON CONFLICT (tag) DO UPDATE SET generation = generation + 1", (tag,))
+            return self._conn.execute("DELETE FROM entries WHERE tag = ?", (tag,)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self):
+        with self._open_lock:
+            if self._connection is not None and self._pid == os.getpid():
+                with self._lock:
+                    self._connection.close()
+            self._connection = None
+            self._pid = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend": "disk",
+            "path": self.path,
+            "entries": count,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class UpstreamCache:
+    """
+    Caché de GETs a la API con TTL por recurso e invalidación por escritura
+
+    Args:
+        backend: ResultCache o DiskCache
+        ttls: TTL por recurso (se combina con DEFAULT_TTLS)
+        default_ttl: TTL de los recursos sin entrada en `ttls`
+    """
+
+    def __init__(self, backend, ttls: Optional[Mapping[str, float]] = None,
+                 default_ttl: float = DEFAULT_TTL):
+        self.backend = backend
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        # Sólo con el backend en memoria; DiskCache las guarda en la base compartida
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["UpstreamCache"]:
+        """
+        UPSTREAM_CACHE=auto|memory|disk|off, UPSTREAM_CACHE_PATH,
+        UPSTREAM_CACHE_MAX_ENTRIES, UPSTREAM_CACHE_MAX_BYTES,
+        UPSTREAM_CACHE_DEFAULT_TTL, UPSTREAM_CACHE_TTLS ('orders=0,products=60')
+        """
+        kind = os.getenv("UPSTREAM_CACHE", "auto").lower()
+        if kind in ("off", "0", "false", "no", ""):
+            return None
+        workers = worker_count()
+        if kind == "auto":
+            kind = "disk" if workers > 1 else "memory"
+        elif kind == "memory" and workers > 1:
+            logger.warning(f"⚠️ UPSTREAM_CACHE=memory con {workers} workers: cada uno tiene su caché "
+                           "y una escritura sólo invalida la del worker que la atendió")
+        max_entries = int(os.getenv("UPSTREAM_CACHE_MAX_ENTRIES", "2048"))
+        if kind == "disk":
+            backend = DiskCache(os.getenv("UPSTREAM_CACHE_PATH", "upstream_cache.sqlite"),
+                                max_entries=max_entries,
+                                max_bytes=int(os.getenv("UPSTREAM_CACHE_MAX_BYTES", 256 * 1024 * 1024)))
+        else:
+            backend = ResultCache(max_entries=max_entries,
+                                  max_bytes=int(os.getenv("UPSTREAM_CACHE_MAX_BYTES", 32 * 1024 * 1024)))
+        return cls(backend, ttls=parse_ttls(os.getenv("UPSTREAM_CACHE_TTLS")),
+                   default_ttl=float(os.getenv("UPSTREAM_CACHE_DEFAULT_TTL", DEFAULT_TTL)))
+
+    def ttl_for(self, resource: str) -> float:
+        return self.ttls.get(resource, self.default_ttl)
+
+    @staticmethod
+    def _tag(store_id: str, resource: str) -> str:
+        return f"{store_id}|{resource}"
+
+    def key(self, store_id: str, resource: str, access_token: Optional[str], path: str,
+            params: Optional[Mapping[str, Any]] = None) -> str:
+        """Clave de un GET (el token entra hasheado: otra credencial no comparte respuestas)"""
+        query = "&".join(f"{k}={v}" for k, v in sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        token = hashlib.blake2b((access_token or "").encode("utf-8"), digest_size=8).hexdigest()
+        tag = self._tag(store_id, resource)
+        if isinstance(self.backend, DiskCache):
+            generation = self.backend.generation(tag)
+        else:
+            generation = self._generations.get((str(store_id), resource), 0)
+        return f"{tag}|{generation}|{token}|{path}?{query}"
+
+    def get(self, store_id: str, resource: str, access_token: Optional[str], path: str,
+            params: Optional[Mapping[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return self.lookup(store_id, resource, access_token, path, params)[1]
+
+    def lookup(self, store_id: str, resource: str, access_token: Optional[str], path: str,
+               params: Optional[Mapping[str, Any]] = None) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Clave (con la generación vigente) y respuesta cacheada; (None, None) si
+        el recurso no se cachea. La clave se pasa a `put` después de llamar a la
+        API: si hubo una invalidación en el medio, la respuesta queda guardada
+        con la generación vieja y nadie la lee.
+        """
+        if self.ttl_for(resource) <= 0:
+            return None, None
+        key = self.key(store_id, resource, access_token, path, params)
+        return key, self.backend.get(key)
+
+    def put(self, store_id: str, resource: str, access_token: Optional[str], path: str,
+            params: Optional[Mapping[str, Any]], payload: Dict[str, Any], key: Optional[str] = None):
+        """Guardar una respuesta (sólo las 200) bajo `key` (de `lookup`) o la clave actual"""
+        ttl = self.ttl_for(resource)
+        if ttl <= 0 or payload.get("status_code") != 200:
+            return
+        if key is None:
+            key = self.key(store_id, resource, access_token, path, params)
+        if isinstance(self.backend, DiskCache):
+            self.backend.put(key, payload, ttl=ttl, tag=self._tag(store_id, resource))
+        else:
+            self.backend.put(key, payload, ttl=ttl)
+
+    def invalidate(self, store_id: str, resource: str) -> Iterable[str]:
+        """Invalidar los GET cacheados de un recurso y sus relacionados"""
+        store_id = str(store_id)
+        resources = (resource,) + RELATED_RESOURCES.get(resource, ())
+        for name in resources:
+            if isinstance(self.backend, DiskCache):
+                self.backend.invalidate(self._tag(store_id, name))
+            else:
+                self._generations[(store_id, name)] = self._generations.get((store_id, name), 0) + 1
+        self.invalidations += 1
+        return resources
+
+    async def _offload(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # SQLite bloquea: fuera del event loop. La LRU en memoria no lo amerita
+        if isinstance(self.backend, DiskCache):
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    async def alookup(self, *args, **kwargs) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """`lookup` para usar desde el event loop"""
+        return await self._offload(self.lookup, *args, **kwargs)
+
+    async def aput(self, *args, **kwargs):
+        """`put` para usar desde el event loop"""
+        await self._offload(self.put, *args, **kwargs)
+
+    async def ainvalidate(self, store_id: str, resource: str) -> Iterable[str]:
+        """`invalidate` para usar desde el event loop"""
+        return await self._offload(self.invalidate, store_id, resource)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.backend.stats()
+        stats.setdefault("backend", "memory")
+        return {**stats, "invalidations": self.invalidations, "default_ttl": self.default_ttl}
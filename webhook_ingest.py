@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Ingesta de webhooks de Tienda Nube
+
+Tienda Nube envía un POST por cada evento con el cuerpo
+{"store_id": 123, "event": "product/updated", "id": 456} y el header
+x-linkedstore-hmac-sha256 = HMAC-SHA256(cuerpo, client secret de la app).
+
+Los eventos se encolan en un buffer acotado que los combina por entidad
+(tienda, recurso, id): diez "product/updated" seguidos del mismo producto
+se aplican una sola vez. Un consumidor toma lotes del buffer y los aplica
+(ej. MirrorWebhookApplier refresca el espejo local con una llamada por
+lote en lugar de una por evento).
+
+Si el applier falla, los eventos del lote vuelven al buffer con espera
+exponencial (retry_backoff, 2x, 4x...) hasta max_retries reintentos; los
+que se agotan van a la cola de fallidos (dead letter): `dead_letters` en
+memoria y, con dead_letter_path, un archivo NDJSON en el formato de los
+webhooks que el modo replay puede volver a enviar.
+
+Modo replay (prueba de carga sin la tienda real):
+    python webhook_ingest.py replay eventos.ndjson
+    python webhook_ingest.py replay eventos.ndjson --url http://localhost:8000/webhooks/tiendanube --secret S
+    python webhook_ingest.py replay fallidos.ndjson --url ...    (reenviar la cola de fallidos)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import httpx
+
+from store_mirror import StoreMirror
+from tiendanube_client import TiendaNubeClient
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "x-linkedstore-hmac-sha256"
+
+# Entidad del evento ("product/updated" -> "product") -> recurso del espejo
+EVENT_RESOURCES = {
+    "product": "products",
+    "order": "orders",
+    "customer": "customers",
+}
+
+# Productos por GET /products?ids=... (límite del parámetro ids)
+IDS_PER_REQUEST = 30
+
+EntityKey = Tuple[str, str, int]
+
+
+def sign(body: bytes, secret: str) -> str:
+    """Firma de un cuerpo como la calcula Tienda Nube"""
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """Verificar x-linkedstore-hmac-sha256 en tiempo constante"""
+    if not signature:
+        return False
+    return hmac.compare_digest(sign(body, secret), signature.strip().lower())
+
+
+def parse_event(payload: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Normalizar un webhook: {store_id, resource, action, id, event}
+
+    Devuelve None si el payload no es un evento válido o su entidad no
+    tiene recurso en el espejo (ej. "app/uninstalled").
+    """
+    try:
+        entity, _, action = str(payload["event"]).partition("/")
+        store_id, entity_id = str(payload["store_id"]), int(payload["id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    resource = EVENT_RESOURCES.get(entity)
+    if resource is None:
+        return None
+    return {"store_id": store_id, "resource": resource, "action": action,
+            "id": entity_id, "event": payload["event"]}
+
+
+class WebhookIngestor:
+    """
+    Buffer acotado de eventos con combinación por entidad
+
+    Args:
+        apply: Corutina que recibe un lote de eventos ya combinados
+        max_pending: Entidades distintas pendientes como máximo (al llenarse
+            `offer` devuelve False y el endpoint responde 503 para que
+            Tienda Nube reintente)
+        batch_size: Eventos por lote
+        flush_interval: Segundos que se espera a juntar un lote
+        max_retries: Reintentos de un evento cuyo lote falló
+        retry_backoff: Espera antes del primer reintento (se duplica en cada uno)
+        dead_letter_path: Archivo NDJSON donde se agregan los eventos agotados
+        max_dead_letters: Eventos agotados que se guardan en memoria
+    """
+
+    def __init__(self, apply: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+                 max_pending: int = 10000, batch_size: int = 100, flush_interval: float = 0.5,
+                 max_retries: int = 3, retry_backoff: float = 1.0,
+                 dead_letter_path: Optional[str] = None, max_dead_letters: int = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.apply = apply
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dead_letter_path = dead_letter_path
+        self.clock = clock
+        self._pending: "OrderedDict[EntityKey, Dict[str, Any]]" = OrderedDict()
+        # (momento del reintento, eventos) en orden de llegada
+        self._retries: List[Tuple[float, List[Dict[str, Any]]]] = []
+        self._attempts: Dict[EntityKey, int] = {}
+        self.dead_letters: Deque[Dict[str, Any]] = deque(maxlen=max_dead_letters)
+        self._wakeup: Optional[asyncio.Event] = None
+        self.received = 0
+        self.coalesced = 0
+        self.ignored = 0
+        self.rejected = 0
+        self.applied = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def offer(self, payload: Mapping[str, Any]) -> bool:
+        """
+        Encolar un webhook sin bloquear
+
+        Returns:
+            False si el buffer está lleno (el evento no se encoló)
+        """
+        self.received += 1
+        event = parse_event(payload)
+        if event is None:
+            self.ignored += 1
+            return True
+
+        key = (event["store_id"], event["resource"], event["id"])
+        previous = self._pending.get(key)
+        if previous is not None:
+            # La entidad ya estaba pendiente: alcanza con aplicarla una vez
+            self.coalesced += 1
+            if previous["action"] == "deleted" and event["action"] != "created":
+                return True
+            self._pending[key] = event
+            return True
+
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            return False
+        self._pending[key] = event
+        if len(self._pending) >= self.batch_size:
+            self._event().set()
+        return True
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            _, event = self._pending.popitem(last=False)
+            batch.append(event)
+        return batch
+
+    @staticmethod
+    def _key(event: Mapping[str, Any]) -> EntityKey:
+        return (event["store_id"], event["resource"], event["id"])
+
+    def _requeue_due(self):
+        """Devolver al buffer los reintentos cuya espera terminó"""
+        now = self.clock()
+        due = [events for at, events in self._retries if at <= now]
+        self._retries = [(at, events) for at, events in self._retries if at > now]
+        for events in due:
+            for event in events:
+                key = self._key(event)
+                newer = self._pending.get(key)
+                # Si llegó otro evento de la entidad mientras tanto, vale la misma regla que en offer
+                if newer is None or (event["action"] == "deleted" and newer["action"] != "created"):
+                    self._pending[key] = event
+
+    def _failed(self, batch: List[Dict[str, Any]]):
+        """Reprogramar los eventos de un lote fallido o mandarlos a la cola de fallidos"""
+        retry, exhausted = [], []
+        for event in batch:
+            key = self._key(event)
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts > self.max_retries:
+                self._attempts.pop(key, None)
+                exhausted.append(event)
+            else:
+                self._attempts[key] = attempts
+                retry.append(event)
+        if retry:
+            self.retried += len(retry)
+            attempts = max(self._attempts[self._key(event)] for event in retry)
+            self._retries.append((self.clock() + self.retry_backoff * 2 ** (attempts - 1), retry))
+        if exhausted:
+            self._dead_letter(exhausted)
+
+    def _dead_letter(self, events: List[Dict[str, Any]]):
+        self.dead_lettered += len(events)
+        payloads = [{"store_id": event["store_id"], "event": event["event"], "id": event["id"]}
+                    for event in events]
+        self.dead_letters.extend(payloads)
+        logger.error(f"❌ {len(events)} webhooks agotaron los reintentos")
+        if self.dead_letter_path:
+            try:
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(payload) + "\n" for payload in payloads))
+            except OSError as e:
+                logger.error(f"❌ No se pudo escribir {self.dead_letter_path}: {e!r}")
+
+    async def flush(self) -> int:
+        """Aplicar todo lo pendiente (y los reintentos vencidos); devuelve los eventos aplicados"""
+        total = 0
+        self._requeue_due()
+        while self._pending:
+            batch = self._take_batch()
+            self.batches += 1
+            try:
+                await self.apply(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_batches += 1
+                logger.error(f"❌ Error aplicando {len(batch)} webhooks: {e!r}")
+                self._failed(batch)
+                continue
+            for event in batch:
+                self._attempts.pop(self._key(event), None)
+            self.applied += len(batch)
+            total += len(batch)
+        return total
+
+    def spill(self) -> int:
+        """Mandar lo pendiente y los reintentos a la cola de fallidos (al apagar)"""
+        events = list(self._pending.values())
+        events += [event for _, retry in self._retries for event in retry]
+        self._pending.clear()
+        self._retries.clear()
+        self._attempts.clear()
+        if events:
+            self._dead_letter(events)
+        return len(events)
+
+    async def run(self):
+        """Consumir el buffer: un lote cuando se llena o cada flush_interval"""
+        wakeup = self._event()
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "ignored": self.ignored,
+            "rejected_full": self.rejected,
+            "applied": self.applied,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "retrying": sum(len(events) for _, events in self._retries),
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+class MirrorWebhookApplier:
+    """
+    Aplicar lotes de webhooks al espejo local
+
+    Las bajas se borran directamente; el resto se vuelve a leer de la API
+    (el webhook sólo trae el id): los productos en grupos de 30 con
+    GET /products?ids=..., las órdenes y clientes con un GET por id en
+    paralelo (el scheduler de rate limit los espacia).
+    """
+
+    def __init__(self, mirror: StoreMirror, client: TiendaNubeClient,
+                 token_for: Callable[[str], Optional[str]]):
+        self.mirror = mirror
+        self.client = client
+        self.token_for = token_for
+
+    async def __call__(self, batch: List[Dict[str, Any]]):
+        groups: Dict[Tuple[str, str], Dict[str, List[int]]] = {}
+        for event in batch:
+            group = groups.setdefault((event["store_id"], event["resource"]), {"deleted": [], "changed": []})
+            group["deleted" if event["action"] == "deleted" else "changed"].append(event["id"])
+
+        for (store_id, resource), ids in groups.items():
+            if ids["deleted"]:
+                await asyncio.to_thread(self.mirror.delete, store_id, resource, ids["deleted"])
+            if ids["changed"]:
+                items = await self._fetch(store_id, resource, ids["changed"])
+                await asyncio.to_thread(self.mirror.upsert, store_id, resource, items)
+                missing = set(ids["changed"]) - {item["id"] for item in items}
+                if missing:
+                    # Borrados antes de poder leerlos
+                    await asyncio.to_thread(self.mirror.delete, store_id, resource, sorted(missing))
+
+    async def _fetch(self, store_id: str, resource: str, ids: List[int]) -> List[Dict[str, Any]]:
+        token = self.token_for(store_id)
+        if resource == "products":
+            chunks = [ids[i:i + IDS_PER_REQUEST] for i in range(0, len(ids), IDS_PER_REQUEST)]
+            responses = await asyncio.gather(*(
+                self.client.request(store_id, "GET", "/products", access_token=token,
+                                    params={"ids": ",".join(map(str, chunk)), "per_page": IDS_PER_REQUEST})
+                for chunk in chunks))
+            items = []
+            for response in responses:
+                response.raise_for_status()
+                items.extend(response.json())
+            return items
+
+        responses = await asyncio.gather(*(
+            self.client.request(store_id, "GET", f"/{resource}/{entity_id}", access_token=token)
+            for entity_id in ids))
+        items = []
+        for response in responses:
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            items.append(response.json())
+        return items
+
+
+# ===== REPLAY =====
+
+def read_events(path: str) -> Iterable[Dict[str, Any]]:
+    """Eventos de un archivo NDJSON (un webhook por línea)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+async def replay_into(ingestor: WebhookIngestor, events: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Pasar eventos por el ingestor en proceso (mide ingesta + aplicación)"""
+    started = time.perf_counter()
+    for payload in events:
+        while not ingestor.offer(payload):
+            await ingestor.flush()
+    await ingestor.flush()
+    elapsed = time.perf_counter() - started
+    return {**ingestor.stats(), "seconds": round(elapsed, 3),
+            "events_per_second": round(ingestor.received / elapsed, 1) if elapsed else None}
+
+
+async def replay_http(url: str, events: Iterable[Mapping[str, Any]], secret: str,
+                      concurrency: int = 20) -> Dict[str, Any]:
+    """Enviar eventos firmados a un endpoint de webhooks (prueba de carga del receptor)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: Dict[int, int] = {}
+    latencies: List[float] = []
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        async def send(payload):
+            body = json.dumps(payload).encode("utf-8")
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(url, content=body, headers={
+                    "Content-Type": "application/json", SIGNATURE_HEADER: sign(body, secret)})
+                latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(payload) for payload in events))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de webhooks de Tienda Nube desde un archivo NDJSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+    replay = sub.add_parser("replay", help="Reproducir eventos")
+    replay.add_argument("file", help="Archivo NDJSON con un webhook por línea")
+    replay.add_argument("--url", help="Endpoint de webhooks (sin --url se ingiere en proceso sin aplicar)")
+    replay.add_argument("--secret", default="", help="Secreto para firmar los eventos (con --url)")
+    replay.add_argument("--concurrency", type=int, default=20)
+    replay.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    events = list(read_events(args.file))
+    if args.url:
+        result = asyncio.run(replay_http(args.url, events, args.secret, args.concurrency))
+    else:
+        async def noop(batch):
+            return None
+        ingestor = WebhookIngestor(noop, batch_size=args.batch_size)
+        result = asyncio.run(replay_into(ingestor, events))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()